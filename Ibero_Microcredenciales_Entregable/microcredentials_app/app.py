@@ -21,16 +21,22 @@ import streamlit as st
 import pandas as pd
 
 from config import (
-    EXCEL_PATH, OUTPUT_DIR, MAX_LEARNING_HOURS,
+    EXCEL_PATH, OUTPUT_DIR, MAX_LEARNING_HOURS, MMR_LAMBDA,
     UI_TITLE, UI_SUBTITLE, TOP_N_COURSERA, TOP_N_EXTERNAL, TOP_N_COMPETENCIES,
     COL_NAME, COL_HOURS, COL_RATING, COL_URL, COL_DOMAIN, COL_DIFFICULTY, COL_PARTNER
 )
 from modules.document_processor import extract_text, generate_summary
-from modules.catalog_loader import load_courses, load_specializations, get_catalog_stats
+from modules.catalog_loader import (
+    load_course_store, load_specialization_store, get_catalog_stats
+)
 from modules.competency_extractor import (
     extract_competencies, competencies_to_text, competencies_to_search_query
 )
 from modules.coursera_matcher import CourseraMatcher, SpecializationMatcher
+from modules.catalog_bundle import load_current_bundle, config_key
+from modules.competency_idf import build_idf_table, syllabus_texts
+from modules.catalog_snapshot import source_fingerprint
+from modules.result_cache import ResultCache, cache_key, text_digest
 from modules.external_searcher import search_external_certifications
 from modules.report_generator import generate_report
 
@@ -179,28 +185,71 @@ st.markdown("""
 
 
 # === Funciones de caché ===
-@st.cache_data(show_spinner="Cargando catálogo de Coursera...")
-def cached_load_courses(max_hours):
-    return load_courses(max_hours=max_hours, use_cache=False)
-
-@st.cache_data(show_spinner="Cargando especializaciones...")
+@st.cache_resource(show_spinner="Cargando índice precompilado del catálogo...")
+def get_catalog_bundle():
+    # Bundle generado con compile_catalog.py para el Excel actual (None si no existe)
+    return load_current_bundle()
+
+@st.cache_resource(show_spinner="Cargando catálogo de Coursera...")
+def cached_load_courses():
+    # Catálogo completo y compacto (mmap), compartido entre sesiones;
+    # el filtro de horas se aplica al consultar
+    bundle = get_catalog_bundle()
+    if bundle is not None:
+        return bundle.courses
+    return load_course_store()
+
+@st.cache_resource(show_spinner="Cargando especializaciones...")
 def cached_load_specializations():
-    return load_specializations()
+    bundle = get_catalog_bundle()
+    if bundle is not None:
+        return bundle.specs
+    return load_specialization_store()
 
 @st.cache_resource(show_spinner="Preparando motor de búsqueda...")
-def get_course_matcher(max_hours):
-    df = cached_load_courses(max_hours)
+def get_course_matcher():
+    bundle = get_catalog_bundle()
+    if bundle is not None:
+        return bundle.course_matcher
+    df = cached_load_courses()
     matcher = CourseraMatcher()
     matcher.fit(df)
     return matcher
 
 @st.cache_resource(show_spinner="Preparando matcher de especializaciones...")
 def get_spec_matcher():
-    df = cached_load_specializations()
+    bundle = get_catalog_bundle()
+    if bundle is not None:
+        return bundle.spec_matcher
     matcher = SpecializationMatcher()
-    matcher.fit(df)
+    # Con el catálogo de cursos, la relevancia se deriva de los cursos de cada especialización
+    matcher.fit(cached_load_specializations(), courses=cached_load_courses())
     return matcher
 
+@st.cache_resource(show_spinner="Preparando tabla IDF de competencias...")
+def get_competency_idf():
+    bundle = get_catalog_bundle()
+    if bundle is not None:
+        return bundle.competency_idf
+    courses = cached_load_courses()
+    return build_idf_table(courses.texts("combined_text") + list(syllabus_texts()))
+
+@st.cache_resource
+def get_result_cache():
+    cache = ResultCache()
+    cache.purge()
+    return cache
+
+def catalog_version():
+    # Versión del catálogo para las claves de la caché de resultados
+    bundle = get_catalog_bundle()
+    if bundle is not None:
+        return bundle.key
+    try:
+        return {"config": config_key(), "source": source_fingerprint(EXCEL_PATH)}
+    except OSError:
+        return "sin-catalogo"
+
 
 # === Sidebar ===
 with st.sidebar:
@@ -226,11 +275,46 @@ with st.sidebar:
         help="Filtrar cursos con duración menor o igual a este valor."
     )
 
+    # Filtros por facetas (valores tomados del catálogo indexado)
+    with st.expander("🔎 Filtros del catálogo", expanded=False):
+        try:
+            facets = get_course_matcher().facets
+        except Exception:
+            facets = None
+
+        def facet_options(key):
+            return facets.values(key) if facets is not None else []
+
+        filter_languages = st.multiselect("Idioma", options=facet_options("languages"))
+        filter_difficulties = st.multiselect("Nivel", options=facet_options("difficulties"))
+        filter_domains = st.multiselect("Dominio", options=facet_options("domains"))
+        filter_subdomains = st.multiselect("Subdominio", options=facet_options("subdomains"))
+        min_rating = st.slider(
+            "Rating mínimo", min_value=0.0, max_value=5.0, value=0.0, step=0.1,
+            help="0 = sin filtro. Los cursos sin rating quedan fuera al filtrar."
+        )
+
+    # Idioma, nivel, dominio y subdominio aplican también a especializaciones
+    spec_filters = {
+        "languages": filter_languages,
+        "difficulties": filter_difficulties,
+        "domains": filter_domains,
+        "subdomains": filter_subdomains,
+    }
+    course_filters = dict(spec_filters, min_rating=min_rating or None)
+
     n_coursera = st.slider(
         "Máx. resultados de Coursera",
         min_value=3, max_value=20, value=TOP_N_COURSERA
     )
 
+    mmr_lambda = st.slider(
+        "Relevancia vs. diversidad (λ)",
+        min_value=0.0, max_value=1.0, value=float(MMR_LAMBDA), step=0.05,
+        help="1 = ordenar solo por relevancia. Valores menores evitan que los "
+             "resultados se concentren en un mismo partner, subdominio o tema."
+    )
+
     n_external = st.slider(
         "Máx. resultados externos",
         min_value=3, max_value=20, value=TOP_N_EXTERNAL
@@ -252,8 +336,7 @@ with st.sidebar:
     # Info del catálogo
     st.subheader("📊 Catálogo Coursera")
     try:
-        courses_df = cached_load_courses(max_hours)
-        stats = get_catalog_stats(courses_df)
+        stats = get_catalog_stats(cached_load_courses(), max_hours=max_hours)
         col1, col2 = st.columns(2)
         col1.metric("Cursos", f"{stats['total_courses']:,}")
         col2.metric("Dominios", stats['domains'])
@@ -353,21 +436,34 @@ elif analyze_button:
     with st.spinner("📄 Procesando documento..."):
         try:
             # 1. Extraer texto
-            text = extract_text(uploaded_file)
+            timings = []
+            text = extract_text(uploaded_file, timings=timings)
             if len(text.strip()) < 30:
                 st.error("El documento parece estar vacío.")
                 st.stop()
             
-            # 2. Generar resumen
-            summary = generate_summary(text)
-            
-            # 3. Extraer competencias iniciales
-            raw_competencies = extract_competencies(text, n_competencies=n_competencies)
+            # 2 y 3. Resumen y competencias iniciales (de la caché si el mismo
+            # texto ya se analizó con los mismos parámetros)
+            result_cache = get_result_cache()
+            analysis_key = cache_key("analysis", text=text_digest(text),
+                                     n_competencies=n_competencies,
+                                     catalog=catalog_version())
+            analysis = result_cache.get(analysis_key)
+            if analysis is None:
+                analysis = {
+                    "summary": generate_summary(text),
+                    "competencies": extract_competencies(text, n_competencies=n_competencies,
+                                                         idf_table=get_competency_idf()),
+                }
+                result_cache.put(analysis_key, analysis)
+            summary = analysis["summary"]
+            raw_competencies = analysis["competencies"]
             
             # Guardar en sesión
             st.session_state.analysis_done = True
             st.session_state.doc_text = text
             st.session_state.doc_summary = summary
+            st.session_state.doc_pages = (len(timings), sum(t["seconds"] for t in timings))
             # Guardar solo los términos para edición fácil
             st.session_state.detected_terms = [c['term'] for c in raw_competencies]
             # Mantener scores originales para referencia (mapeo)
@@ -410,6 +506,9 @@ if st.session_state.get("analysis_done", False):
     # Visualización de resumen
     with st.expander("Ver Resumen del Documento", expanded=False):
         st.write(st.session_state.doc_summary)
+        n_pages, seconds = st.session_state.get("doc_pages", (0, 0.0))
+        if n_pages:
+            st.caption(f"{n_pages} página(s) leída(s) en {seconds:.1f}s")
 
     st.markdown("---")
     
@@ -432,44 +531,94 @@ if st.session_state.get("analysis_done", False):
         # Generar representación de texto de competencias para matching
         competencies_text_report = competencies_to_text(final_competencies)
         
-        # Para el matching de Coursera, usamos el texto original del documento 
-        # PERO ponderado o filtrado por las competencias seleccionadas?
-        # Por simplicidad y eficacia actual, seguimos enviando el texto completo del documento al matcher de Coursera
-        # ya que este usa TF-IDF sobre el texto completo. 
-        # Sin embargo, para la búsqueda externa SÍ usamos las competencias explícitas.
-        
-        # NOTA: Si el usuario borró competencias clave, el matching de texto completo las seguirá encontrando.
-        # Mejora futura: Filtrar el texto o boostear términos seleccionados.
-        # Por ahora: Usamos el texto original para Coursera (enfoque holístico) y las keywords para Externos (enfoque específico)
-        
-        # Paso 4: Matching con Coursera
-        progress.progress(20, text="🔍 Buscando en catálogo de Coursera...")
-        try:
-            course_matcher = get_course_matcher(max_hours)
-            # Usamos el texto original
-            coursera_results = course_matcher.find_matches(
-                st.session_state.doc_text, top_n=n_coursera
-            )
-        except Exception as e:
-            st.warning(f"Error en matching de cursos: {e}")
-            coursera_results = []
-
-        # Paso 5: Matching con especializaciones
-        progress.progress(40, text="🔍 Buscando especializaciones...")
-        try:
-            spec_matcher = get_spec_matcher()
-            spec_results = spec_matcher.find_matches(
-                st.session_state.doc_text, top_n=5
+        # Para el matching de Coursera la consulta se arma con las competencias
+        # validadas (términos y scores en el vocabulario del catálogo), así que
+        # eliminar o agregar competencias cambia el ranking. Si ninguna está en
+        # el vocabulario, se usa el texto completo del documento.
+        # Para la búsqueda externa también se usan las competencias explícitas.
+
+        # Resultados de la caché si ya se buscó con el mismo texto, competencias,
+        # filtros y versión del catálogo: se pasa directo al reporte
+        result_cache = get_result_cache()
+        results_key = cache_key(
+            "results", text=text_digest(st.session_state.doc_text),
+            competencies=final_competencies, max_hours=max_hours,
+            n_coursera=n_coursera, n_external=n_external, mmr_lambda=mmr_lambda,
+            filters=course_filters, catalog=catalog_version(),
+        )
+        cached = result_cache.get(results_key)
+        if cached is not None:
+            coursera_results = cached["coursera"]
+            spec_results = cached["specializations"]
+            external_results = cached["external"]
+        else:
+            search_failed = False
+            # Paso 4: Matching con Coursera
+            progress.progress(20, text="🔍 Buscando en catálogo de Coursera...")
+            score_courses = course_scores = None
+            try:
+                course_matcher = get_course_matcher()
+                query = course_matcher.competency_vector(final_competencies)
+                if query.nnz:
+                    score_courses = lambda: course_matcher.competency_similarities(
+                        final_competencies, query)
+                else:
+                    score_courses = lambda: course_matcher.similarities(st.session_state.doc_text)
+                # Si el motor puntúa todo el catálogo de todos modos ("brute",
+                # "sharded") y las especializaciones necesitan los scores de los
+                # cursos, el vector se calcula una sola vez y se reutiliza; si no,
+                # el top-k sale del motor (MATCH_ENGINE). El límite de horas y los
+                # filtros del catálogo se aplican como máscara
+                if course_matcher.scans_catalog and get_spec_matcher().uses_course_scores:
+                    course_scores = score_courses()
+                if query.nnz:
+                    coursera_results = course_matcher.find_matches_for_competencies(
+                        final_competencies, top_n=n_coursera, max_hours=max_hours,
+                        similarities=course_scores, mmr_lambda=mmr_lambda, query=query,
+                        **course_filters
+                    )
+                else:
+                    coursera_results = course_matcher.find_matches(
+                        st.session_state.doc_text, top_n=n_coursera, max_hours=max_hours,
+                        similarities=course_scores, mmr_lambda=mmr_lambda, **course_filters
+                    )
+            except Exception as e:
+                st.warning(f"Error en matching de cursos: {e}")
+                search_failed = True
+                coursera_results = []
+
+            # Paso 5: Matching con especializaciones
+            progress.progress(40, text="🔍 Buscando especializaciones...")
+            try:
+                spec_matcher = get_spec_matcher()
+                # Los scores de todo el catálogo solo se calculan si la relevancia
+                # de las especializaciones se deriva de sus cursos
+                if score_courses is None or not spec_matcher.uses_course_scores:
+                    course_scores = None
+                elif course_scores is None:
+                    course_scores = score_courses()
+                spec_results = spec_matcher.find_matches(
+                    st.session_state.doc_text, top_n=5, course_scores=course_scores,
+                    **spec_filters
+                )
+            except Exception as e:
+                st.warning(f"Error en matching de especializaciones: {e}")
+                search_failed = True
+                spec_results = []
+
+            # Paso 6: Búsqueda externa (USANDO LAS COMPETENCIAS VALIDADAS)
+            progress.progress(60, text="🌐 Buscando microcertificaciones externas...")
+            external_results = search_external_certifications(
+                final_competencies, st.session_state.doc_text, max_results=n_external
             )
-        except Exception as e:
-            st.warning(f"Error en matching de especializaciones: {e}")
-            spec_results = []
 
-        # Paso 6: Búsqueda externa (USANDO LAS COMPETENCIAS VALIDADAS)
-        progress.progress(60, text="🌐 Buscando microcertificaciones externas...")
-        external_results = search_external_certifications(
-            final_competencies, st.session_state.doc_text, max_results=n_external
-        )
+            # Los resultados parciales (con errores) no se guardan
+            if not search_failed:
+                result_cache.put(results_key, {
+                    "coursera": coursera_results,
+                    "specializations": spec_results,
+                    "external": external_results,
+                })
 
         # Paso 7: Generar reporte Word
         progress.progress(80, text="📝 Generando documento Word...")
@@ -548,7 +697,29 @@ if st.session_state.get("analysis_done", False):
                         st.write(f"**Dominio:** {course.get('dominio', '')} — {course.get('subdominio', '')}")
                         st.write(f"**Skills:** {course.get('skills', '')[:200]}")
                         st.write(f"**URL:** {course.get('url', '')}")
+                        if course.get("variantes"):
+                            st.write(f"**Idiomas disponibles:** {course.get('idiomas', '')} "
+                                     f"({len(course['variantes'])} variantes agrupadas)")
                         st.info(f"💡 **Justificación:** {course.get('justificacion', '')}")
+
+                # Vecinos precalculados de cada curso recomendado (grafo kNN del
+                # bundle); sin bundle compilado no se muestran
+                course_matcher = get_course_matcher()
+                if course_matcher.has_similar_courses:
+                    with st.expander("🔗 Cursos similares", expanded=False):
+                        try:
+                            for course in coursera_results:
+                                similar = course_matcher.similar_courses(course["url"], k=5)
+                                if not similar:
+                                    continue
+                                st.markdown(f"**{course['nombre']}**")
+                                st.markdown("\n".join(
+                                    f"- [{s['nombre']}]({s['url']}) — {s['partner']} | "
+                                    f"{s.get('horas', 'N/A')} hrs | similitud {s['similitud']:.2f}"
+                                    for s in similar
+                                ))
+                        except Exception as e:
+                            st.warning(f"No se pudieron cargar los cursos similares: {e}")
             else:
                  st.warning("No se encontraron cursos de Coursera.")
 
@@ -577,7 +748,7 @@ if st.session_state.get("analysis_done", False):
         
         # Botón para reiniciar
         if st.button("🔄 Analizar otro documento"):
-            for key in ["analysis_done", "doc_text", "doc_summary", "detected_terms", "added_terms", "term_scores"]:
+            for key in ["analysis_done", "doc_text", "doc_summary", "doc_pages", "detected_terms", "added_terms", "term_scores"]:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
@@ -589,9 +760,10 @@ elif uploaded_file is not None and not st.session_state.get("analysis_done", Fal
     # Preview del texto
     with st.expander("👁️ Vista previa del documento"):
         try:
-            preview_text = extract_text(uploaded_file)
+            # Solo se leen las páginas necesarias para la vista previa
+            preview_text = extract_text(uploaded_file, max_chars=3000)
             st.text_area("Contenido extraído", preview_text[:3000], height=300, disabled=True)
-            st.caption(f"Total: {len(preview_text)} caracteres")
+            st.caption(f"Vista previa: primeros {min(len(preview_text), 3000)} caracteres")
         except Exception as e:
             st.error(f"Error al leer: {e}")
 
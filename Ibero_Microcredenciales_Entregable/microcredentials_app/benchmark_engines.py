@@ -0,0 +1,112 @@
+"""
+Compara los motores de búsqueda de CourseraMatcher: verifica que los motores
+exactos (fuerza bruta, índice invertido con MaxScore y fuerza bruta por
+fragmentos en varios procesos) devuelvan exactamente los mismos resultados,
+mide el recall@k del modo aproximado (LSA) frente a la fuerza bruta y la
+latencia por consulta de cada uno.
+
+Las consultas son textos de cursos del propio catálogo (muestra sistemática)
+más los documentos de texto que se indiquen con --docs.
+
+Uso:
+    python microcredentials_app/benchmark_engines.py [--queries 200] [--top-n 10] [--docs a.txt b.txt]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import time
+import numpy as np
+
+from config import TOP_N_COURSERA, MAX_LEARNING_HOURS
+from modules.catalog_bundle import load_current_bundle
+from modules.catalog_loader import load_course_store
+from modules.coursera_matcher import CourseraMatcher, ENGINES
+
+# Motores que deben devolver exactamente el mismo top-k que la fuerza bruta
+EXACT_ENGINES = ("brute", "maxscore", "sharded")
+
+
+def load_matchers():
+    """Un matcher por motor, compartiendo vectorizador, matriz y catálogo."""
+    bundle = load_current_bundle()
+    if bundle is not None:
+        base = bundle.course_matcher
+    else:
+        base = CourseraMatcher()
+        base.fit(load_course_store())
+
+    matchers = {}
+    for engine in ENGINES:
+        matcher = CourseraMatcher(engine=engine)
+        matcher.vectorizer = base.vectorizer
+        matcher._course_vectors = base._course_vectors
+        matcher._set_catalog(base._courses)
+        matcher._fitted = True
+        matchers[engine] = matcher
+    return matchers
+
+
+def run(matcher, queries, **kwargs):
+    results, times = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        results.append(matcher.find_matches(query, **kwargs))
+        times.append(time.perf_counter() - t0)
+    return results, np.array(times) * 1000
+
+
+def recall(reference, results) -> float:
+    """Fracción de los cursos de referencia (por URL) que también aparecen en results."""
+    expected = found = 0
+    for ref, res in zip(reference, results):
+        urls = {r["url"] for r in res}
+        expected += len(ref)
+        found += sum(1 for r in ref if r["url"] in urls)
+    return found / expected if expected else 1.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de motores de búsqueda de cursos.")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Cursos del catálogo usados como consulta")
+    parser.add_argument("--top-n", type=int, default=TOP_N_COURSERA)
+    parser.add_argument("--docs", nargs="*", default=[],
+                        help="Archivos de texto adicionales usados como consulta")
+    args = parser.parse_args(argv)
+
+    matchers = load_matchers()
+    courses = matchers["brute"]._courses
+    step = max(1, len(courses) // args.queries)
+    queries = courses.texts("combined_text", range(0, len(courses), step))[:args.queries]
+    for doc in args.docs:
+        with open(doc, encoding="utf-8") as f:
+            queries.append(f.read())
+
+    print(f"Catálogo: {len(courses):,} cursos | consultas: {len(queries)} | top-n: {args.top_n}")
+    identical = True
+    for label, kwargs in (("sin filtro", {}), (f"<= {MAX_LEARNING_HOURS} h", {"max_hours": MAX_LEARNING_HOURS})):
+        outputs = {}
+        for engine, matcher in matchers.items():
+            matcher.find_matches(queries[0], top_n=args.top_n, **kwargs)  # calentar (índice perezoso)
+            results, times = run(matcher, queries, top_n=args.top_n, **kwargs)
+            outputs[engine] = results
+            print(f"  [{label}] {engine:>9}: media {times.mean():.2f} ms | "
+                  f"p50 {np.percentile(times, 50):.2f} ms | p95 {np.percentile(times, 95):.2f} ms")
+        reference = outputs["brute"]
+        for engine, results in outputs.items():
+            if engine not in EXACT_ENGINES:
+                print(f"  [{label}] {engine:>9}: recall@{args.top_n} {recall(reference, results):.3f}")
+            elif repr(results) != repr(reference):
+                identical = False
+                print(f"  ✗ [{label}] {engine} difiere de la fuerza bruta")
+
+    for matcher in matchers.values():
+        matcher.close()
+    print("  ✓ Motores exactos con resultados idénticos" if identical else "  ✗ Hay diferencias")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Compila el catálogo de Coursera fuera de línea.
+
+Genera un bundle con los snapshots del catálogo, los vectorizadores ajustados,
+las matrices TF-IDF, la tabla IDF de competencias y las estadísticas, para que la app solo tenga que
+mapearlo en memoria al arrancar.
+
+Uso:
+    python microcredentials_app/compile_catalog.py [--source RUTA]
+        [--specializations-source RUTA] [--force] [--full]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import time
+
+from config import EXCEL_PATH
+from modules.catalog_bundle import build_bundle, CatalogBundle
+from modules.catalog_loader import specializations_source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila el bundle del catálogo de Coursera.")
+    parser.add_argument("--source", default=EXCEL_PATH,
+                        help="Excel maestro o export CSV (por defecto: EXCEL_PATH de config.py)")
+    parser.add_argument("--specializations-source", default=None,
+                        help="Excel o CSV aparte con las especializaciones (un CSV de --source"
+                             " solo trae cursos; sin esta opción se omiten las especializaciones)")
+    parser.add_argument("--force", action="store_true",
+                        help="Recompilar aunque ya exista un bundle con la misma clave")
+    parser.add_argument("--full", action="store_true",
+                        help="Ajustar los índices desde cero en lugar de actualizar el último bundle")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"No se encontró la fuente del catálogo: {args.source}")
+        return 1
+    if args.specializations_source and not os.path.exists(args.specializations_source):
+        print(f"No se encontró la fuente de especializaciones: {args.specializations_source}")
+        return 1
+    if not specializations_source(args.source, args.specializations_source):
+        print("  ! La fuente CSV solo trae cursos: se omiten las especializaciones"
+              " (use --specializations-source)")
+
+    print(f"Compilando catálogo desde {args.source}...")
+    t0 = time.time()
+    path = build_bundle(args.source, force=args.force, incremental=not args.full,
+                        specs_source=args.specializations_source)
+    bundle = CatalogBundle(path)
+    manifest = bundle.manifest
+
+    print(f"  ✓ Bundle: {path}")
+    print(f"  ✓ Cursos: {manifest['n_courses']:,} | Especializaciones: {manifest['n_specializations']:,}")
+    if manifest.get("n_course_variants"):
+        print(f"  ✓ Variantes casi duplicadas agrupadas: {manifest['n_course_variants']:,}")
+    if manifest.get("n_competency_terms"):
+        print(f"  ✓ Tabla IDF de competencias: {manifest['n_competency_terms']:,} n-gramas"
+              f" ({manifest['n_syllabi']:,} programas de asignatura)")
+    for name, report in manifest.get("index", {}).items():
+        if not report:
+            continue
+        line = f"  ✓ Índice de {name}: {report['nnz']:,} pesos, {report['nbytes'] / 1e6:.1f} MB"
+        if "unpruned_nbytes" in report:
+            line += (f" (sin poda {report['unpruned_nbytes'] / 1e6:.1f} MB,"
+                     f" recall@k {report['recall']:.3f})")
+        print(line)
+    if manifest.get("refresh"):
+        print(f"  ✓ Actualización incremental desde {manifest['refresh']['from'][:12]}:")
+        print(f"    cursos {json.dumps(manifest['refresh']['courses'])}")
+        print(f"    especializaciones {json.dumps(manifest['refresh']['specializations'])}")
+    print(f"  ✓ Listo en {time.time() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
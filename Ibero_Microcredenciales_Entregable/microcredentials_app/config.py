@@ -7,7 +7,8 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # DATA_DIR apunta a la raíz del proyecto (un nivel arriba de microcredentials_app)
 PROJ_ROOT = os.path.dirname(BASE_DIR)
 EXCEL_PATH = os.path.join(PROJ_ROOT, "Coursera Enterprise Catalog_Master.xlsx")
-CACHE_PATH = os.path.join(BASE_DIR, "data", "courses_cache.pkl")
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "data", "catalog_snapshot")
+BUNDLES_DIR = os.path.join(BASE_DIR, "data", "bundles")
 OUTPUT_DIR = os.path.join(PROJ_ROOT, "output_reports")
 
 # === Filtros ===
@@ -17,10 +18,128 @@ TOP_N_COURSERA = 10
 TOP_N_EXTERNAL = 10
 TOP_N_COMPETENCIES = 20
 
+# === Extracción de documentos ===
+# Presupuesto de lectura (0 = sin límite): se deja de leer al llegar a este
+# número de páginas o de caracteres, suficiente para extraer competencias y
+# hacer el matching de documentos largos
+DOC_MAX_PAGES = 0
+DOC_MAX_CHARS = 500_000
+# Los PDF con al menos PDF_PARALLEL_MIN_PAGES páginas se extraen en paralelo por
+# rangos de PDF_PAGES_PER_TASK páginas (PDF_WORKERS procesos, 0 = uno por núcleo)
+PDF_PARALLEL_MIN_PAGES = 40
+PDF_PAGES_PER_TASK = 16
+PDF_WORKERS = 0
+
+# === Extracción de competencias ===
+# Corpus opcional de programas de asignatura Ibero (TXT, PDF o DOCX) que se suma
+# al catálogo al calcular la tabla IDF de las competencias
+SYLLABI_DIR = os.path.join(PROJ_ROOT, "syllabi")
+# n-gramas presentes en menos documentos no se guardan en la tabla (IDF máximo)
+COMPETENCY_IDF_MIN_DF = 2
+# Frases candidatas: stop words admitidas entre dos palabras de contenido
+# ("toma de decisiones") y máximo de candidatas distintas en memoria
+KEYPHRASE_MAX_GAP = 2
+KEYPHRASE_MAX_CANDIDATES = 50000
+# extract_competencies_batch(): documentos por tarea y procesos (0 = uno por núcleo)
+EXTRACT_CHUNK_DOCS = 16
+EXTRACT_WORKERS = 0
+
+# === Matching por lotes ===
+# Documentos por bloque en find_matches_batch(): acota la memoria del producto
+# disperso documentos × catálogo
+BATCH_CHUNK_DOCS = 64
+
+# === Filtros por facetas ===
+# Cortes con bitset precalculado (otros valores se calculan al consultar)
+RATING_FACET_STEPS = (3.5, 4.0, 4.5, 4.7)
+HOURS_FACET_STEPS = tuple(range(1, 51))
+# Si los filtros dejan a lo sumo esta fracción del catálogo, solo se puntúan esas filas
+FACET_SUBSET_RATIO = 0.3
+
+# === Diversidad de resultados (MMR) ===
+# λ de Maximal Marginal Relevance: 1 = solo relevancia, menor = más diversidad
+MMR_LAMBDA = 0.7
+MMR_CANDIDATES = 200  # candidatos por relevancia que se re-ordenan
+# Máximo de resultados por partner y por subdominio (0 = sin cuota)
+MMR_PARTNER_QUOTA = 3
+MMR_SUBDOMAIN_QUOTA = 4
+
+# === Cursos similares (grafo kNN) ===
+KNN_NEIGHBORS = 20  # vecinos guardados por curso (0 = sin grafo en el bundle)
+KNN_BLOCK_ROWS = 256  # cursos por bloque al calcular el grafo
+KNN_WORKERS = 0  # 0 = un hilo por núcleo
+
+# === Motor de búsqueda de cursos ===
+# "brute": similitud contra todo el catálogo
+# "maxscore": índice invertido con poda MaxScore (mismo top-k exacto)
+# "lsa": vectores densos LSA (aproximado; detecta afinidad temática sin términos exactos)
+# "sharded": fuerza bruta repartida en fragmentos y varios procesos (mismo top-k exacto)
+MATCH_ENGINE = "brute"
+
+# === Vectorización de cursos ===
+# "tfidf": vocabulario aprendido en fit() (TfidfVectorizer)
+# "hashing": HashingVectorizer + arreglo IDF; sin vocabulario, los cursos se
+#   agregan o quitan sin reajustar (el modo LSA necesita pocas columnas: usar "tfidf")
+VECTORIZER_MODE = "tfidf"
+HASHING_FEATURES = 2 ** 18  # columnas del espacio de hashing
+
+# === Modo por fragmentos ===
+SHARD_COUNT = 0  # 0 = un fragmento por núcleo
+SHARD_WORKERS = 0  # 0 = tantos procesos como fragmentos (sin pasar del número de núcleos)
+
+# === Índice TF-IDF ===
+# Poda estática: fracción de la masa (suma de pesos al cuadrado) de cada curso
+# que se descarta quitando sus términos de menor peso (0 = sin poda)
+INDEX_PRUNE_MASS = 0.0
+# Consultas de muestra (textos del catálogo) para estimar el recall tras la poda
+PRUNE_RECALL_QUERIES = 200
+# Recall@k mínimo del índice podado frente al completo; por debajo se usa el completo
+PRUNE_MIN_RECALL = 0.95
+
+# === Modo LSA ===
+LSA_COMPONENTS = 256
+LSA_QUANTIZE = "int8"  # "int8" o "float32"
+LSA_CLUSTERS = 0  # 0 = sin índice de grupos (búsqueda sobre todo el catálogo)
+LSA_NPROBE = 8  # grupos revisados por consulta cuando LSA_CLUSTERS > 0
+# Las similitudes LSA son más altas que las TF-IDF: umbral propio
+LSA_MIN_SIMILARITY = 0.3
+
+# === Cursos casi duplicados ===
+# Al compilar el catálogo, los cursos con similitud de Jaccard estimada (MinHash
+# sobre shingles de combined_text) >= DEDUP_THRESHOLD se indexan una sola vez
+# (0 = sin agrupar)
+DEDUP_THRESHOLD = 0.85
+DEDUP_SHINGLE_SIZE = 3  # palabras por shingle
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 16  # bandas LSH (MINHASH_PERMUTATIONS / MINHASH_BANDS mínimos por banda)
+
+# === Actualización incremental del índice ===
+# Si la tasa de términos fuera de vocabulario en las filas nuevas/cambiadas supera
+# la tasa base del catálogo por más de este margen, se reajusta el vectorizador.
+VOCAB_DRIFT_THRESHOLD = 0.05
+DRIFT_SAMPLE_SIZE = 500
+
+# === Especializaciones ===
+# Relevancia de una especialización por sus cursos: promedio de sus
+# SPEC_TOP_COURSES cursos más similares (misma escala que la similitud de un
+# curso, así que aplica MIN_SIMILARITY_THRESHOLD). SPEC_TEXT_WEIGHT es el peso
+# del texto propio de la especialización en la mezcla (0 = solo cursos); las
+# especializaciones sin cursos en el catálogo se puntúan solo por su texto.
+SPEC_TOP_COURSES = 3
+SPEC_TEXT_WEIGHT = 0.0
+
+# === Caché de resultados ===
+# Nivel en memoria (LRU, máximo de entradas) y nivel en disco (SQLite, con TTL)
+RESULT_CACHE_PATH = os.path.join(BASE_DIR, "data", "result_cache.sqlite")
+RESULT_CACHE_ITEMS = 256
+RESULT_CACHE_TTL = 7 * 24 * 3600  # segundos
+
 # === Hojas del Excel ===
 SHEET_COURSES = "All Enterprise Courses"
 SHEET_SPECIALIZATIONS = "Specializations & Certificates"
 EXCEL_SKIPROWS = 3
+# Filas por bloque al ingerir el Excel/CSV (la memoria pico no crece con el catálogo)
+INGEST_CHUNK_ROWS = 5000
 
 # === Columnas de cursos ===
 COL_NAME = "Course Name"
@@ -0,0 +1,200 @@
+"""Bundle precompilado del catálogo: snapshots, índices ajustados y estadísticas.
+
+Cada bundle vive en BUNDLES_DIR/<clave>, donde la clave es el SHA-256 del
+Excel fuente más los parámetros de config.py que afectan la ingesta y los
+índices (y el corpus de programas de SYLLABI_DIR, si existe). Así, un Excel nuevo o un cambio de configuración produce una clave
+distinta y nunca se sirve un índice obsoleto.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import config
+from config import EXCEL_PATH, BUNDLES_DIR
+from modules.catalog_loader import write_catalog_snapshots, specializations_source, get_catalog_stats
+from modules.catalog_snapshot import CatalogSnapshot
+from modules.competency_idf import IdfTable, build_idf_table, syllabus_paths, syllabus_texts
+from modules.coursera_matcher import CourseraMatcher, SpecializationMatcher
+from modules.near_duplicates import variant_count
+
+# Subir cuando cambie el contenido o el formato de los bundles
+BUNDLE_FORMAT_VERSION = 8
+MANIFEST_NAME = "bundle.json"
+LATEST_NAME = "LATEST"
+
+# Parámetros de config.py que invalidan un bundle si cambian
+_KEY_PARAMS = (
+    "SHEET_COURSES", "SHEET_SPECIALIZATIONS", "EXCEL_SKIPROWS",
+    "SPANISH_STOP_WORDS",
+    "MATCH_ENGINE", "VECTORIZER_MODE", "HASHING_FEATURES", "LSA_COMPONENTS", "LSA_QUANTIZE", "LSA_CLUSTERS",
+    "INDEX_PRUNE_MASS", "PRUNE_MIN_RECALL",
+    "KNN_NEIGHBORS",
+    "COMPETENCY_IDF_MIN_DF",
+    "DEDUP_THRESHOLD", "DEDUP_SHINGLE_SIZE", "MINHASH_PERMUTATIONS", "MINHASH_BANDS",
+)
+
+
+def _config_params() -> dict:
+    params = {name: getattr(config, name) for name in _KEY_PARAMS}
+    # Todas las columnas configuradas (COL_* y SCOL_*)
+    for name in dir(config):
+        if name.startswith(("COL_", "SCOL_")):
+            params[name] = getattr(config, name)
+    params["BUNDLE_FORMAT_VERSION"] = BUNDLE_FORMAT_VERSION
+    return params
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_key() -> str:
+    """Huella de los parámetros de configuración que afectan los bundles."""
+    params = json.dumps(_config_params(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+
+def bundle_key(source_path: str = None, specs_source: str = None) -> str:
+    """
+    Clave del bundle: SHA-256 del archivo fuente (y de la fuente aparte de
+    especializaciones, si la hay) + parámetros de configuración + programas.
+    """
+    source_path = source_path or EXCEL_PATH
+    digest = hashlib.sha256()
+    digest.update(file_sha256(source_path).encode("ascii"))
+    if specs_source:
+        digest.update(b"specializations:")
+        digest.update(file_sha256(specs_source).encode("ascii"))
+    digest.update(config_key().encode("ascii"))
+    for path in syllabus_paths():
+        digest.update(file_sha256(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def bundle_path(key: str) -> str:
+    return os.path.join(BUNDLES_DIR, key)
+
+
+def build_bundle(source_path: str = None, force: bool = False,
+                 incremental: bool = True, specs_source: str = None) -> str:
+    """
+    Compila el bundle para la fuente indicada (Excel maestro por defecto).
+    specs_source es una fuente aparte para las especializaciones (necesaria
+    si source_path es un CSV de cursos; ver write_catalog_snapshots()).
+    Con incremental=True parte del último bundle compilado y solo re-vectoriza
+    las filas nuevas o cambiadas (ver CourseraMatcher.refresh()).
+    Retorna la ruta del bundle.
+    """
+    source_path = source_path or EXCEL_PATH
+    key = bundle_key(source_path, specs_source)
+    path = bundle_path(key)
+    if os.path.exists(os.path.join(path, MANIFEST_NAME)) and not force:
+        return path
+
+    t0 = time.time()
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    courses_path, specs_path = write_catalog_snapshots(source_path, tmp_path, specs_source)
+    specs_source = specializations_source(source_path, specs_source)
+    courses = CatalogSnapshot(courses_path).store()
+    specs = CatalogSnapshot(specs_path).store()
+
+    previous = _latest_bundle() if incremental else None
+    # Solo se actualiza sobre un bundle compilado con la misma configuración
+    if (previous is not None and previous.path != path
+            and previous.manifest.get("config_key") == config_key()):
+        course_matcher, spec_matcher = previous.course_matcher, previous.spec_matcher
+        refresh = {
+            "from": previous.key,
+            "courses": course_matcher.refresh(courses),
+            "specializations": spec_matcher.refresh(specs, courses),
+        }
+    else:
+        course_matcher, spec_matcher = CourseraMatcher(), SpecializationMatcher()
+        course_matcher.fit(courses)
+        spec_matcher.fit(specs, courses)
+        refresh = None
+
+    course_matcher.save(os.path.join(tmp_path, "course_matcher"))
+    spec_matcher.save(os.path.join(tmp_path, "spec_matcher"))
+    competency_idf = build_idf_table(courses.texts("combined_text") + list(syllabus_texts()))
+    competency_idf.save(os.path.join(tmp_path, "competency_idf"))
+
+    stats = {k: float(v) if k == "avg_hours" else int(v)
+             for k, v in get_catalog_stats(courses).items()}
+    manifest = {
+        "key": key,
+        "config_key": config_key(),
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "source": {"file": os.path.basename(source_path), "sha256": file_sha256(source_path)},
+        "specializations_source": specs_source and {
+            "file": os.path.basename(specs_source), "sha256": file_sha256(specs_source)},
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "build_seconds": round(time.time() - t0, 2),
+        "n_courses": len(courses),
+        "n_course_variants": variant_count(courses),
+        "n_specializations": len(specs),
+        "n_syllabi": competency_idf.n_docs - len(courses),
+        "n_competency_terms": len(competency_idf),
+        "stats": stats,
+        "index": {
+            "courses": course_matcher.index_report,
+            "specializations": spec_matcher.index_report,
+        },
+        "refresh": refresh,
+    }
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    with open(os.path.join(BUNDLES_DIR, LATEST_NAME), "w", encoding="utf-8") as f:
+        f.write(key)
+    return path
+
+
+class CatalogBundle:
+    """Bundle cargado: catálogos, matchers ajustados (matrices con mmap) y estadísticas."""
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.key = self.manifest["key"]
+        self.stats = self.manifest["stats"]
+        self.courses = CatalogSnapshot(os.path.join(path, "courses")).store()
+        self.specs = CatalogSnapshot(os.path.join(path, "specializations")).store()
+        self.course_matcher = CourseraMatcher.load(
+            os.path.join(path, "course_matcher"), self.courses, mmap=mmap)
+        self.spec_matcher = SpecializationMatcher.load(
+            os.path.join(path, "spec_matcher"), self.specs, mmap=mmap)
+        self.competency_idf = IdfTable.load(os.path.join(path, "competency_idf"), mmap=mmap)
+
+
+def load_current_bundle(source_path: str = None, specs_source: str = None):
+    """Carga el bundle que corresponde a la fuente actual, o None si no se ha compilado."""
+    source_path = source_path or EXCEL_PATH
+    if not os.path.exists(source_path):
+        return _latest_bundle()
+    path = bundle_path(bundle_key(source_path, specs_source))
+    if not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        return None
+    return CatalogBundle(path)
+
+
+def _latest_bundle():
+    latest_file = os.path.join(BUNDLES_DIR, LATEST_NAME)
+    if not os.path.exists(latest_file):
+        return None
+    with open(latest_file, encoding="utf-8") as f:
+        path = bundle_path(f.read().strip())
+    if not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        return None
+    return CatalogBundle(path)
@@ -0,0 +1,114 @@
+"""Ingesta por bloques del catálogo (Excel o CSV) leyendo solo las columnas configuradas."""
+from typing import Iterator
+import pandas as pd
+from config import (
+    EXCEL_SKIPROWS, INGEST_CHUNK_ROWS,
+    COL_NAME, COL_PARTNER, COL_TYPE, COL_DIFFICULTY, COL_HOURS,
+    COL_RATING, COL_URL, COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS,
+    COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE, COL_SPECIALIZATION, COL_SPEC_URL,
+    SCOL_NAME, SCOL_PARTNERS, SCOL_NUM_COURSES, SCOL_LANGUAGE,
+    SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_DESCRIPTION, SCOL_DIFFICULTY,
+    SCOL_URL, SCOL_TYPE
+)
+
+COURSE_COLUMNS = [
+    COL_NAME, COL_PARTNER, COL_TYPE, COL_DIFFICULTY, COL_HOURS,
+    COL_RATING, COL_URL, COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS,
+    COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE, COL_SPECIALIZATION, COL_SPEC_URL,
+]
+
+SPECIALIZATION_COLUMNS = [
+    SCOL_NAME, SCOL_PARTNERS, SCOL_NUM_COURSES, SCOL_LANGUAGE,
+    SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_DESCRIPTION, SCOL_DIFFICULTY,
+    SCOL_URL, SCOL_TYPE,
+]
+
+# Columnas de baja cardinalidad que se guardan como códigos enteros
+COURSE_CATEGORICAL = [
+    COL_PARTNER, COL_TYPE, COL_DIFFICULTY, COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE,
+]
+
+SPECIALIZATION_CATEGORICAL = [
+    SCOL_PARTNERS, SCOL_LANGUAGE, SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_DIFFICULTY, SCOL_TYPE,
+]
+
+
+def iter_catalog_chunks(path: str, sheet_name: str, columns: list[str],
+                        chunk_rows: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Itera el catálogo en bloques de `chunk_rows` filas con solo `columns`.
+    Los archivos .csv se leen con el lector por bloques de pandas; el resto
+    se trata como Excel y se lee con openpyxl en modo read_only.
+    Las columnas configuradas que falten en la fuente se agregan vacías.
+    """
+    if chunk_rows is None:
+        chunk_rows = INGEST_CHUNK_ROWS
+
+    if is_csv_source(path):
+        chunks = iter_csv_chunks(path, columns, chunk_rows)
+    else:
+        chunks = iter_excel_chunks(path, sheet_name, columns, chunk_rows)
+
+    for chunk in chunks:
+        for col in columns:
+            if col not in chunk.columns:
+                chunk[col] = None
+        yield chunk[columns]
+
+
+def is_csv_source(path: str) -> bool:
+    """True si la fuente es un export CSV (una sola tabla, sin hojas)."""
+    return path.lower().endswith(".csv")
+
+
+def iter_excel_chunks(path: str, sheet_name: str, columns: list[str],
+                      chunk_rows: int, skiprows: int = None) -> Iterator[pd.DataFrame]:
+    """Recorre la hoja fila por fila (openpyxl read_only) proyectando solo `columns`."""
+    from openpyxl import load_workbook
+
+    if skiprows is None:
+        skiprows = EXCEL_SKIPROWS
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        # En modo read_only openpyxl confía en la dimensión guardada en la hoja,
+        # que puede faltar o estar desactualizada: se recalcula al leer (como pandas)
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        for _ in range(skiprows):
+            next(rows, None)
+        header = next(rows, None) or ()
+
+        wanted = set(columns)
+        positions = {}
+        for idx, name in enumerate(header):
+            if name is not None and str(name) in wanted and str(name) not in positions:
+                positions[str(name)] = idx
+
+        names = list(positions)
+        indexes = [positions[n] for n in names]
+        buffer = []
+        yielded = False
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in indexes]
+            if all(v is None for v in values):
+                continue
+            buffer.append(values)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=names)
+                yielded = True
+                buffer = []
+        if buffer or not yielded:
+            yield pd.DataFrame(buffer, columns=names)
+    finally:
+        wb.close()
+
+
+def iter_csv_chunks(path: str, columns: list[str],
+                    chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Lee un export CSV en bloques, parseando solo las columnas configuradas."""
+    wanted = set(columns)
+    reader = pd.read_csv(path, usecols=lambda c: c in wanted, chunksize=chunk_rows)
+    with reader:
+        yield from reader
@@ -1,62 +1,161 @@
 """Módulo para cargar y filtrar el catálogo de Coursera desde el Excel."""
+import hashlib
 import os
-import pickle
+import numpy as np
 import pandas as pd
 from config import (
-    EXCEL_PATH, CACHE_PATH, SHEET_COURSES, SHEET_SPECIALIZATIONS,
-    EXCEL_SKIPROWS, MAX_LEARNING_HOURS,
-    COL_NAME, COL_PARTNER, COL_TYPE, COL_DIFFICULTY, COL_HOURS,
-    COL_RATING, COL_URL, COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS,
-    COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE, COL_SPECIALIZATION, COL_SPEC_URL,
-    SCOL_NAME, SCOL_PARTNERS, SCOL_NUM_COURSES, SCOL_LANGUAGE,
-    SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_DESCRIPTION, SCOL_DIFFICULTY,
-    SCOL_URL, SCOL_TYPE
+    EXCEL_PATH, SNAPSHOT_DIR, SHEET_COURSES, SHEET_SPECIALIZATIONS,
+    MAX_LEARNING_HOURS,
+    COL_NAME, COL_PARTNER, COL_HOURS, COL_URL, COL_DESCRIPTION, COL_SKILLS,
+    COL_CORE_SKILLS, COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE,
+    SCOL_NAME, SCOL_PARTNERS, SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_DESCRIPTION
 )
-
-
-def load_courses(max_hours: float = None, use_cache: bool = True) -> pd.DataFrame:
-    """Carga cursos del catálogo Coursera filtrados por horas."""
-    if max_hours is None:
-        max_hours = MAX_LEARNING_HOURS
-
-    cache_key = f"{CACHE_PATH}_{max_hours}.pkl"
-    if use_cache and os.path.exists(cache_key):
-        with open(cache_key, "rb") as f:
-            return pickle.load(f)
-
-    df = pd.read_excel(EXCEL_PATH, sheet_name=SHEET_COURSES, skiprows=EXCEL_SKIPROWS)
-
-    # Filtrar por horas
+from modules.catalog_ingest import (
+    iter_catalog_chunks, is_csv_source, COURSE_COLUMNS, SPECIALIZATION_COLUMNS,
+    COURSE_CATEGORICAL, SPECIALIZATION_CATEGORICAL
+)
+from modules.catalog_snapshot import CatalogSnapshot, SnapshotWriter, is_snapshot_current
+from modules.catalog_store import CatalogStore
+from modules.near_duplicates import collapse_snapshot
+
+COURSES_SNAPSHOT = os.path.join(SNAPSHOT_DIR, "courses")
+SPECIALIZATIONS_SNAPSHOT = os.path.join(SNAPSHOT_DIR, "specializations")
+
+# combined_text no se guarda: se reconstruye al vuelo a partir de estas columnas
+COURSE_DERIVED = {"combined_text": [COL_NAME, COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS]}
+SPECIALIZATION_DERIVED = {"combined_text": [SCOL_NAME, SCOL_DESCRIPTION]}
+
+
+def load_course_store(use_cache: bool = True, source_path: str = None) -> CatalogStore:
+    """
+    Carga el catálogo completo de cursos Coursera como almacén compacto
+    (mapeado en memoria desde el snapshot), sin filtrar por horas.
+    source_path puede ser el Excel maestro (por defecto) o un export CSV.
+    Con use_cache=True lee el snapshot columnar si corresponde a la fuente
+    actual y, si no, lo regenera ingiriendo la fuente por bloques.
+    """
+    source_path = source_path or EXCEL_PATH
+    if not (use_cache and is_snapshot_current(COURSES_SNAPSHOT, source_path)):
+        _ingest(source_path, SHEET_COURSES, COURSE_COLUMNS, _prepare_courses,
+                COURSES_SNAPSHOT, COURSE_CATEGORICAL, COURSE_DERIVED, collapse=True)
+    return CatalogSnapshot(COURSES_SNAPSHOT).store()
+
+
+def load_all_courses(use_cache: bool = True, source_path: str = None) -> pd.DataFrame:
+    """Igual que load_course_store(), pero como DataFrame."""
+    return load_course_store(use_cache=use_cache, source_path=source_path).to_frame()
+
+
+def write_catalog_snapshots(source_path: str, snapshot_dir: str,
+                            specs_source: str = None) -> tuple[str, str]:
+    """
+    Ingiere los cursos y las especializaciones en snapshot_dir/courses y
+    snapshot_dir/specializations. Por defecto ambas hojas salen de source_path;
+    specs_source indica otra fuente para las especializaciones. Un CSV trae
+    una sola tabla, así que si source_path es CSV y no hay specs_source el
+    snapshot de especializaciones queda vacío.
+    """
+    courses_path = os.path.join(snapshot_dir, "courses")
+    specs_path = os.path.join(snapshot_dir, "specializations")
+    _ingest(source_path, SHEET_COURSES, COURSE_COLUMNS, _prepare_courses,
+            courses_path, COURSE_CATEGORICAL, COURSE_DERIVED, collapse=True)
+    specs_source = specializations_source(source_path, specs_source)
+    if specs_source is None:
+        _write_empty_specializations(specs_path)
+    else:
+        _ingest(specs_source, SHEET_SPECIALIZATIONS, SPECIALIZATION_COLUMNS,
+                _prepare_specializations, specs_path,
+                SPECIALIZATION_CATEGORICAL, SPECIALIZATION_DERIVED)
+    return courses_path, specs_path
+
+
+def specializations_source(source_path: str, specs_source: str = None):
+    """Fuente de las especializaciones: specs_source, o source_path si no es CSV (si no, None)."""
+    if specs_source:
+        return specs_source
+    return None if is_csv_source(source_path) else source_path
+
+
+def _write_empty_specializations(snapshot_path: str):
+    writer = SnapshotWriter(snapshot_path, categorical=SPECIALIZATION_CATEGORICAL,
+                            derived=SPECIALIZATION_DERIVED)
+    writer.append(_prepare_specializations(pd.DataFrame(columns=SPECIALIZATION_COLUMNS)))
+    writer.close()
+
+
+def _ingest(source_path: str, sheet_name: str, columns: list[str],
+            prepare, snapshot_path: str, categorical: list, derived: dict,
+            collapse: bool = False):
+    """
+    Lee la fuente por bloques, prepara cada bloque y lo escribe al snapshot.
+    Con collapse=True agrupa después las filas casi duplicadas (ver near_duplicates).
+    """
+    writer = SnapshotWriter(snapshot_path, source_path=source_path,
+                            categorical=categorical, derived=derived)
+    for chunk in iter_catalog_chunks(source_path, sheet_name, columns):
+        writer.append(prepare(chunk))
+    writer.close()
+    if collapse:
+        collapse_snapshot(snapshot_path, source_path=source_path,
+                          categorical=categorical, derived=derived)
+
+
+def _prepare_courses(df: pd.DataFrame) -> pd.DataFrame:
+    # Normalizar horas (los valores no numéricos quedan como NaN)
     df[COL_HOURS] = pd.to_numeric(df[COL_HOURS], errors='coerce')
-    df_filtered = df[df[COL_HOURS] <= max_hours].copy()
 
     # Limpiar NaN en columnas de texto
     text_cols = [COL_NAME, COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS,
                  COL_DOMAIN, COL_SUBDOMAIN, COL_PARTNER]
     for col in text_cols:
-        if col in df_filtered.columns:
-            df_filtered[col] = df_filtered[col].fillna("")
+        if col in df.columns:
+            df[col] = df[col].fillna("")
 
     # Crear texto combinado para matching
-    df_filtered["combined_text"] = (
-        df_filtered[COL_NAME].astype(str) + " " +
-        df_filtered[COL_DESCRIPTION].astype(str) + " " +
-        df_filtered[COL_SKILLS].astype(str) + " " +
-        df_filtered[COL_CORE_SKILLS].astype(str)
+    df["combined_text"] = (
+        df[COL_NAME].astype(str) + " " +
+        df[COL_DESCRIPTION].astype(str) + " " +
+        df[COL_SKILLS].astype(str) + " " +
+        df[COL_CORE_SKILLS].astype(str)
     )
+    df["content_hash"] = content_hashes(df["combined_text"])
+    return df
 
-    # Cachear
-    os.makedirs(os.path.dirname(cache_key), exist_ok=True)
-    with open(cache_key, "wb") as f:
-        pickle.dump(df_filtered, f)
 
-    return df_filtered
+def load_courses(max_hours: float = None, use_cache: bool = True) -> pd.DataFrame:
+    """Carga cursos del catálogo Coursera filtrados por horas."""
+    if max_hours is None:
+        max_hours = MAX_LEARNING_HOURS
 
+    df = load_all_courses(use_cache=use_cache)
+    return filter_by_hours(df, max_hours)
 
-def load_specializations() -> pd.DataFrame:
+
+def filter_by_hours(df: pd.DataFrame, max_hours: float) -> pd.DataFrame:
+    """Filtra cursos con duración menor o igual a max_hours (descarta horas desconocidas)."""
+    return df[df[COL_HOURS] <= max_hours].copy()
+
+
+def load_specialization_store(use_cache: bool = True, source_path: str = None) -> CatalogStore:
+    """
+    Carga especializaciones y certificados profesionales como almacén compacto.
+    source_path es el Excel maestro (por defecto) o un CSV exportado de la hoja
+    de especializaciones (no el CSV de cursos).
+    """
+    source_path = source_path or EXCEL_PATH
+    if not (use_cache and is_snapshot_current(SPECIALIZATIONS_SNAPSHOT, source_path)):
+        _ingest(source_path, SHEET_SPECIALIZATIONS, SPECIALIZATION_COLUMNS,
+                _prepare_specializations, SPECIALIZATIONS_SNAPSHOT,
+                SPECIALIZATION_CATEGORICAL, SPECIALIZATION_DERIVED)
+    return CatalogSnapshot(SPECIALIZATIONS_SNAPSHOT).store()
+
+
+def load_specializations(use_cache: bool = True, source_path: str = None) -> pd.DataFrame:
     """Carga especializaciones y certificados profesionales."""
-    df = pd.read_excel(EXCEL_PATH, sheet_name=SHEET_SPECIALIZATIONS, skiprows=EXCEL_SKIPROWS)
+    return load_specialization_store(use_cache=use_cache, source_path=source_path).to_frame()
 
+
+def _prepare_specializations(df: pd.DataFrame) -> pd.DataFrame:
     text_cols = [SCOL_NAME, SCOL_DESCRIPTION, SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_PARTNERS]
     for col in text_cols:
         if col in df.columns:
@@ -66,15 +165,91 @@ def load_specializations() -> pd.DataFrame:
         df[SCOL_NAME].astype(str) + " " +
         df[SCOL_DESCRIPTION].astype(str)
     )
-
+    df["content_hash"] = content_hashes(df["combined_text"])
     return df
 
 
-def get_catalog_stats(df: pd.DataFrame) -> dict:
-    """Obtiene estadísticas del catálogo para mostrar en la UI."""
+def content_hashes(texts: pd.Series) -> pd.Series:
+    """Huella (blake2b de 64 bits, como uint64) del texto con el que se vectoriza cada fila."""
+    return pd.Series(
+        [int.from_bytes(hashlib.blake2b(str(t).encode("utf-8"), digest_size=8).digest(), "little")
+         for t in texts],
+        index=texts.index, dtype=np.uint64
+    )
+
+
+def row_keys(df: pd.DataFrame, key_col: str) -> pd.Series:
+    """Clave estable por fila: la URL más un contador para URLs repetidas o vacías."""
+    if key_col in df.columns:
+        urls = df[key_col].fillna("").astype(str).reset_index(drop=True)
+    else:
+        urls = pd.Series([""] * len(df), dtype=object)
+    occurrence = urls.groupby(urls).cumcount()
+    return urls + "#" + occurrence.astype(str)
+
+
+def diff_catalog(old_df: pd.DataFrame, new_df: pd.DataFrame, key_col: str = COL_URL) -> dict:
+    """
+    Compara dos versiones del catálogo (DataFrame o CatalogStore) por clave (URL)
+    y huella de contenido.
+    Retorna posiciones (0..n-1) de cada DataFrame:
+      - "added": filas de new_df sin equivalente en old_df
+      - "removed": filas de old_df que ya no están
+      - "changed_new"/"changed_old": misma clave con texto distinto
+      - "unchanged_new"/"unchanged_old": misma clave y mismo texto
+    """
+    old_keys = row_keys(old_df, key_col).tolist()
+    new_keys = row_keys(new_df, key_col).tolist()
+    old_hashes = _hashes_of(old_df)
+    new_hashes = _hashes_of(new_df)
+
+    old_pos = {k: i for i, k in enumerate(old_keys)}
+    added, changed_new, changed_old, unchanged_new, unchanged_old = [], [], [], [], []
+    for i, key in enumerate(new_keys):
+        j = old_pos.pop(key, None)
+        if j is None:
+            added.append(i)
+        elif old_hashes[j] != new_hashes[i]:
+            changed_new.append(i)
+            changed_old.append(j)
+        else:
+            unchanged_new.append(i)
+            unchanged_old.append(j)
+
+    diff = {
+        "added": added,
+        "removed": sorted(old_pos.values()),
+        "changed_new": changed_new,
+        "changed_old": changed_old,
+        "unchanged_new": unchanged_new,
+        "unchanged_old": unchanged_old,
+    }
+    return {name: np.asarray(positions, dtype=np.int64) for name, positions in diff.items()}
+
+
+def _hashes_of(df: pd.DataFrame) -> list:
+    if "content_hash" in df.columns:
+        return df["content_hash"].tolist()
+    return content_hashes(df["combined_text"].fillna("")).tolist()
+
+
+def get_catalog_stats(df, max_hours: float = None) -> dict:
+    """
+    Obtiene estadísticas del catálogo para mostrar en la UI.
+    Acepta un DataFrame o un CatalogStore; max_hours limita a los cursos que lo cumplen.
+    """
+    columns = df.columns
+    if max_hours is not None and COL_HOURS in columns:
+        keep = (df[COL_HOURS] <= max_hours).to_numpy()
+    else:
+        keep = np.ones(len(df), dtype=bool)
+
+    def column(name):
+        return df[name][keep]
+
     return {
-        "total_courses": len(df),
-        "avg_hours": df[COL_HOURS].mean() if COL_HOURS in df.columns else 0,
-        "domains": df[COL_DOMAIN].nunique() if COL_DOMAIN in df.columns else 0,
-        "languages": df[COL_LANGUAGE].nunique() if COL_LANGUAGE in df.columns else 0,
+        "total_courses": int(keep.sum()),
+        "avg_hours": column(COL_HOURS).mean() if COL_HOURS in columns else 0,
+        "domains": column(COL_DOMAIN).nunique() if COL_DOMAIN in columns else 0,
+        "languages": column(COL_LANGUAGE).nunique() if COL_LANGUAGE in columns else 0,
     }
@@ -0,0 +1,300 @@
+"""Snapshot columnar del catálogo: arreglos NumPy y buffers de texto mapeables en memoria.
+
+Cada tabla (hoja del Excel) se guarda como un directorio con un manifest.json
+y un archivo por columna:
+  - columnas numéricas: <col>.npy con su dtype original
+  - columnas de fecha: <col>.npy en int64 (nanosegundos)
+  - columnas categóricas: <col>.npy con códigos int32; las categorías van
+    en el manifest
+  - columnas de texto: <col>.bin (UTF-8 concatenado), <col>.offsets.npy
+    y opcionalmente <col>.nulls.npy
+  - columnas derivadas (p. ej. combined_text): solo su receta en el manifest
+
+Los archivos se abren con mmap, de modo que varios procesos del servidor
+comparten las mismas páginas a través del caché del sistema operativo y
+solo se decodifican las columnas que realmente se piden.
+"""
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from modules.catalog_store import CatalogStore
+
+SNAPSHOT_VERSION = 4
+MANIFEST_NAME = "manifest.json"
+
+
+def source_fingerprint(source_path: str) -> dict:
+    """Huella ligera del archivo fuente (tamaño y fecha de modificación)."""
+    st = os.stat(source_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def write_snapshot(df: pd.DataFrame, path: str, source_path: str = None,
+                   categorical: list = (), derived: dict = None):
+    """Escribe el DataFrame como snapshot columnar en el directorio `path`."""
+    writer = SnapshotWriter(path, source_path=source_path,
+                            categorical=categorical, derived=derived)
+    writer.append(df)
+    writer.close()
+
+
+class SnapshotWriter:
+    """
+    Escribe un snapshot por bloques de filas (append), para ingerir catálogos
+    grandes sin tenerlos completos en memoria. Las columnas de texto se
+    escriben directo a disco; las numéricas (8 bytes por fila) se acumulan y
+    se guardan al cerrar. Si una columna numérica recibe después valores de
+    texto, se convierte a columna de texto.
+
+    `categorical` lista las columnas a guardar como códigos enteros y `derived`
+    mapea columnas derivadas a las columnas que concatenan; estas últimas no se
+    escriben aunque vengan en los bloques.
+    """
+
+    def __init__(self, path: str, source_path: str = None,
+                 categorical: list = (), derived: dict = None):
+        self.path = path
+        self.source_path = source_path
+        self.categorical = set(categorical)
+        self.derived = dict(derived or {})
+        self._tmp_path = f"{path}.tmp"
+        if os.path.exists(self._tmp_path):
+            shutil.rmtree(self._tmp_path)
+        os.makedirs(self._tmp_path)
+        self._columns = {}
+        self._n_rows = 0
+
+    def append(self, df: pd.DataFrame):
+        """Agrega un bloque de filas. Las columnas nuevas se rellenan como nulas hacia atrás."""
+        for name in df.columns:
+            if name not in self._columns and name not in self.derived:
+                self._add_column(name)
+        for name, state in self._columns.items():
+            if name in df.columns:
+                series = df[name]
+            else:
+                series = pd.Series([None] * len(df), dtype=object)
+            self._append_values(state, series)
+        self._n_rows += len(df)
+
+    def _add_column(self, name):
+        state = {"name": name, "file": f"c{len(self._columns)}", "kind": None,
+                 "arrays": [], "n": 0}
+        self._columns[name] = state
+        if self._n_rows:
+            self._append_values(state, pd.Series([None] * self._n_rows, dtype=object))
+
+    def _append_values(self, state, series: pd.Series):
+        if state["name"] in self.categorical:
+            self._append_codes(state, series)
+            return
+        kind = series.dtype.kind
+        if kind in "biuf":
+            kind = "numeric"
+        elif kind == "M":
+            kind = "datetime"
+        else:
+            kind = "text"
+
+        if state["kind"] is None:
+            state["kind"] = kind
+            if kind == "text":
+                self._open_text(state)
+        elif state["kind"] != kind and state["kind"] != "text":
+            coerced = _coerce_like(series, state["kind"])
+            if coerced is None:
+                self._convert_to_text(state)
+            else:
+                series = coerced
+
+        if state["kind"] == "text":
+            self._write_text(state, series)
+        elif state["kind"] == "datetime":
+            state["arrays"].append(series.to_numpy(dtype="datetime64[ns]"))
+        else:
+            state["arrays"].append(series.to_numpy())
+        state["n"] += len(series)
+
+    def _append_codes(self, state, series: pd.Series):
+        if state["kind"] is None:
+            state.update(kind="categorical", index={})
+        index = state["index"]
+        codes = np.empty(len(series), dtype=np.int32)
+        for i, (value, is_null) in enumerate(zip(series.tolist(), series.isna().to_numpy())):
+            if is_null:
+                codes[i] = -1
+            else:
+                codes[i] = index.setdefault(str(value), len(index))
+        state["arrays"].append(codes)
+        state["n"] += len(series)
+
+    def _open_text(self, state):
+        state["handle"] = open(os.path.join(self._tmp_path, f"{state['file']}.bin"), "wb")
+        state["lengths"] = []
+        state["nulls"] = []
+
+    def _convert_to_text(self, state):
+        arrays = state["arrays"]
+        state["arrays"] = []
+        state["kind"] = "text"
+        self._open_text(state)
+        for values in arrays:
+            self._write_text(state, pd.Series(values))
+
+    def _write_text(self, state, series: pd.Series):
+        nulls = series.isna().to_numpy()
+        handle = state["handle"]
+        lengths = state["lengths"]
+        for value, is_null in zip(series.tolist(), nulls):
+            encoded = b"" if is_null else str(value).encode("utf-8")
+            handle.write(encoded)
+            lengths.append(len(encoded))
+        state["nulls"].append(nulls)
+
+    def close(self):
+        """Guarda las columnas pendientes, el manifest y publica el snapshot."""
+        columns = []
+        for state in self._columns.values():
+            meta = {"name": state["name"], "kind": state["kind"] or "text",
+                    "file": state["file"]}
+            file_base = os.path.join(self._tmp_path, state["file"])
+            if meta["kind"] == "text":
+                if "handle" not in state:
+                    self._open_text(state)
+                state["handle"].close()
+                offsets = np.zeros(len(state["lengths"]) + 1, dtype=np.int64)
+                np.cumsum(state["lengths"], out=offsets[1:])
+                np.save(f"{file_base}.offsets.npy", offsets)
+                nulls = (np.concatenate(state["nulls"]) if state["nulls"]
+                         else np.zeros(0, dtype=bool))
+                meta["nulls"] = bool(nulls.any())
+                if meta["nulls"]:
+                    np.save(f"{file_base}.nulls.npy", nulls)
+            else:
+                values = np.concatenate(state["arrays"])
+                if meta["kind"] == "datetime":
+                    values = values.view("int64")
+                if meta["kind"] == "categorical":
+                    meta["categories"] = list(state["index"])
+                np.save(f"{file_base}.npy", values)
+            columns.append(meta)
+
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "n_rows": self._n_rows,
+            "columns": columns,
+            "derived": self.derived,
+            "source": source_fingerprint(self.source_path) if self.source_path else None,
+        }
+        with open(os.path.join(self._tmp_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self._tmp_path, self.path)
+
+
+def _coerce_like(series: pd.Series, kind: str):
+    """Convierte un bloque al tipo ya fijado de la columna, o None si perdería valores."""
+    if series.isna().all():
+        if kind == "datetime":
+            return pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+        return pd.Series(np.nan, index=series.index, dtype=float)
+    if kind == "numeric":
+        converted = pd.to_numeric(series, errors="coerce")
+        if converted.isna().sum() == series.isna().sum():
+            return converted
+    return None
+
+
+def is_snapshot_current(path: str, source_path: str = None) -> bool:
+    """True si existe un snapshot con la versión actual y la misma fuente."""
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return False
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        return False
+    if source_path is None:
+        return True
+    if not os.path.exists(source_path):
+        # Sin fuente disponible el snapshot es la única copia del catálogo
+        return True
+    return manifest.get("source") == source_fingerprint(source_path)
+
+
+class CatalogSnapshot:
+    """Lector de un snapshot escrito con SnapshotWriter; los arreglos se abren con mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada en {path}")
+
+    def __len__(self) -> int:
+        return self.manifest["n_rows"]
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def store(self) -> CatalogStore:
+        """Almacén compacto cuyos arreglos apuntan directo a los archivos mapeados."""
+        numeric, categorical, text = {}, {}, {}
+        for meta in self.manifest["columns"]:
+            name, kind, base = meta["name"], meta["kind"], meta["file"]
+            if kind == "text":
+                offsets = np.load(self._file(f"{base}.offsets.npy"), mmap_mode="r")
+                if offsets[-1] > 0:
+                    buffer = np.memmap(self._file(f"{base}.bin"), dtype=np.uint8, mode="r")
+                else:
+                    buffer = np.zeros(0, dtype=np.uint8)
+                nulls = None
+                if meta.get("nulls"):
+                    nulls = np.load(self._file(f"{base}.nulls.npy"), mmap_mode="r")
+                text[name] = (buffer, offsets, nulls)
+                continue
+            values = np.load(self._file(f"{base}.npy"), mmap_mode="r")
+            if kind == "categorical":
+                categorical[name] = (values, meta["categories"])
+            elif kind == "datetime":
+                numeric[name] = values.view("datetime64[ns]")
+            else:
+                numeric[name] = values
+        order = [meta["name"] for meta in self.manifest["columns"]]
+        return CatalogStore(len(self), numeric, categorical, text,
+                            derived=self.manifest.get("derived"), order=order)
+
+    def to_frame(self, columns: list[str] = None) -> pd.DataFrame:
+        """Construye un DataFrame con las columnas pedidas (todas por defecto)."""
+        return self.store().to_frame(columns)
+
+
+def save_sparse(path: str, name: str, matrix):
+    """Guarda una matriz CSR como tres .npy (data, indices, indptr) mapeables."""
+    import scipy.sparse as sp
+    matrix = sp.csr_matrix(matrix)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, f"{name}.data.npy"), matrix.data)
+    np.save(os.path.join(path, f"{name}.indices.npy"), matrix.indices)
+    np.save(os.path.join(path, f"{name}.indptr.npy"), matrix.indptr)
+    with open(os.path.join(path, f"{name}.shape.json"), "w", encoding="utf-8") as f:
+        json.dump(list(matrix.shape), f)
+
+
+def load_sparse(path: str, name: str, mmap: bool = True):
+    """Carga una matriz CSR escrita con save_sparse(); con mmap=True no copia los arreglos."""
+    import scipy.sparse as sp
+    mmap_mode = "r" if mmap else None
+    parts = [np.load(os.path.join(path, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+             for part in ("data", "indices", "indptr")]
+    with open(os.path.join(path, f"{name}.shape.json"), encoding="utf-8") as f:
+        shape = tuple(json.load(f))
+    return sp.csr_matrix(tuple(parts), shape=shape, copy=False)
@@ -0,0 +1,205 @@
+"""Almacén compacto del catálogo en memoria (o mapeado desde un snapshot).
+
+Las columnas se guardan como:
+  - numéricas: un arreglo NumPy por columna
+  - categóricas (partner, dominio, idioma...): códigos int32 en un diccionario
+    compartido de categorías; -1 indica valor nulo
+  - texto: un solo buffer UTF-8 con offsets, decodificado solo al pedirlo
+  - derivadas (p. ej. combined_text): concatenación de otras columnas de
+    texto, calculada al vuelo para no duplicar el texto en memoria
+
+CatalogStore se comporta como un DataFrame de solo lectura para el acceso por
+columna (store[col] devuelve una Series), de modo que el código que calcula
+estadísticas o diffs funciona igual con ambos.
+"""
+import numpy as np
+import pandas as pd
+
+
+class CatalogStore:
+    def __init__(self, n_rows: int, numeric: dict = None, categorical: dict = None,
+                 text: dict = None, derived: dict = None, order: list = None):
+        self._n_rows = n_rows
+        self._numeric = numeric or {}
+        self._categorical = {
+            name: (codes, np.asarray(categories, dtype=object))
+            for name, (codes, categories) in (categorical or {}).items()
+        }
+        self._text = text or {}
+        self._derived = derived or {}
+        stored = list(self._numeric) + list(self._categorical) + list(self._text)
+        self._order = [c for c in (order or stored) if c in stored] + list(self._derived)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, categorical: list = (),
+                   derived: dict = None) -> "CatalogStore":
+        """
+        Compacta un DataFrame: `categorical` como códigos y el resto del texto en
+        buffers. Las columnas de `derived` cuyas fuentes existen no se copian.
+        """
+        derived = {name: cols for name, cols in (derived or {}).items()
+                   if all(c in df.columns for c in cols)}
+        numeric, cat_cols, text = {}, {}, {}
+        for name in df.columns:
+            series = df[name]
+            if name in derived:
+                continue
+            if name in categorical:
+                cat_cols[name] = encode_categories(series)
+            elif series.dtype.kind in "biufM":
+                numeric[name] = series.to_numpy()
+            else:
+                text[name] = encode_texts(series)
+        return cls(len(df), numeric, cat_cols, text, derived, order=list(df.columns))
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._order)
+
+    def __contains__(self, name) -> bool:
+        return name in self._order
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados por los arreglos (mapeados o no) del almacén."""
+        total = sum(a.nbytes for a in self._numeric.values())
+        total += sum(codes.nbytes for codes, _ in self._categorical.values())
+        total += sum(c.nbytes for parts in self._text.values() for c in parts if c is not None)
+        return total
+
+    # === Acceso por valor ===
+    def value(self, name: str, i: int):
+        """Valor de una celda. Texto y categorías nulos se devuelven como ""."""
+        if name in self._numeric:
+            return self._numeric[name][i].item()
+        if name in self._categorical:
+            codes, categories = self._categorical[name]
+            code = codes[i]
+            return categories[code] if code >= 0 else ""
+        if name in self._text:
+            buffer, offsets, nulls = self._text[name]
+            if nulls is not None and nulls[i]:
+                return ""
+            return bytes(buffer[offsets[i]:offsets[i + 1]]).decode("utf-8")
+        if name in self._derived:
+            return " ".join(str(self.value(col, i)) for col in self._derived[name])
+        raise KeyError(name)
+
+    def row(self, i: int) -> dict:
+        """Fila i como dict {columna: valor}, sin columnas derivadas."""
+        return {name: self.value(name, i) for name in self._order if name not in self._derived}
+
+    def texts(self, name: str, rows=None) -> list[str]:
+        """Decodifica una columna de texto (o derivada) para las filas indicadas (todas por defecto)."""
+        if rows is None:
+            rows = range(self._n_rows)
+        if name in self._derived:
+            parts = [self.texts(col, rows) for col in self._derived[name]]
+            return [" ".join(values) for values in zip(*parts)]
+        if name in self._text:
+            buffer, offsets, nulls = self._text[name]
+            raw = buffer.tobytes() if len(rows) > self._n_rows // 4 else buffer
+            return [
+                "" if nulls is not None and nulls[i]
+                else bytes(raw[offsets[i]:offsets[i + 1]]).decode("utf-8")
+                for i in rows
+            ]
+        return [str(self.value(name, i)) for i in rows]
+
+    def take(self, name: str, rows, default=None) -> list:
+        """
+        Valores de una columna para las filas indicadas, con la misma
+        convención que value(). Si la columna no existe, retorna `default`
+        para cada fila.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if name not in self:
+            return [default] * len(rows)
+        if name in self._numeric:
+            return np.asarray(self._numeric[name])[rows].tolist()
+        if name in self._categorical:
+            codes, categories = self._categorical[name]
+            return np.append(categories, "")[codes[rows]].tolist()
+        return self.texts(name, rows)
+
+    # === Acceso por columna ===
+    def numeric(self, name: str) -> np.ndarray:
+        return self._numeric[name]
+
+    def codes(self, name: str) -> np.ndarray:
+        return self._categorical[name][0]
+
+    def categories(self, name: str) -> np.ndarray:
+        return self._categorical[name][1]
+
+    def is_categorical(self, name: str) -> bool:
+        return name in self._categorical
+
+    def __getitem__(self, name: str) -> pd.Series:
+        """Materializa una columna como Series (nulos como NaN, igual que en el DataFrame)."""
+        return self._series(name)
+
+    def _series(self, name: str, rows=None) -> pd.Series:
+        if name in self._numeric:
+            values = np.asarray(self._numeric[name])
+            return pd.Series(values if rows is None else values[rows], name=name)
+        if name in self._categorical:
+            codes, categories = self._categorical[name]
+            values = np.append(categories, np.nan)[codes if rows is None else codes[rows]]
+            return pd.Series(values, name=name, dtype=object)
+        if name in self._text:
+            values = self.texts(name, rows)
+            nulls = self._text[name][2]
+            if nulls is not None:
+                nulls = np.asarray(nulls) if rows is None else np.asarray(nulls)[rows]
+                for i in np.flatnonzero(nulls):
+                    values[i] = np.nan
+            return pd.Series(values, name=name, dtype=object)
+        if name in self._derived:
+            return pd.Series(self.texts(name, rows), name=name, dtype=object)
+        raise KeyError(name)
+
+    def to_frame(self, columns: list[str] = None, rows=None) -> pd.DataFrame:
+        """DataFrame con las columnas pedidas (todas por defecto) y, opcionalmente, solo `rows`."""
+        names = self.columns if columns is None else [c for c in columns if c in self]
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+        return pd.DataFrame({name: self._series(name, rows) for name in names})
+
+
+def as_store(catalog, categorical: list = (), derived: dict = None) -> CatalogStore:
+    """Acepta un CatalogStore o un DataFrame (que se compacta)."""
+    if isinstance(catalog, CatalogStore):
+        return catalog
+    return CatalogStore.from_frame(catalog.reset_index(drop=True),
+                                   categorical=categorical, derived=derived)
+
+
+def encode_categories(series: pd.Series):
+    """Retorna (códigos int32, categorías) para una columna de baja cardinalidad."""
+    index = {}
+    codes = np.empty(len(series), dtype=np.int32)
+    for i, value in enumerate(series.tolist()):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            codes[i] = -1
+            continue
+        value = str(value)
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+        codes[i] = code
+    return codes, list(index)
+
+
+def encode_texts(series: pd.Series):
+    """Retorna (buffer uint8, offsets int64, nulos o None) para una columna de texto."""
+    nulls = series.isna().to_numpy()
+    encoded = [b"" if is_null else str(value).encode("utf-8")
+               for value, is_null in zip(series.tolist(), nulls)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return buffer, offsets, (nulls if nulls.any() else None)
@@ -1,81 +1,144 @@
-"""Módulo para extraer competencias/habilidades clave de un documento usando TF-IDF."""
-import re
+"""Módulo para extraer competencias/habilidades clave de un documento usando TF-IDF.
+
+Las candidatas son frases de 1 a 3 palabras delimitadas por stop words y
+puntuación, contadas en una sola pasada (ver modules/keyphrases.py); su score
+es tf sublineal × IDF de la tabla precalculada sobre el catálogo (ver
+modules/competency_idf.py).
+
+extract_competencies_batch() reparte muchos documentos entre un pool de
+procesos; cada proceso abre la tabla IDF una sola vez al arrancar (con mmap si
+viene de un bundle, así todos comparten las mismas páginas de solo lectura).
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from config import SPANISH_STOP_WORDS, TOP_N_COMPETENCIES
+from config import TOP_N_COMPETENCIES, EXTRACT_CHUNK_DOCS, EXTRACT_WORKERS
+from modules.competency_idf import IdfTable
+from modules.keyphrases import count_phrases, spanish_stem
 
+# Candidatas que se ordenan por ronda (por cada competencia pedida): la
+# deduplicación por raíz descarta parte de ellas
+_POOL_FACTOR = 4
 
-def extract_competencies(document_text: str, n_competencies: int = None) -> list[dict]:
+# Estado de cada proceso del pool de extract_competencies_batch()
+_WORKER = {}
+
+
+def extract_competencies(document_text, n_competencies: int = None,
+                         idf_table: IdfTable = None) -> list[dict]:
     """
     Extrae las competencias/habilidades clave de un documento.
+    `document_text` es el texto o un iterable de fragmentos (p. ej. páginas).
+    `idf_table` es la tabla IDF del catálogo; sin ella todos los términos
+    pesan igual y el ranking es solo por frecuencia.
     Retorna lista de dicts: [{"term": "...", "score": 0.xx, "type": "bigram|unigram"}, ...]
     """
     if n_competencies is None:
         n_competencies = TOP_N_COMPETENCIES
 
-    if not document_text or len(document_text.strip()) < 20:
+    if not document_text:
         return []
-
-    # Vectorizador TF-IDF para el documento
-    vectorizer = TfidfVectorizer(
-        max_features=300,
-        stop_words=SPANISH_STOP_WORDS,
-        min_df=1,
-        max_df=1.0,
-        ngram_range=(1, 3),
-        token_pattern=r'(?u)\b[a-záéíóúñü][a-záéíóúñü]+\b',
-        lowercase=True,
-        sublinear_tf=True
-    )
-
-    try:
-        tfidf_matrix = vectorizer.fit_transform([document_text])
-    except ValueError:
+    if isinstance(document_text, str):
+        if len(document_text.strip()) < 20:
+            return []
+        header = document_text[:300].lower()
+    else:
+        chunks = iter(document_text)
+        first = next(chunks, "")
+        header = first[:300].lower()
+        document_text = _chain(first, chunks)
+
+    # tf sublineal × IDF del corpus, con norma L2 (como TfidfVectorizer)
+    phrases = count_phrases(document_text)
+    if not phrases.counts:
         return []
-
-    feature_names = vectorizer.get_feature_names_out()
-    scores = tfidf_matrix.toarray()[0]
-
-    # Obtener top términos
-    top_indices = np.argsort(scores)[::-1]
+    keys = list(phrases.counts)
+    scores = 1.0 + np.log(np.fromiter(phrases.counts.values(), dtype=np.float64, count=len(keys)))
+    if idf_table is not None:
+        scores *= idf_table.lookup(keys)
+    scores /= np.linalg.norm(scores)
 
     competencies = []
     seen_roots = set()
+    seen = 0
+    pool = n_competencies * _POOL_FACTOR
+    while len(competencies) < n_competencies and seen < len(keys):
+        # Top `pool` por score (a igual score, orden alfabético) con un heap acotado
+        top_indices = heapq.nsmallest(pool, range(len(keys)), key=lambda i: (-scores[i], keys[i]))
+        for idx in top_indices[seen:]:
+            if len(competencies) >= n_competencies:
+                break
+
+            key = keys[idx]
+            term = phrases.surface[key]
+            score = scores[idx]
+
+            if score <= 0:
+                continue
+
+            # Boost para términos en el encabezado (primeros 300 caracteres)
+            if term in header:
+                score *= 1.5
+
+            # Evitar duplicados por raíz de la primera palabra
+            root = spanish_stem(key.split(" ", 1)[0])
+            if root in seen_roots:
+                continue
+            seen_roots.add(root)
+
+            # Filtrar términos muy genéricos o muy cortos
+            if len(key) < 4:
+                continue
+
+            n_words = key.count(" ") + 1
+            term_type = "trigram" if n_words == 3 else ("bigram" if n_words == 2 else "unigram")
+
+            competencies.append({
+                "term": term,
+                "score": round(float(score), 4),
+                "type": term_type
+            })
+        seen = len(top_indices)
+        pool *= 2
 
-    for idx in top_indices:
-        if len(competencies) >= n_competencies:
-            break
+    return competencies
 
-        term = feature_names[idx]
-        score = scores[idx]
 
-        if score <= 0:
-            continue
+def extract_competencies_batch(texts: list, n_competencies: int = None, workers: int = None,
+                               idf_table: IdfTable = None) -> list[list[dict]]:
+    """
+    extract_competencies() de cada texto, repartido en bloques de
+    EXTRACT_CHUNK_DOCS documentos entre `workers` procesos (EXTRACT_WORKERS
+    por defecto). Retorna una lista de competencias por texto, en el mismo orden.
+    """
+    texts = list(texts)
+    if workers is None:
+        workers = EXTRACT_WORKERS or os.cpu_count() or 1
+    chunks = [texts[i:i + EXTRACT_CHUNK_DOCS] for i in range(0, len(texts), EXTRACT_CHUNK_DOCS)]
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        return [extract_competencies(text, n_competencies, idf_table) for text in texts]
 
-        # Boost para términos en el encabezado (primeros 300 caracteres)
-        if term in document_text[:300].lower():
-            score *= 1.5
+    # La tabla de un bundle viaja como ruta (cada proceso la abre con mmap)
+    source = idf_table.path if idf_table is not None and idf_table.path else idf_table
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(source,)) as pool:
+        parts = pool.map(_extract_chunk, chunks, [n_competencies] * len(chunks))
+        return [competencies for part in parts for competencies in part]
 
-        # Evitar duplicados por raíz (ahora más flexible)
-        root = term.split()[0][:10] if " " in term else term[:10]
-        if root in seen_roots:
-            continue
-        seen_roots.add(root)
 
-        # Filtrar términos muy genéricos o muy cortos
-        if len(term) < 4:
-            continue
+def _init_worker(source):
+    _WORKER["idf_table"] = IdfTable.load(source) if isinstance(source, str) else source
 
-        n_words = len(term.split())
-        term_type = "trigram" if n_words == 3 else ("bigram" if n_words == 2 else "unigram")
 
-        competencies.append({
-            "term": term,
-            "score": round(float(score), 4),
-            "type": term_type
-        })
+def _extract_chunk(texts: list, n_competencies: int) -> list[list[dict]]:
+    return [extract_competencies(text, n_competencies, _WORKER["idf_table"]) for text in texts]
 
-    return competencies
+
+def _chain(first: str, rest):
+    yield first
+    yield from rest
 
 
 def competencies_to_search_query(competencies: list[dict]) -> str:
@@ -0,0 +1,115 @@
+"""Tabla IDF de n-gramas (1 a 3 palabras) para la extracción de competencias.
+
+Se calcula una vez al compilar el catálogo, sobre combined_text de todos los
+cursos más el corpus opcional de programas de asignatura de SYLLABI_DIR. Las
+claves son las palabras de contenido del n-grama separadas por espacio, igual
+que las frases candidatas de extract_competencies() (ver modules/keyphrases.py).
+Así un término genérico (que aparece en muchos cursos) pesa poco aunque se
+repita en el documento.
+
+Solo se guardan los n-gramas presentes en al menos COMPETENCY_IDF_MIN_DF
+documentos; el resto recibe el IDF de un término no visto (el máximo). En
+disco son tres archivos: terms.txt (un n-grama por línea, ordenados),
+idf.npy (float32, mismo orden, abierto con mmap) y idf.json (metadatos).
+"""
+import json
+import os
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from config import SPANISH_STOP_WORDS, SYLLABI_DIR, COMPETENCY_IDF_MIN_DF
+from modules.document_processor import extract_text_from_path
+
+COMPETENCY_TOKEN_PATTERN = r'(?u)\b[a-záéíóúñü][a-záéíóúñü]+\b'
+SYLLABUS_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+
+def competency_analyzer():
+    """Analizador de n-gramas (1, 3) de la tabla: tokens sin stop words."""
+    return CountVectorizer(
+        stop_words=SPANISH_STOP_WORDS,
+        ngram_range=(1, 3),
+        token_pattern=COMPETENCY_TOKEN_PATTERN,
+        lowercase=True,
+    ).build_analyzer()
+
+
+class IdfTable:
+    def __init__(self, terms: list[str], idf: np.ndarray, n_docs: int, path: str = None):
+        self.terms = list(terms)
+        self.idf = idf
+        self.n_docs = n_docs
+        self.path = path  # carpeta de donde se cargó (None si se construyó en memoria)
+        # IDF suavizado (como TfidfVectorizer) de un término con df = 0
+        self.default_idf = float(np.log(1.0 + n_docs) + 1.0)
+        self._positions = {term: i for i, term in enumerate(self.terms)}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def lookup(self, terms: list[str]) -> np.ndarray:
+        """IDF de cada término (default_idf para los que no están en la tabla)."""
+        positions = np.fromiter((self._positions.get(t, -1) for t in terms),
+                                dtype=np.int64, count=len(terms))
+        values = np.full(len(terms), self.default_idf)
+        known = positions >= 0
+        values[known] = self.idf[positions[known]]
+        return values
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "terms.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.terms))
+        np.save(os.path.join(path, "idf.npy"), np.asarray(self.idf, dtype=np.float32))
+        with open(os.path.join(path, "idf.json"), "w", encoding="utf-8") as f:
+            json.dump({"n_docs": self.n_docs, "n_terms": len(self.terms)}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "IdfTable":
+        with open(os.path.join(path, "idf.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "terms.txt"), encoding="utf-8") as f:
+            terms = f.read().split("\n") if meta["n_terms"] else []
+        idf = np.load(os.path.join(path, "idf.npy"), mmap_mode="r" if mmap else None)
+        return cls(terms, idf, meta["n_docs"], path)
+
+
+def build_idf_table(texts, min_df: int = None) -> IdfTable:
+    """Tabla IDF de los n-gramas de `texts` (un documento por texto)."""
+    min_df = COMPETENCY_IDF_MIN_DF if min_df is None else min_df
+    texts = list(texts)
+    counter = CountVectorizer(analyzer=competency_analyzer(), binary=True,
+                              min_df=min(max(1, min_df), max(1, len(texts))),
+                              dtype=np.int32)
+    try:
+        presence = counter.fit_transform(texts)
+    except ValueError:
+        # Corpus vacío o sin n-gramas después de los filtros
+        return IdfTable([], np.zeros(0, dtype=np.float32), len(texts))
+    df = np.bincount(presence.indices, minlength=presence.shape[1])
+    idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+    # get_feature_names_out() ya viene ordenado alfabéticamente
+    return IdfTable(counter.get_feature_names_out().tolist(), idf, len(texts))
+
+
+def syllabus_paths(directory: str = None) -> list[str]:
+    """Archivos del corpus de programas de asignatura (vacío si no existe la carpeta)."""
+    directory = directory or SYLLABI_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names if name.lower().endswith(SYLLABUS_EXTENSIONS)
+    )
+
+
+def syllabus_texts(directory: str = None):
+    """Textos del corpus de programas; los archivos que no se pueden leer se omiten."""
+    for path in syllabus_paths(directory):
+        try:
+            text = extract_text_from_path(path)
+        except Exception:
+            continue
+        if text.strip():
+            yield text
+
@@ -1,88 +1,618 @@
 """Módulo para hacer matching entre el documento del docente y el catálogo de Coursera."""
+import json
+import os
+import pickle
 import numpy as np
-import pandas as pd
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from config import (
-    SPANISH_STOP_WORDS, MIN_SIMILARITY_THRESHOLD, TOP_N_COURSERA,
+    SPANISH_STOP_WORDS, MIN_SIMILARITY_THRESHOLD, TOP_N_COURSERA, BATCH_CHUNK_DOCS,
+    MATCH_ENGINE, VECTORIZER_MODE, LSA_MIN_SIMILARITY, INDEX_PRUNE_MASS, PRUNE_RECALL_QUERIES,
+    PRUNE_MIN_RECALL,
+    RATING_FACET_STEPS, HOURS_FACET_STEPS, FACET_SUBSET_RATIO,
+    VOCAB_DRIFT_THRESHOLD, DRIFT_SAMPLE_SIZE, SPEC_TEXT_WEIGHT, SPEC_TOP_COURSES,
+    MMR_LAMBDA, MMR_CANDIDATES, MMR_PARTNER_QUOTA, MMR_SUBDOMAIN_QUOTA, KNN_NEIGHBORS,
     COL_NAME, COL_PARTNER, COL_HOURS, COL_RATING, COL_URL,
     COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS, COL_DIFFICULTY,
-    COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE,
+    COL_DOMAIN, COL_SUBDOMAIN, COL_LANGUAGE, COL_SPEC_URL,
     SCOL_NAME, SCOL_PARTNERS, SCOL_URL, SCOL_DESCRIPTION,
-    SCOL_DIFFICULTY, SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_TYPE, SCOL_NUM_COURSES
+    SCOL_DIFFICULTY, SCOL_DOMAIN, SCOL_SUBDOMAIN, SCOL_TYPE, SCOL_NUM_COURSES, SCOL_LANGUAGE
 )
+from modules.catalog_ingest import COURSE_CATEGORICAL, SPECIALIZATION_CATEGORICAL
+from modules.catalog_loader import diff_catalog, COURSE_DERIVED, SPECIALIZATION_DERIVED
+from modules.catalog_snapshot import save_sparse, load_sparse
+from modules.catalog_store import CatalogStore, as_store
+from modules.diversity import gram_matrix, mmr_rerank
+from modules.facet_index import FacetIndex
+from modules.hashing_tfidf import HashingTfidf
+from modules.inverted_index import InvertedIndex
+from modules.knn_graph import build_knn_graph, graph_neighbors
+from modules.near_duplicates import (
+    VARIANT_LANGUAGES, VARIANT_DIFFICULTIES, VARIANT_URLS, VARIANT_MIN_HOURS, VARIANT_RECORDS,
+    VARIANT_SEPARATOR
+)
+from modules.lsa_index import LsaIndex
+from modules.sharded_search import ShardedSearcher
+
+ENGINES = ("brute", "maxscore", "lsa", "sharded")
+VECTORIZER_MODES = ("tfidf", "hashing")
+
+# Filtros por facetas: {clave del filtro: columna}
+COURSE_FACETS = {
+    "languages": COL_LANGUAGE,
+    "difficulties": COL_DIFFICULTY,
+    "domains": COL_DOMAIN,
+    "subdomains": COL_SUBDOMAIN,
+}
+# Prefiltro de los cursos agrupados: pasan si alguna variante cumple cada filtro;
+# luego se exige que una misma variante los cumpla todos (ver _filter)
+COURSE_VARIANTS = {
+    "languages": VARIANT_LANGUAGES,
+    "difficulties": VARIANT_DIFFICULTIES,
+    "max_hours": VARIANT_MIN_HOURS,
+}
+# Campo del registro de variante (VARIANT_RECORDS) que evalúa cada filtro
+VARIANT_RECORD_FACETS = {
+    "languages": "language",
+    "difficulties": "difficulty",
+    "domains": "domain",
+    "subdomains": "subdomain",
+}
+COURSE_RANGES = {
+    "min_rating": (COL_RATING, "min", RATING_FACET_STEPS),
+    "max_hours": (COL_HOURS, "max", HOURS_FACET_STEPS),
+}
+SPECIALIZATION_FACETS = {
+    "languages": SCOL_LANGUAGE,
+    "difficulties": SCOL_DIFFICULTY,
+    "domains": SCOL_DOMAIN,
+    "subdomains": SCOL_SUBDOMAIN,
+}
 
 
 class CourseraMatcher:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            stop_words=SPANISH_STOP_WORDS,
-            min_df=2,
-            max_df=0.85,
-            ngram_range=(1, 2),
-            sublinear_tf=True,
-            lowercase=True
-        )
+    def __init__(self, engine: str = None, vectorizer_mode: str = None):
+        """
+        `engine` elige cómo find_matches() busca el top-k (ver MATCH_ENGINE);
+        `vectorizer_mode`, cómo se vectoriza el texto (ver VECTORIZER_MODE).
+        """
+        self.engine = engine or MATCH_ENGINE
+        if self.engine not in ENGINES:
+            raise ValueError(f"Motor de búsqueda desconocido: {self.engine}")
+        vectorizer_mode = vectorizer_mode or VECTORIZER_MODE
+        if vectorizer_mode not in VECTORIZER_MODES:
+            raise ValueError(f"Modo de vectorización desconocido: {vectorizer_mode}")
+        if vectorizer_mode == "hashing":
+            self.vectorizer = HashingTfidf(stop_words=SPANISH_STOP_WORDS, ngram_range=(1, 2),
+                                           min_df=2, max_df=0.85)
+        else:
+            self.vectorizer = TfidfVectorizer(
+                max_features=5000,
+                stop_words=SPANISH_STOP_WORDS,
+                min_df=2,
+                max_df=0.85,
+                ngram_range=(1, 2),
+                sublinear_tf=True,
+                lowercase=True
+            )
         self._fitted = False
         self._course_vectors = None
-        self._courses_df = None
+        self._course_counts = None  # tf sublineal sin IDF (solo en modo "hashing")
+        self._courses = None
+        self.facets = None
+        self._baseline_oov = 0.0
+        self._index = None
+        self._lsa = None
+        self._shards = None
+        self._knn = None
+        self._url_rows = None
+        self._variant_records = None
+        self.index_report = {}
 
-    def fit(self, courses_df: pd.DataFrame):
-        """Ajusta el vectorizador con el catálogo de cursos."""
-        self._courses_df = courses_df.reset_index(drop=True)
-        texts = self._courses_df["combined_text"].fillna("").tolist()
-        self._course_vectors = self.vectorizer.fit_transform(texts)
+    def fit(self, courses):
+        """
+        Ajusta el vectorizador con el catálogo de cursos (DataFrame o CatalogStore).
+        Se recomienda ajustar sobre el catálogo completo: el filtro de horas
+        se aplica en find_matches() como máscara, sin reconstruir el índice.
+        """
+        courses = _course_store(courses)
+        texts = courses.texts("combined_text")
+        if isinstance(self.vectorizer, HashingTfidf):
+            self._course_counts = self.vectorizer.counts(texts)
+            self.vectorizer.fit_counts(self._course_counts)
+            full = _index_matrix(self.vectorizer.weight(self._course_counts), prune_mass=0.0)
+        else:
+            full = _index_matrix(self.vectorizer.fit_transform(texts), prune_mass=0.0)
+        self._course_vectors, self.index_report = _pruned_index(full, TOP_N_COURSERA)
+        self._baseline_oov = _oov_rate(self.vectorizer, _sample(texts))
+        self._lsa = LsaIndex.fit(self._course_vectors) if self.engine == "lsa" else None
+        self._set_catalog(courses)
         self._fitted = True
 
+    def refresh(self, courses, drift_threshold: float = None) -> dict:
+        """
+        Actualiza el índice con una nueva versión del catálogo.
+        Solo re-vectoriza las filas nuevas o cambiadas (vocabulario e IDF
+        congelados); si la deriva de vocabulario supera el umbral, reajusta todo.
+        En modo "hashing" no hay vocabulario: las frecuencias de documento se
+        actualizan con las filas agregadas y quitadas, y las filas sin cambios
+        se re-ponderan con el nuevo IDF.
+        Retorna un resumen del delta aplicado.
+        """
+        if not self._fitted:
+            self.fit(courses)
+            return {"full_refit": True}
+        courses = _course_store(courses)
+        if isinstance(self.vectorizer, HashingTfidf) and self._course_counts is not None:
+            vectors, summary = self._refresh_hashed(courses)
+        else:
+            vectors, summary = _refresh_vectors(
+                self.vectorizer, self._course_vectors, self._courses, courses,
+                COL_URL, self._baseline_oov, drift_threshold, self.index_report.get("prune_mass")
+            )
+        if vectors is None:
+            self.fit(courses)
+        else:
+            self._course_vectors = vectors
+            self.index_report.update(_index_size(vectors))
+            if self._lsa is not None:
+                self._lsa.rebuild(vectors)
+            elif self.engine == "lsa":
+                self._lsa = LsaIndex.fit(vectors)
+            self._set_catalog(courses)
+        return summary
+
+    def _refresh_hashed(self, courses: CatalogStore):
+        """
+        refresh() en modo "hashing": solo se vectorizan (counts) las filas
+        nuevas o cambiadas, df se actualiza con las filas que entran y salen y
+        la matriz completa se re-pondera con el nuevo IDF; el resultado es el
+        mismo que ajustar desde cero.
+        """
+        diff = diff_catalog(self._courses, courses, COL_URL)
+        delta_rows = np.concatenate([diff["added"], diff["changed_new"]])
+        delta = self.vectorizer.counts(courses.texts("combined_text", delta_rows.tolist()))
+        gone = np.concatenate([diff["removed"], diff["changed_old"]])
+        self.vectorizer.forget(self._course_counts[gone])
+        self.vectorizer.partial_fit(delta)
+        self._course_counts = _merge_rows(self._course_counts, delta, diff, len(courses))
+        summary = {
+            "added": len(diff["added"]),
+            "removed": len(diff["removed"]),
+            "changed": len(diff["changed_new"]),
+            "unchanged": len(diff["unchanged_new"]),
+            "drift": 0.0,
+            "full_refit": False,
+        }
+        prune_mass = self.index_report.get("prune_mass")
+        return _index_matrix(self.vectorizer.weight(self._course_counts), prune_mass), summary
+
+    def save(self, path: str):
+        """Guarda el vectorizador y la matriz de cursos (el catálogo va en su propio snapshot)."""
+        _save_index(path, self.vectorizer, self._course_vectors, self._baseline_oov,
+                    self.index_report)
+        if self._course_counts is not None:
+            save_sparse(path, "counts", self._course_counts)
+        if self._lsa is not None:
+            self._lsa.save(os.path.join(path, "lsa"))
+        if KNN_NEIGHBORS:
+            # El grafo se construye aquí, al compilar; nunca en una consulta
+            if self._knn is None:
+                self._knn = build_knn_graph(self._course_vectors)
+            save_sparse(path, "knn", self._knn)
+
+    @classmethod
+    def load(cls, path: str, courses, mmap: bool = True,
+             engine: str = None) -> "CourseraMatcher":
+        """Reconstruye un matcher ajustado desde save(); courses debe ser el mismo catálogo."""
+        matcher = cls(engine=engine)
+        (matcher.vectorizer, matcher._course_vectors, matcher._baseline_oov,
+         matcher.index_report) = _load_index(path, mmap)
+        if os.path.exists(os.path.join(path, "lsa", "lsa.json")):
+            matcher._lsa = LsaIndex.load(os.path.join(path, "lsa"), mmap=mmap)
+        matcher._set_catalog(_course_store(courses))
+        if os.path.exists(os.path.join(path, "knn.shape.json")):
+            matcher._knn = load_sparse(path, "knn", mmap=mmap)
+        if os.path.exists(os.path.join(path, "counts.shape.json")):
+            matcher._course_counts = load_sparse(path, "counts", mmap=mmap)
+        matcher._fitted = True
+        return matcher
+
+    def _set_catalog(self, courses: CatalogStore):
+        self._courses = courses
+        self._index = None
+        self._knn = None
+        self._url_rows = None
+        self._variant_records = None
+        self.close()
+        self.facets = FacetIndex(courses, COURSE_FACETS, COURSE_RANGES, COURSE_VARIANTS)
+
+    def _candidate_mask(self, **filters):
+        """
+        Máscara booleana de los cursos que cumplen los filtros (ver FacetIndex):
+        languages, difficulties, domains, subdomains, min_rating, max_hours.
+        Retorna None si no hay filtros activos. Los cursos sin horas o rating
+        conocidos (NaN) quedan fuera cuando se filtra por ellos. Un curso
+        agrupado pasa si su fila o una misma variante cumple todos los filtros.
+        """
+        return self._filter(**filters)[0]
+
+    def _filter(self, **filters):
+        """
+        (máscara, variantes): la máscara de _candidate_mask() y, para los cursos
+        que pasan solo gracias a una variante, {fila: registro de esa variante}
+        (ver VARIANT_RECORDS), para mostrar sus datos en el resultado.
+        """
+        mask = self.facets.mask(**filters)
+        chosen = {}
+        if mask is None:
+            return mask, chosen
+        if self._variant_records is None:
+            texts = self._courses.take(VARIANT_RECORDS, range(len(self._courses)), "")
+            self._variant_records = {i: json.loads(text) for i, text in enumerate(texts) if text}
+        for row, records in self._variant_records.items():
+            if not mask[row]:
+                continue
+            match = next((r for r in records if _record_matches(r, filters)), None)
+            if match is None:
+                mask[row] = False
+            elif match is not records[0]:
+                chosen[row] = match
+        return mask, chosen
+
+    def close(self):
+        """Libera el pool de procesos y la memoria compartida del modo "sharded"."""
+        if self._shards is not None:
+            self._shards.close()
+            self._shards = None
+
+    def _sharded(self) -> ShardedSearcher:
+        if self._shards is None:
+            self._shards = ShardedSearcher(self._course_vectors)
+        return self._shards
+
+    def _lsa_index(self) -> LsaIndex:
+        if self._lsa is None:
+            self._lsa = LsaIndex.fit(self._course_vectors)
+        return self._lsa
+
+    @property
+    def has_similar_courses(self) -> bool:
+        """True si hay grafo kNN precalculado (cargado de un bundle) para similar_courses()."""
+        return self._knn is not None
+
+    def similar_courses(self, course_url: str, k: int = 5) -> list[dict]:
+        """
+        Cursos más parecidos al curso con esa URL (o a la fila canónica de la
+        que es variante), leídos del grafo kNN precalculado: no se recorre el
+        catálogo. Retorna [] si la URL no está en el catálogo o si no hay grafo
+        (solo lo trae un bundle; ver save()).
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de similar_courses()")
+        if self._knn is None:
+            return []
+        if self._url_rows is None:
+            urls = self._courses.take(COL_URL, range(len(self._courses)), "")
+            variants = self._courses.take(VARIANT_URLS, range(len(self._courses)), "")
+            self._url_rows = {}
+            for i, (url, extra) in enumerate(zip(urls, variants)):
+                for key in [url] + str(extra).split(VARIANT_SEPARATOR):
+                    key = key.strip().rstrip("/")
+                    if key:
+                        self._url_rows.setdefault(key, i)
+        row = self._url_rows.get(str(course_url).strip().rstrip("/"))
+        if row is None:
+            return []
+        rows, scores = graph_neighbors(self._knn, row, k)
+        return self._course_results(self._courses.value(COL_NAME, row), rows, scores)
+
+    @property
+    def scans_catalog(self) -> bool:
+        """True si el motor puntúa todo el catálogo en cada consulta ("brute", "sharded")."""
+        return self.engine in ("brute", "sharded")
+
+    def _default_threshold(self) -> float:
+        return LSA_MIN_SIMILARITY if self.engine == "lsa" else MIN_SIMILARITY_THRESHOLD
+
+    def similarities(self, document_text: str) -> np.ndarray:
+        """
+        Similitud coseno del documento contra todos los cursos del catálogo
+        (sin filtros). En modo "lsa" es la similitud entre vectores LSA.
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de similarities()")
+        return self._query_similarities(self.vectorizer.transform([document_text]))
+
+    def competency_similarities(self, competencies: list[dict],
+                                query: sp.csr_matrix = None) -> np.ndarray:
+        """
+        Como similarities(), con la consulta armada por competency_vector().
+        `query` permite reutilizar ese vector si ya se armó.
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de competency_similarities()")
+        if query is None:
+            query = self.competency_vector(competencies)
+        return self._query_similarities(query)
+
+    def competency_vector(self, competencies: list[dict]) -> sp.csr_matrix:
+        """
+        Vector consulta (1 × vocabulario) a partir de las competencias
+        validadas: cada término se analiza igual que el catálogo (minúsculas,
+        stop words, unigramas y bigramas) y cada n-grama del vocabulario suma
+        score × idf. El vector se normaliza (norma L2 = 1) como los de transform().
+        """
+        analyze = self.vectorizer.build_analyzer()
+        vocabulary = self.vectorizer.vocabulary_
+        idf = self.vectorizer.idf_
+        weights = {}
+        for comp in competencies:
+            score = float(comp.get("score", 1.0))
+            for gram in analyze(comp["term"]):
+                j = vocabulary.get(gram)
+                if j is not None:
+                    weights[j] = weights.get(j, 0.0) + score * idf[j]
+
+        columns = np.array(sorted(weights), dtype=np.int32)
+        data = np.array([weights[j] for j in columns.tolist()], dtype=np.float64)
+        norm = np.linalg.norm(data)
+        if norm > 0:
+            data /= norm
+        indptr = np.array([0, len(columns)], dtype=np.int32)
+        return sp.csr_matrix((data, columns, indptr), shape=(1, len(idf)))
+
+    def _query_similarities(self, query) -> np.ndarray:
+        if self.engine == "lsa":
+            return self._lsa_index().similarities(query)
+        if self.engine == "sharded":
+            return self._sharded().similarities(query)
+        return _dot_scores(query, self._course_vectors)
+
     def find_matches(self, document_text: str, top_n: int = None,
-                     threshold: float = None) -> list[dict]:
+                     threshold: float = None, max_hours: float = None,
+                     similarities: np.ndarray = None, mmr_lambda: float = None,
+                     **filters) -> list[dict]:
         """
         Encuentra los cursos más similares al documento del docente.
+        Si se indica max_hours, solo considera cursos con duración <= max_hours;
+        `filters` admite además languages, difficulties, domains, subdomains
+        (listas de valores) y min_rating. Con filtros selectivos solo se
+        puntúan los cursos que los cumplen.
+        `similarities` permite reutilizar un vector ya calculado con similarities();
+        si no se pasa y el motor es "maxscore", solo se puntúan los candidatos
+        que puede devolver el índice invertido.
+        `mmr_lambda` (por defecto MMR_LAMBDA) balancea relevancia y diversidad
+        al re-ordenar los resultados (ver modules/diversity.py); 1 = solo relevancia.
         Retorna lista de dicts con info del curso y score de similitud.
         """
         if not self._fitted:
             raise RuntimeError("Debe llamar fit() antes de find_matches()")
+        query = None if similarities is not None else self.vectorizer.transform([document_text])
+        return self._find_matches(query, document_text, top_n, threshold, similarities,
+                                  mmr_lambda, max_hours=max_hours, **filters)
+
+    def find_matches_for_competencies(self, competencies: list[dict], top_n: int = None,
+                                      threshold: float = None, max_hours: float = None,
+                                      similarities: np.ndarray = None, mmr_lambda: float = None,
+                                      query: sp.csr_matrix = None, **filters) -> list[dict]:
+        """
+        Igual que find_matches(), pero la consulta se arma solo con las
+        competencias validadas ({"term", "score"}) en lugar del documento
+        completo: quitar o agregar competencias cambia el ranking, y la consulta
+        tiene unas decenas de términos sin importar el largo del documento.
+        `similarities` permite reutilizar competency_similarities() y `query`,
+        el vector de competency_vector().
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de find_matches_for_competencies()")
+        if similarities is not None:
+            query = None
+        elif query is None:
+            query = self.competency_vector(competencies)
+        label = ", ".join(comp["term"] for comp in competencies)
+        return self._find_matches(query, label, top_n, threshold, similarities,
+                                  mmr_lambda, max_hours=max_hours, **filters)
 
+    def _find_matches(self, query, document_text: str, top_n: int, threshold: float,
+                      similarities: np.ndarray, mmr_lambda: float, **filters) -> list[dict]:
         if top_n is None:
             top_n = TOP_N_COURSERA
         if threshold is None:
-            threshold = MIN_SIMILARITY_THRESHOLD
+            threshold = self._default_threshold()
+        if mmr_lambda is None:
+            mmr_lambda = MMR_LAMBDA
+        # Con re-ranking por diversidad se recuperan más candidatos que top_n
+        k = max(top_n, MMR_CANDIDATES) if mmr_lambda < 1 else top_n
 
-        doc_vector = self.vectorizer.transform([document_text])
-        similarities = cosine_similarity(doc_vector, self._course_vectors)[0]
+        mask, variants = self._filter(**filters)
+        rows, scores = self._top_candidates(query, k, threshold, similarities, mask)
+        rows, scores = self._diversify(rows, scores, top_n, mmr_lambda)
+        return self._course_results(document_text, rows, scores, variants)
+
+    def _top_candidates(self, query, k: int, threshold: float,
+                        similarities: np.ndarray, mask: np.ndarray):
+        """
+        (filas, scores) de los k cursos más similares según el motor configurado.
+        Con un filtro selectivo (ver _subset_rows) solo se puntúan las filas que
+        lo cumplen, con cualquier motor.
+        """
+        if similarities is None and self.engine == "lsa":
+            return self._top_lsa(query, k, threshold, mask)
+        if similarities is None:
+            rows = _subset_rows(mask)
+            if rows is not None:
+                scores = _dot_scores(query, self._course_vectors[rows])
+                top = _top_k(scores, k, threshold)
+                return rows[top], scores[top]
+            if self.engine == "maxscore" and threshold > 0:
+                return self._top_indexed(query, k, threshold, mask)
+            if self.engine == "sharded":
+                return self._sharded().top_k(query, k, threshold, mask)
+            similarities = self._query_similarities(query)
+
+        top = _top_k(similarities, k, threshold, mask)
+        return top, similarities[top]
+
+    def _diversify(self, rows: np.ndarray, scores: np.ndarray, top_n: int,
+                   mmr_lambda: float):
+        """
+        Re-ordena por MMR los candidatos (ordenados por relevancia) y se queda
+        con top_n, con las cuotas por partner y subdominio de config.py.
+        """
+        if mmr_lambda >= 1 or len(rows) <= 1:
+            return rows[:top_n], scores[:top_n]
+        quotas = [
+            (self._courses.take(col, rows, ""), quota)
+            for col, quota in ((COL_PARTNER, MMR_PARTNER_QUOTA),
+                               (COL_SUBDOMAIN, MMR_SUBDOMAIN_QUOTA))
+            if quota
+        ]
+        gram = gram_matrix(self._course_vectors[rows])
+        chosen = mmr_rerank(scores, gram, top_n, mmr_lambda, quotas)
+        return rows[chosen], scores[chosen]
+
+    def similarity_blocks(self, documents: list[str], chunk_size: int = None):
+        """
+        Itera (inicio, bloque) con la similitud de `documents` contra todo el
+        catálogo, de `chunk_size` documentos a la vez. Cada bloque es una
+        matriz CSR documentos × cursos con los índices ordenados (en modo
+        "lsa", un arreglo denso).
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de similarity_blocks()")
+        if chunk_size is None:
+            chunk_size = BATCH_CHUNK_DOCS
+        documents = list(documents)
+        if not documents:
+            return
+        doc_vectors = self.vectorizer.transform(documents)
+        for start in range(0, doc_vectors.shape[0], chunk_size):
+            if self.engine == "lsa":
+                lsa = self._lsa_index()
+                yield start, np.vstack([lsa.similarities(doc_vectors[i])
+                                        for i in range(start, min(start + chunk_size, doc_vectors.shape[0]))])
+                continue
+            yield start, _dot_scores_batch(doc_vectors[start:start + chunk_size],
+                                           self._course_vectors)
+
+    def similarities_batch(self, documents: list[str]) -> sp.csr_matrix:
+        """Similitudes documentos × cursos (entrada de course_scores en lote); densa en modo "lsa"."""
+        blocks = [block for _, block in self.similarity_blocks(documents)]
+        if not blocks:
+            if self.engine == "lsa":
+                return np.zeros((0, len(self._courses)), dtype=np.float32)
+            return sp.csr_matrix((0, len(self._courses)), dtype=np.float32)
+        if self.engine == "lsa":
+            return np.vstack(blocks)
+        return sp.vstack(blocks).tocsr()
+
+    def find_matches_batch(self, documents: list[str], top_n: int = None,
+                           threshold: float = None, filters: dict = None,
+                           mmr_lambda: float = None) -> list[list[dict]]:
+        """
+        Igual que find_matches() para muchos documentos a la vez: transforma
+        todos los documentos juntos y calcula la similitud en un solo producto
+        disperso por bloque. `filters` admite los mismos filtros que
+        find_matches() (p. ej. {"max_hours": 10}).
+        Retorna una lista de resultados por documento, en el mismo orden.
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de find_matches_batch()")
+        if top_n is None:
+            top_n = TOP_N_COURSERA
+        if threshold is None:
+            threshold = self._default_threshold()
+        if mmr_lambda is None:
+            mmr_lambda = MMR_LAMBDA
+        k = max(top_n, MMR_CANDIDATES) if mmr_lambda < 1 else top_n
+        mask, variants = self._filter(**(filters or {}))
 
-        top_indices = np.argsort(similarities)[::-1]
         results = []
+        for start, block in self.similarity_blocks(documents):
+            for i in range(block.shape[0]):
+                if sp.issparse(block):
+                    rows, scores = _top_k_sparse_row(block, i, k, threshold, mask)
+                else:
+                    rows = _top_k(block[i], k, threshold, mask)
+                    scores = block[i][rows]
+                rows, scores = self._diversify(rows, scores, top_n, mmr_lambda)
+                results.append(self._course_results(documents[start + i], rows, scores,
+                                                    variants))
+        return results
 
-        for idx in top_indices:
-            if len(results) >= top_n:
-                break
-            score = similarities[idx]
-            if score < threshold:
-                break
+    def _top_indexed(self, doc_vector, k: int, threshold: float, mask: np.ndarray):
+        if self._index is None:
+            self._index = InvertedIndex(self._course_vectors)
+        rows = self._index.candidates(doc_vector, k, threshold, mask)
+        scores = _dot_scores(doc_vector, self._course_vectors[rows])
+        top = _top_k(scores, k, threshold)
+        return rows[top], scores[top]
 
-            row = self._courses_df.iloc[idx]
-            skills = str(row.get(COL_SKILLS, ""))
-            core_skills = str(row.get(COL_CORE_SKILLS, ""))
+    def _top_lsa(self, doc_vector, k: int, threshold: float, mask: np.ndarray):
+        lsa = self._lsa_index()
+        rows = lsa.probe(doc_vector)
+        if rows is None:
+            rows = _subset_rows(mask)
+        if rows is None:
+            scores = lsa.similarities(doc_vector)
+            top = _top_k(scores, k, threshold, mask)
+            return top, scores[top]
+        scores = lsa.similarities(doc_vector, rows)
+        top = _top_k(scores, k, threshold, None if mask is None else mask[rows])
+        return rows[top], scores[top]
 
+    def _course_results(self, document_text: str, rows: np.ndarray,
+                        scores: np.ndarray, variants: dict = None) -> list[dict]:
+        """
+        Arma los resultados columna por columna para las filas seleccionadas.
+        `variants` ({fila: registro}, ver _filter()) indica los cursos que pasaron
+        los filtros por una variante: se muestran su URL, horas, nivel e idioma.
+        """
+        courses = self._courses
+        fields = {
+            col: courses.take(col, rows, default)
+            for col, default in (
+                (COL_NAME, ""), (COL_PARTNER, ""), (COL_HOURS, 0), (COL_RATING, 0),
+                (COL_DIFFICULTY, ""), (COL_URL, ""), (COL_DESCRIPTION, ""),
+                (COL_SKILLS, ""), (COL_CORE_SKILLS, ""), (COL_DOMAIN, ""),
+                (COL_SUBDOMAIN, ""), (COL_LANGUAGE, ""),
+                (VARIANT_LANGUAGES, ""), (VARIANT_URLS, ""),
+            )
+        }
+        results = []
+        for k, score in enumerate(scores.tolist()):
+            row = {col: values[k] for col, values in fields.items()}
+            variant_urls = [u for u in str(row[VARIANT_URLS]).split(VARIANT_SEPARATOR) if u]
+            record = variants.get(int(rows[k])) if variants else None
+            if record is not None:
+                variant_urls = [row[COL_URL]] + [u for u in variant_urls if u != record["url"]]
+                row.update({
+                    COL_URL: record["url"],
+                    COL_HOURS: np.nan if record["hours"] is None else record["hours"],
+                    COL_RATING: np.nan if record["rating"] is None else record["rating"],
+                    COL_DIFFICULTY: record["difficulty"],
+                    COL_LANGUAGE: record["language"],
+                })
             results.append({
-                "nombre": str(row.get(COL_NAME, "")),
-                "partner": str(row.get(COL_PARTNER, "")),
-                "horas": row.get(COL_HOURS, 0),
-                "rating": row.get(COL_RATING, 0),
-                "nivel": str(row.get(COL_DIFFICULTY, "")),
-                "url": str(row.get(COL_URL, "")),
-                "descripcion": str(row.get(COL_DESCRIPTION, ""))[:300],
-                "skills": skills,
-                "core_skills": core_skills,
-                "dominio": str(row.get(COL_DOMAIN, "")),
-                "subdominio": str(row.get(COL_SUBDOMAIN, "")),
-                "idioma": str(row.get(COL_LANGUAGE, "")),
-                "similitud": round(float(score), 4),
+                "nombre": str(row[COL_NAME]),
+                "partner": str(row[COL_PARTNER]),
+                "horas": row[COL_HOURS],
+                "rating": row[COL_RATING],
+                "nivel": str(row[COL_DIFFICULTY]),
+                "url": str(row[COL_URL]),
+                "descripcion": str(row[COL_DESCRIPTION])[:300],
+                "skills": str(row[COL_SKILLS]),
+                "core_skills": str(row[COL_CORE_SKILLS]),
+                "dominio": str(row[COL_DOMAIN]),
+                "subdominio": str(row[COL_SUBDOMAIN]),
+                "idioma": str(row[COL_LANGUAGE]),
+                # Variantes casi duplicadas agrupadas en este curso
+                "idiomas": str(row[VARIANT_LANGUAGES] or row[COL_LANGUAGE]),
+                "variantes": variant_urls,
+                "similitud": round(score, 4),
                 "justificacion": _generate_justification(document_text, row, score)
             })
-
         return results
 
 
@@ -99,51 +629,521 @@ class SpecializationMatcher:
         )
         self._fitted = False
         self._vectors = None
-        self._df = None
+        self._specs = None
+        self._baseline_oov = 0.0
+        self._membership = None
+        self.index_report = {}
+        self.facets = None
 
-    def fit(self, spec_df: pd.DataFrame):
-        self._df = spec_df.reset_index(drop=True)
-        texts = self._df["combined_text"].fillna("").tolist()
-        self._vectors = self.vectorizer.fit_transform(texts)
+    def fit(self, specs, courses=None):
+        """
+        Ajusta el vectorizador con las especializaciones. Si se pasa el catálogo
+        de cursos (el mismo, en el mismo orden, que usa CourseraMatcher), también
+        construye la matriz de pertenencia curso → especialización.
+        """
+        self._set_catalog(_spec_store(specs))
+        texts = self._specs.texts("combined_text")
+        if texts:
+            full = _index_matrix(self.vectorizer.fit_transform(texts), prune_mass=0.0)
+            self._vectors, self.index_report = _pruned_index(full, 5)
+            self._baseline_oov = _oov_rate(self.vectorizer, _sample(texts))
+        else:
+            # Catálogo sin especializaciones (p. ej. una fuente CSV solo de cursos)
+            self._vectors = sp.csr_matrix((0, 0), dtype=np.float32)
+            self.index_report = _index_size(self._vectors)
+            self._baseline_oov = 0.0
+        if courses is not None:
+            self._membership = _build_membership(courses, self._specs)
         self._fitted = True
 
+    def refresh(self, specs, courses=None, drift_threshold: float = None) -> dict:
+        """Igual que CourseraMatcher.refresh(), usando la URL de la especialización como clave."""
+        specs = _spec_store(specs)
+        if not self._fitted or not len(self._specs) or not len(specs):
+            self.fit(specs, courses)
+            return {"full_refit": True}
+        if courses is not None:
+            self._membership = _build_membership(courses, specs)
+        vectors, summary = _refresh_vectors(
+            self.vectorizer, self._vectors, self._specs, specs,
+            SCOL_URL, self._baseline_oov, drift_threshold, self.index_report.get("prune_mass")
+        )
+        if vectors is None:
+            self.fit(specs)
+        else:
+            self._vectors = vectors
+            self.index_report.update(_index_size(vectors))
+            self._set_catalog(specs)
+        return summary
+
+    def save(self, path: str):
+        _save_index(path, self.vectorizer, self._vectors, self._baseline_oov, self.index_report)
+        if self._membership is not None:
+            save_sparse(path, "membership", self._membership)
+
+    @classmethod
+    def load(cls, path: str, specs, mmap: bool = True) -> "SpecializationMatcher":
+        matcher = cls()
+        (matcher.vectorizer, matcher._vectors, matcher._baseline_oov,
+         matcher.index_report) = _load_index(path, mmap)
+        matcher._set_catalog(_spec_store(specs))
+        if os.path.exists(os.path.join(path, "membership.shape.json")):
+            matcher._membership = load_sparse(path, "membership", mmap=mmap)
+        matcher._fitted = True
+        return matcher
+
+    @property
+    def uses_course_scores(self) -> bool:
+        """True si find_matches() puede puntuar por cursos (hay matriz de pertenencia)."""
+        return self._membership is not None and len(self._specs) > 0
+
+    def _set_catalog(self, specs: CatalogStore):
+        self._specs = specs
+        self.facets = FacetIndex(specs, SPECIALIZATION_FACETS)
+
     def find_matches(self, document_text: str, top_n: int = 5,
-                     threshold: float = None) -> list[dict]:
+                     threshold: float = None, course_scores: np.ndarray = None,
+                     text_weight: float = None, **filters) -> list[dict]:
+        """
+        Encuentra las especializaciones más relevantes para el documento.
+        Si se pasa `course_scores` (CourseraMatcher.similarities()) y hay matriz
+        de pertenencia, la relevancia es el promedio de los SPEC_TOP_COURSES
+        cursos más similares de cada especialización, mezclado con el score de
+        texto propio según `text_weight` (0 = solo cursos); las especializaciones
+        sin cursos en el catálogo se puntúan solo por su texto.
+        `filters` admite languages, difficulties, domains y subdomains.
+        """
         if not self._fitted:
             raise RuntimeError("Debe llamar fit() antes de find_matches()")
+        if not len(self._specs):
+            return []
         if threshold is None:
             threshold = MIN_SIMILARITY_THRESHOLD
+        if text_weight is None:
+            text_weight = SPEC_TEXT_WEIGHT
+
+        mask = self._candidate_mask(**filters)
+        rows = _subset_rows(mask)
+        if course_scores is not None and self._membership is not None:
+            membership = self._membership if rows is None else self._membership[rows]
+            similarities = _course_based_scores(
+                membership, np.asarray(course_scores).ravel(), text_weight,
+                lambda: self._text_similarities(document_text, rows))
+        else:
+            similarities = self._text_similarities(document_text, rows)
 
-        doc_vector = self.vectorizer.transform([document_text])
-        similarities = cosine_similarity(doc_vector, self._vectors)[0]
+        if rows is None:
+            top = _top_k(similarities, top_n, threshold, mask)
+            return self._spec_results(top, similarities[top])
+        top = _top_k(similarities, top_n, threshold)
+        return self._spec_results(rows[top], similarities[top])
+
+    def find_matches_batch(self, documents: list[str], top_n: int = 5,
+                           threshold: float = None, filters: dict = None,
+                           course_scores=None, text_weight: float = None) -> list[list[dict]]:
+        """
+        Igual que find_matches() para muchos documentos a la vez. `course_scores`
+        es la matriz documentos × cursos de CourseraMatcher.similarities_batch().
+        """
+        if not self._fitted:
+            raise RuntimeError("Debe llamar fit() antes de find_matches_batch()")
+        if not len(self._specs):
+            return [[] for _ in documents]
+        if threshold is None:
+            threshold = MIN_SIMILARITY_THRESHOLD
+        if text_weight is None:
+            text_weight = SPEC_TEXT_WEIGHT
+        mask = self._candidate_mask(**(filters or {}))
+        use_courses = course_scores is not None and self._membership is not None
+        needs_text = use_courses and (text_weight > 0 or not np.diff(self._membership.indptr).all())
 
-        top_indices = np.argsort(similarities)[::-1]
         results = []
+        for start in range(0, len(documents), BATCH_CHUNK_DOCS):
+            chunk = documents[start:start + BATCH_CHUNK_DOCS]
+            if use_courses:
+                block = course_scores[start:start + len(chunk)]
+                block = block.toarray() if sp.issparse(block) else np.asarray(block)
+                text = self._text_similarities_batch(chunk) if needs_text else None
+                similarities = np.vstack([
+                    _course_based_scores(self._membership, row, text_weight, lambda i=i: text[i])
+                    for i, row in enumerate(block)
+                ])
+            else:
+                similarities = self._text_similarities_batch(chunk)
+            for row in similarities:
+                top = _top_k(row, top_n, threshold, mask)
+                results.append(self._spec_results(top, row[top]))
+        return results
 
-        for idx in top_indices:
-            if len(results) >= top_n:
-                break
-            score = similarities[idx]
-            if score < threshold:
-                break
+    def _candidate_mask(self, **filters):
+        """Máscara de las especializaciones que cumplen los filtros (None si no hay)."""
+        return self.facets.mask(**filters)
 
-            row = self._df.iloc[idx]
+    def _spec_results(self, rows: np.ndarray, scores: np.ndarray) -> list[dict]:
+        specs = self._specs
+        fields = {
+            col: specs.take(col, rows, default)
+            for col, default in (
+                (SCOL_NAME, ""), (SCOL_PARTNERS, ""), (SCOL_NUM_COURSES, 0),
+                (SCOL_DIFFICULTY, ""), (SCOL_URL, ""), (SCOL_DESCRIPTION, ""),
+                (SCOL_DOMAIN, ""), (SCOL_SUBDOMAIN, ""), (SCOL_TYPE, ""),
+            )
+        }
+        results = []
+        for k, score in enumerate(scores.tolist()):
+            row = {col: values[k] for col, values in fields.items()}
             results.append({
-                "nombre": str(row.get(SCOL_NAME, "")),
-                "partner": str(row.get(SCOL_PARTNERS, "")),
-                "num_cursos": row.get(SCOL_NUM_COURSES, 0),
-                "nivel": str(row.get(SCOL_DIFFICULTY, "")),
-                "url": str(row.get(SCOL_URL, "")),
-                "descripcion": str(row.get(SCOL_DESCRIPTION, ""))[:300],
-                "dominio": str(row.get(SCOL_DOMAIN, "")),
-                "subdominio": str(row.get(SCOL_SUBDOMAIN, "")),
-                "tipo": str(row.get(SCOL_TYPE, "")),
-                "similitud": round(float(score), 4),
+                "nombre": str(row[SCOL_NAME]),
+                "partner": str(row[SCOL_PARTNERS]),
+                "num_cursos": row[SCOL_NUM_COURSES],
+                "nivel": str(row[SCOL_DIFFICULTY]),
+                "url": str(row[SCOL_URL]),
+                "descripcion": str(row[SCOL_DESCRIPTION])[:300],
+                "dominio": str(row[SCOL_DOMAIN]),
+                "subdominio": str(row[SCOL_SUBDOMAIN]),
+                "tipo": str(row[SCOL_TYPE]),
+                "similitud": round(score, 4),
                 "justificacion": _generate_spec_justification(row, score)
             })
-
         return results
 
+    def _text_similarities(self, document_text: str, rows: np.ndarray = None) -> np.ndarray:
+        vectors = self._vectors if rows is None else self._vectors[rows]
+        return _dot_scores(self.vectorizer.transform([document_text]), vectors)
+
+    def _text_similarities_batch(self, documents: list[str]) -> np.ndarray:
+        doc_vectors = self.vectorizer.transform(documents)
+        return _dot_scores_batch(doc_vectors, self._vectors).toarray()
+
+
+def _top_k(scores: np.ndarray, k: int, threshold: float, mask: np.ndarray = None) -> np.ndarray:
+    """
+    Índices de los k mayores scores >= threshold (restringidos a `mask`),
+    ordenados por score descendente y, en empate, por índice ascendente.
+    Usa selección parcial (argpartition) sobre los candidatos que superan el
+    umbral en lugar de ordenar todo el catálogo.
+    """
+    keep = scores >= threshold
+    if mask is not None:
+        keep &= mask
+    candidates = np.flatnonzero(keep)
+    if k <= 0 or not len(candidates):
+        return candidates[:0]
+    values = scores[candidates]
+    if len(candidates) > k:
+        # Incluir todos los empates con el k-ésimo para que el orden sea estable
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        chosen = values >= kth
+        candidates, values = candidates[chosen], values[chosen]
+    order = np.lexsort((candidates, -values))[:k]
+    return candidates[order]
+
+
+def _subset_rows(mask: np.ndarray):
+    """Filas que cumplen la máscara si son pocas (ver FACET_SUBSET_RATIO); si no, None."""
+    if mask is None:
+        return None
+    rows = np.flatnonzero(mask)
+    return rows if len(rows) <= FACET_SUBSET_RATIO * len(mask) else None
+
+
+def _record_matches(record: dict, filters: dict) -> bool:
+    """True si el registro de una variante (ver VARIANT_RECORDS) cumple todos los filtros."""
+    for key, selected in filters.items():
+        if selected is None or (isinstance(selected, (list, tuple, set)) and not selected):
+            continue
+        if key in VARIANT_RECORD_FACETS:
+            if isinstance(selected, str):
+                selected = [selected]
+            if record[VARIANT_RECORD_FACETS[key]] not in {str(v) for v in selected}:
+                return False
+        elif key == "min_rating":
+            if record["rating"] is None or record["rating"] < float(selected):
+                return False
+        elif key == "max_hours":
+            if record["hours"] is None or record["hours"] > float(selected):
+                return False
+    return True
+
+
+def _top_k_sparse_row(block, i: int, k: int, threshold: float, mask: np.ndarray = None):
+    """
+    _top_k() sobre la fila i de un bloque CSR con índices ordenados.
+    Con umbral positivo basta con los valores no nulos de la fila; si no,
+    los ceros también son candidatos y se densifica la fila.
+    Retorna (índices de columna, scores).
+    """
+    if threshold <= 0:
+        scores = block[i].toarray().ravel()
+        rows = _top_k(scores, k, threshold, mask)
+        return rows, scores[rows]
+    start, end = block.indptr[i], block.indptr[i + 1]
+    columns, values = block.indices[start:end], block.data[start:end]
+    top = _top_k(values, k, threshold, None if mask is None else mask[columns])
+    return columns[top], values[top]
+
+
+def _build_membership(courses, specs: CatalogStore):
+    """
+    Matriz dispersa especializaciones × cursos (CSR, valores 1) a partir de la
+    columna COL_SPEC_URL de los cursos (puede traer varias URLs separadas por coma).
+    """
+    spec_index = {}
+    for j, url in enumerate(specs[SCOL_URL].fillna("").astype(str)):
+        url = url.strip().rstrip("/")
+        if url:
+            spec_index.setdefault(url, j)
+
+    rows, cols = [], []
+    if COL_SPEC_URL in courses.columns:
+        for i, urls in enumerate(courses[COL_SPEC_URL].fillna("").astype(str)):
+            for url in urls.split(","):
+                j = spec_index.get(url.strip().rstrip("/"))
+                if j is not None:
+                    rows.append(j)
+                    cols.append(i)
+
+    membership = sp.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(specs), len(courses))
+    )
+    membership.data[:] = 1.0  # URLs repetidas en un mismo curso cuentan una vez
+    membership.sort_indices()
+    return membership
+
+
+def _top_member_scores(membership: sp.csr_matrix, scores: np.ndarray, m: int) -> np.ndarray:
+    """Promedio de los m mayores `scores` de los cursos de cada fila (0 si no tiene cursos)."""
+    counts = np.diff(membership.indptr)
+    row_of = np.repeat(np.arange(len(counts)), counts)
+    values = np.asarray(scores, dtype=np.float64)[membership.indices]
+    # Ordenar cada fila por score descendente y quedarse con sus m primeros
+    order = np.lexsort((-values, row_of))
+    rank = np.arange(len(order)) - np.repeat(membership.indptr[:-1], counts)
+    keep = order[rank < m]
+    totals = np.bincount(row_of[keep], weights=values[keep], minlength=len(counts))
+    return (totals / np.maximum(np.minimum(counts, m), 1)).astype(np.float32)
+
+
+def _course_based_scores(membership: sp.csr_matrix, course_scores: np.ndarray,
+                         text_weight: float, text_scores) -> np.ndarray:
+    """
+    Relevancia de las especializaciones por sus cursos (ver _top_member_scores),
+    mezclada con `text_scores()` según text_weight; las filas sin cursos toman
+    solo el score de texto. text_scores() solo se calcula si hace falta.
+    """
+    similarities = _top_member_scores(membership, course_scores, SPEC_TOP_COURSES)
+    has_courses = np.diff(membership.indptr) > 0
+    if text_weight <= 0 and has_courses.all():
+        return similarities
+    text = text_scores()
+    return np.where(has_courses, (1 - text_weight) * similarities + text_weight * text, text)
+
+
+def _dot_scores(doc_vector, matrix) -> np.ndarray:
+    """
+    Similitud coseno de un documento (fila dispersa) contra las filas de
+    `matrix`. Ambos ya tienen norma L2 = 1 (así los produce TfidfVectorizer),
+    de modo que basta el producto punto, sin renormalizar el catálogo en cada
+    consulta.
+    """
+    query = sp.csr_matrix(doc_vector, dtype=np.float32).toarray().ravel()
+    return matrix @ query
+
+
+def _dot_scores_batch(doc_vectors, matrix) -> sp.csr_matrix:
+    """Como _dot_scores() para varios documentos: CSR documentos × filas con índices ordenados."""
+    scores = (sp.csr_matrix(doc_vectors, dtype=np.float32) @ matrix.T).tocsr()
+    scores.sort_indices()
+    return scores
+
+
+def _index_matrix(vectors, prune_mass: float = None) -> sp.csr_matrix:
+    """
+    Matriz del índice: CSR float32 con los índices ordenados. Con prune_mass > 0
+    descarta de cada fila sus términos de menor peso hasta esa fracción de su
+    masa (suma de pesos al cuadrado); las filas no se renormalizan, así que
+    los scores podados nunca superan a los originales.
+    """
+    if prune_mass is None:
+        prune_mass = INDEX_PRUNE_MASS
+    matrix = sp.csr_matrix(vectors, dtype=np.float32)
+    matrix.sort_indices()
+    if prune_mass <= 0 or not matrix.nnz:
+        return matrix
+
+    n_rows = matrix.shape[0]
+    lengths = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(n_rows), lengths)
+    # Dentro de cada fila, de menor a mayor peso
+    order = np.lexsort((matrix.data, rows))
+    squared = matrix.data[order].astype(np.float64) ** 2
+    cumulative = np.cumsum(squared)
+    row_offset = np.concatenate([[0.0], cumulative])[matrix.indptr[:-1]]
+    within_row = cumulative - np.repeat(row_offset, lengths)
+    row_mass = np.bincount(rows, weights=squared, minlength=n_rows)[rows]
+    keep = np.ones(matrix.nnz, dtype=bool)
+    keep[order[within_row <= prune_mass * row_mass]] = False
+
+    indptr = np.zeros_like(matrix.indptr)
+    np.cumsum(np.bincount(rows[keep], minlength=n_rows), out=indptr[1:])
+    return sp.csr_matrix((matrix.data[keep], matrix.indices[keep], indptr), shape=matrix.shape)
+
+
+def _index_size(matrix) -> dict:
+    return {
+        "nnz": int(matrix.nnz),
+        "nbytes": int(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes),
+    }
+
+
+def _index_report(full, pruned, k: int, n_queries: int = None) -> dict:
+    """
+    Tamaño del índice y, si hubo poda, recall@k del índice podado frente al
+    completo, usando una muestra de filas del propio catálogo como consultas.
+    """
+    if n_queries is None:
+        n_queries = PRUNE_RECALL_QUERIES
+    report = _index_size(pruned)
+    report["unpruned_nbytes"] = _index_size(full)["nbytes"]
+    if pruned.nnz == full.nnz or not full.shape[0]:
+        report["recall"] = 1.0
+        return report
+
+    step = max(1, full.shape[0] // n_queries)
+    hits = total = 0
+    for start in range(0, full.shape[0], step * BATCH_CHUNK_DOCS):
+        queries = full[start:start + step * BATCH_CHUNK_DOCS:step]
+        exact, approx = _dot_scores_batch(queries, full), _dot_scores_batch(queries, pruned)
+        for i in range(queries.shape[0]):
+            expected, _ = _top_k_sparse_row(exact, i, k, 1e-12)
+            found, _ = _top_k_sparse_row(approx, i, k, 1e-12)
+            hits += len(np.intersect1d(expected, found))
+            total += len(expected)
+    report["recall"] = round(hits / total, 4) if total else 1.0
+    return report
+
+
+def _pruned_index(full, k: int):
+    """
+    (matriz, reporte): el índice podado con INDEX_PRUNE_MASS, o el completo si
+    su recall@k queda por debajo de PRUNE_MIN_RECALL. El reporte guarda en
+    "prune_mass" la poda aplicada, para que refresh() pode igual las filas nuevas.
+    """
+    pruned = _index_matrix(full)
+    report = _index_report(full, pruned, k)
+    if report["recall"] >= PRUNE_MIN_RECALL:
+        report["prune_mass"] = INDEX_PRUNE_MASS
+        return pruned, report
+    report.update(_index_size(full), prune_mass=0.0)
+    return full, report
+
+
+def _course_store(courses) -> CatalogStore:
+    return as_store(courses, COURSE_CATEGORICAL, COURSE_DERIVED)
+
+
+def _spec_store(specs) -> CatalogStore:
+    return as_store(specs, SPECIALIZATION_CATEGORICAL, SPECIALIZATION_DERIVED)
+
+
+def _save_index(path: str, vectorizer, vectors, baseline_oov: float, report: dict = None):
+    os.makedirs(path, exist_ok=True)
+    if isinstance(vectorizer, HashingTfidf):
+        # Sin vocabulario: df e idf como arreglos mapeables
+        vectorizer.save(os.path.join(path, "hashing"))
+    else:
+        # stop_words_ solo sirve para introspección y puede ser enorme al serializar
+        if hasattr(vectorizer, "stop_words_"):
+            delattr(vectorizer, "stop_words_")
+        with open(os.path.join(path, "vectorizer.pkl"), "wb") as f:
+            pickle.dump(vectorizer, f)
+    save_sparse(path, "vectors", vectors)
+    with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"baseline_oov": baseline_oov, "report": report or {}}, f)
+
+
+def _load_index(path: str, mmap: bool):
+    if os.path.exists(os.path.join(path, "hashing", "hashing.json")):
+        vectorizer = HashingTfidf.load(os.path.join(path, "hashing"), mmap=mmap)
+    else:
+        with open(os.path.join(path, "vectorizer.pkl"), "rb") as f:
+            vectorizer = pickle.load(f)
+    vectors = load_sparse(path, "vectors", mmap=mmap)
+    with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    return vectorizer, vectors, meta["baseline_oov"], meta.get("report", {})
+
+
+def _refresh_vectors(vectorizer, old_vectors, old: CatalogStore, new: CatalogStore,
+                     key_col: str, baseline_oov: float, drift_threshold: float = None,
+                     prune_mass: float = None):
+    """
+    Reconstruye la matriz de vectores para `new` reutilizando las filas sin
+    cambios de old_vectors y transformando solo las nuevas o cambiadas (podadas
+    con `prune_mass`, ver _index_matrix).
+    Retorna (matriz, resumen), o (None, resumen) si se requiere un ajuste completo.
+    """
+    if drift_threshold is None:
+        drift_threshold = VOCAB_DRIFT_THRESHOLD
+
+    diff = diff_catalog(old, new, key_col)
+    delta_rows = np.concatenate([diff["added"], diff["changed_new"]])
+    delta_texts = new.texts("combined_text", delta_rows.tolist())
+    drift = max(0.0, _oov_rate(vectorizer, delta_texts) - baseline_oov)
+
+    summary = {
+        "added": len(diff["added"]),
+        "removed": len(diff["removed"]),
+        "changed": len(diff["changed_new"]),
+        "unchanged": len(diff["unchanged_new"]),
+        "drift": round(drift, 4),
+        "full_refit": drift > drift_threshold,
+    }
+    if summary["full_refit"]:
+        return None, summary
+
+    delta = _index_matrix(vectorizer.transform(delta_texts), prune_mass) if len(delta_rows) else None
+    return _merge_rows(old_vectors, delta, diff, len(new)), summary
+
+
+def _merge_rows(old_matrix, delta, diff: dict, n_rows: int) -> sp.csr_matrix:
+    """
+    Matriz de la nueva versión del catálogo: las filas sin cambios se toman de
+    old_matrix y las nuevas o cambiadas (added + changed_new, en ese orden) de delta.
+    """
+    delta_rows = np.concatenate([diff["added"], diff["changed_new"]])
+    # Filas de la matriz apilada [viejas; delta] que corresponden a cada fila nueva
+    source_rows = np.empty(n_rows, dtype=np.int64)
+    source_rows[diff["unchanged_new"]] = diff["unchanged_old"]
+    source_rows[delta_rows] = old_matrix.shape[0] + np.arange(len(delta_rows))
+
+    if delta is not None and delta.shape[0]:
+        stacked = sp.vstack([old_matrix, delta]).tocsr()
+    else:
+        stacked = old_matrix.tocsr()
+    return stacked[source_rows]
+
+
+def _oov_rate(vectorizer, texts: list[str]) -> float:
+    """Fracción de términos (tras el analizador) que no están en el vocabulario ajustado."""
+    analyze = vectorizer.build_analyzer()
+    vocabulary = vectorizer.vocabulary_
+    total = missing = 0
+    for text in texts:
+        terms = analyze(text)
+        total += len(terms)
+        missing += sum(1 for term in terms if term not in vocabulary)
+    return missing / total if total else 0.0
+
+
+def _sample(texts: list[str], size: int = None) -> list[str]:
+    """Muestra sistemática de textos para estimar la tasa base fuera de vocabulario."""
+    if size is None:
+        size = DRIFT_SAMPLE_SIZE
+    step = max(1, len(texts) // size)
+    return texts[::step]
+
 
 def _generate_justification(doc_text: str, course_row, score: float) -> str:
     """Genera justificación de por qué este curso es relevante."""
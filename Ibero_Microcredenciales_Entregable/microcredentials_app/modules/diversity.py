@@ -0,0 +1,66 @@
+"""Re-ranking por diversidad (Maximal Marginal Relevance) de los resultados de cursos.
+
+Sobre los mejores MMR_CANDIDATES candidatos por relevancia se calcula su
+similitud par a par en una sola matriz de Gram de sus vectores TF-IDF (ya
+normalizados) y se eligen los resultados uno a uno
+maximizando
+
+    λ · relevancia − (1 − λ) · similitud máxima con los ya elegidos
+
+Con λ = 1 el orden es el de relevancia. Opcionalmente se limita cuántos
+resultados puede aportar un mismo partner o subdominio; si las cuotas dejan
+sin candidatos antes de completar el top-N, el resto se completa sin cuotas.
+"""
+import numpy as np
+
+
+# Con pocos términos distintos entre los candidatos, compactar a una matriz densa
+# sobre esos términos y multiplicar con BLAS es más rápido que el producto disperso
+_DENSE_GRAM_TERMS = 2048
+
+
+def gram_matrix(vectors) -> np.ndarray:
+    """Similitud coseno par a par (densa) de las filas de una matriz CSR normalizada."""
+    terms, columns = np.unique(vectors.indices, return_inverse=True)
+    if len(terms) > _DENSE_GRAM_TERMS:
+        return np.asarray((vectors @ vectors.T).toarray(), dtype=np.float64)
+    dense = np.zeros((vectors.shape[0], len(terms)), dtype=np.float32)
+    dense[np.repeat(np.arange(vectors.shape[0]), np.diff(vectors.indptr)), columns] = vectors.data
+    return (dense @ dense.T).astype(np.float64)
+
+
+def mmr_rerank(relevance: np.ndarray, gram: np.ndarray, k: int, mmr_lambda: float,
+               quotas: list = ()) -> np.ndarray:
+    """
+    Posiciones (sobre `relevance`) de los k resultados elegidos, en orden de
+    selección. `relevance` debe venir ordenada de mayor a menor: en empate
+    gana el candidato más relevante. `quotas` es una lista de
+    (etiquetas por candidato, máximo por etiqueta); la etiqueta "" no cuenta.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    relevance = np.asarray(relevance, dtype=np.float64)
+    redundancy = np.zeros(n)
+    taken = np.zeros(n, dtype=bool)
+    blocked = np.zeros(n, dtype=bool)
+    counts = [{} for _ in quotas]
+    labels = [np.asarray(values, dtype=object) for values, _ in quotas]
+    selected = []
+    while len(selected) < k:
+        gain = mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy
+        allowed = ~taken & ~blocked
+        if not allowed.any():
+            allowed = ~taken
+        gain[~allowed] = -np.inf
+        j = int(np.argmax(gain))
+        selected.append(j)
+        taken[j] = True
+        np.maximum(redundancy, gram[j], out=redundancy)
+        for (_, quota), values, seen in zip(quotas, labels, counts):
+            label = values[j]
+            if not quota or not label:
+                continue
+            seen[label] = seen.get(label, 0) + 1
+            if seen[label] >= quota:
+                blocked |= values == label
+    return np.array(selected, dtype=np.int64)
@@ -1,38 +1,93 @@
-"""Módulo para extraer texto de documentos subidos (TXT, PDF, DOCX)."""
+"""Módulo para extraer texto de documentos subidos (TXT, PDF, DOCX).
+
+Todos los formatos pasan por iter_pages(), que entrega el texto página por
+página (TXT y DOCX son una sola página) y corta al agotar el presupuesto de
+lectura (DOC_MAX_PAGES / DOC_MAX_CHARS): para el matching basta con las
+primeras cientos de páginas de un documento largo. Los PDF con muchas páginas
+se extraen por rangos en un pool de procesos, y el tiempo de cada página queda
+registrado si se pasa una lista `timings`.
+"""
 import re
 import io
-
-
-def extract_text(uploaded_file) -> str:
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from config import (
+    DOC_MAX_PAGES, DOC_MAX_CHARS, PDF_PARALLEL_MIN_PAGES, PDF_PAGES_PER_TASK, PDF_WORKERS,
+)
+
+# Estado de cada proceso del pool de extracción de PDF (el documento abierto)
+_WORKER = {}
+
+# Etiquetas de WordprocessingML usadas por _extract_docx()
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_TBL, _W_T = f"{_W_NS}p", f"{_W_NS}tbl", f"{_W_NS}t"
+_W_TAB, _W_BR, _W_CR = f"{_W_NS}tab", f"{_W_NS}br", f"{_W_NS}cr"
+# Texto de los elementos de un run que no son w:t (como Paragraph.text de python-docx)
+_DOCX_RUN_TEXT = {_W_TAB: "\t", _W_BR: "\n", _W_CR: "\n"}
+
+
+def extract_text(uploaded_file, max_pages: int = None, max_chars: int = None,
+                 timings: list = None) -> str:
     """Extrae texto de un archivo subido (UploadedFile de Streamlit)."""
-    filename = uploaded_file.name.lower()
     raw_bytes = uploaded_file.read()
     uploaded_file.seek(0)
-
-    if filename.endswith(".txt"):
-        return _extract_txt(raw_bytes)
-    elif filename.endswith(".pdf"):
-        return _extract_pdf(raw_bytes)
-    elif filename.endswith(".docx"):
-        return _extract_docx(raw_bytes)
-    else:
-        raise ValueError(f"Formato no soportado: {filename}. Use TXT, PDF o DOCX.")
+    return _join_pages(iter_pages(uploaded_file.name, raw_bytes, max_pages, max_chars,
+                                  timings=timings))
 
 
-def extract_text_from_path(file_path: str) -> str:
+def extract_text_from_path(file_path: str, max_pages: int = None, max_chars: int = None,
+                           timings: list = None) -> str:
     """Extrae texto de un archivo por ruta (para testing)."""
-    path_lower = file_path.lower()
     with open(file_path, "rb") as f:
         raw_bytes = f.read()
-
-    if path_lower.endswith(".txt"):
-        return _extract_txt(raw_bytes)
-    elif path_lower.endswith(".pdf"):
-        return _extract_pdf(raw_bytes)
-    elif path_lower.endswith(".docx"):
-        return _extract_docx(raw_bytes)
+    return _join_pages(iter_pages(file_path, raw_bytes, max_pages, max_chars,
+                                  timings=timings))
+
+
+def iter_pages(filename: str, raw_bytes: bytes, max_pages: int = None, max_chars: int = None,
+               workers: int = None, timings: list = None):
+    """
+    Texto de cada página con contenido, en orden. `max_pages` / `max_chars`
+    (DOC_MAX_PAGES / DOC_MAX_CHARS por defecto; 0 = sin límite) detienen la
+    lectura: la página que alcanza max_chars se entrega completa. En
+    `timings` se agrega {"page", "seconds", "chars"} por página leída.
+    """
+    max_pages = DOC_MAX_PAGES if max_pages is None else max_pages
+    max_chars = DOC_MAX_CHARS if max_chars is None else max_chars
+    name = filename.lower()
+    if name.endswith(".txt"):
+        pages = _single_page(_extract_txt, raw_bytes)
+    elif name.endswith(".pdf"):
+        pages = _pdf_pages(raw_bytes, max_pages, workers)
+    elif name.endswith(".docx"):
+        pages = _single_page(_extract_docx, raw_bytes)
     else:
-        raise ValueError(f"Formato no soportado: {file_path}")
+        raise ValueError(f"Formato no soportado: {filename}. Use TXT, PDF o DOCX.")
+
+    total = 0
+    try:
+        for number, text, seconds in pages:
+            if timings is not None:
+                timings.append({"page": number + 1, "seconds": round(seconds, 4), "chars": len(text)})
+            if text:
+                yield text
+                total += len(text)
+            if (max_pages and number + 1 >= max_pages) or (max_chars and total >= max_chars):
+                break
+    finally:
+        pages.close()
+
+
+def _join_pages(pages) -> str:
+    return _clean_text("\n".join(pages))
+
+
+def _single_page(extract, raw_bytes: bytes):
+    t0 = time.perf_counter()
+    text = extract(raw_bytes)
+    yield 0, text, time.perf_counter() - t0
 
 
 def _extract_txt(raw_bytes: bytes) -> str:
@@ -45,34 +100,80 @@ def _extract_txt(raw_bytes: bytes) -> str:
     return raw_bytes.decode("utf-8", errors="replace")
 
 
-def _extract_pdf(raw_bytes: bytes) -> str:
+def _pdf_pages(raw_bytes: bytes, max_pages: int, workers: int = None):
+    """(número de página, texto, segundos) de cada página, en orden."""
     import pdfplumber
-    pages_text = []
+    if workers is None:
+        workers = PDF_WORKERS or os.cpu_count() or 1
     with pdfplumber.open(io.BytesIO(raw_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                pages_text.append(text)
-    return _clean_text("\n".join(pages_text))
+        n_pages = len(pdf.pages)
+        if max_pages:
+            n_pages = min(n_pages, max_pages)
+        if workers <= 1 or n_pages < PDF_PARALLEL_MIN_PAGES:
+            yield from _page_texts(pdf, range(n_pages))
+            return
+
+    ranges = [range(start, min(start + PDF_PAGES_PER_TASK, n_pages))
+              for start in range(0, n_pages, PDF_PAGES_PER_TASK)]
+    workers = min(workers, len(ranges))
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker,
+                               initargs=(raw_bytes,))
+    # A lo sumo `workers` rangos en curso: al cortar por presupuesto no queda
+    # trabajo encolado y el hilo de la app no espera a los procesos
+    pending = deque()
+    try:
+        for numbers in ranges:
+            pending.append(pool.submit(_pdf_worker_pages, numbers))
+            if len(pending) >= workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _page_texts(pdf, numbers):
+    for number in numbers:
+        t0 = time.perf_counter()
+        page = pdf.pages[number]
+        text = page.extract_text() or ""
+        # Libera los objetos ya analizados de la página (la memoria no crece con el PDF)
+        page.close()
+        yield number, text, time.perf_counter() - t0
+
+
+def _init_pdf_worker(raw_bytes: bytes):
+    import pdfplumber
+    _WORKER["pdf"] = pdfplumber.open(io.BytesIO(raw_bytes))
+
+
+def _pdf_worker_pages(numbers: range) -> list:
+    return list(_page_texts(_WORKER["pdf"], numbers))
 
 
 def _extract_docx(raw_bytes: bytes) -> str:
-    from docx import Document
-    doc = Document(io.BytesIO(raw_bytes))
-    full_text = []
+    """
+    Texto de word/document.xml leído en streaming (iterparse): párrafos del
+    cuerpo y de las celdas de tabla en el orden del documento. Una celda
+    combinada (gridSpan / vMerge) aparece una sola vez en el XML, así que su
+    texto no se repite. Cada elemento se libera al procesarlo.
+    """
+    import zipfile
+    from lxml import etree
 
-    # 1. Extraer texto de párrafos
-    for para in doc.paragraphs:
-        if para.text.strip():
-            full_text.append(para.text)
-
-    # 2. Extraer texto de tablas
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    if paragraph.text.strip():
-                        full_text.append(paragraph.text)
+    full_text = []
+    with zipfile.ZipFile(io.BytesIO(raw_bytes)) as package:
+        with package.open("word/document.xml") as xml:
+            for _, elem in etree.iterparse(xml, events=("end",), tag=(_W_P, _W_TBL)):
+                if elem.tag == _W_P:
+                    # Los párrafos anidados (cuadros de texto) ya se emitieron y limpiaron
+                    text = "".join(_DOCX_RUN_TEXT.get(node.tag, node.text or "")
+                                   for node in elem.iter(_W_T, _W_TAB, _W_BR, _W_CR))
+                    if text.strip():
+                        full_text.append(text)
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
 
     return _clean_text("\n".join(full_text))
 
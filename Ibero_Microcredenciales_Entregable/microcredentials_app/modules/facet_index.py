@@ -0,0 +1,132 @@
+"""Índice de facetas: bitsets empaquetados por valor para filtrar el catálogo.
+
+Para cada faceta categórica (idioma, nivel, dominio, subdominio) se guarda un
+bitset por valor (np.packbits, 1 bit por fila). Para las facetas numéricas
+(rating mínimo, horas máximas) se precalculan los bitsets de los cortes más
+usados (RATING_FACET_STEPS, HOURS_FACET_STEPS); otros cortes se calculan al
+vuelo. Un filtro combina con OR los valores elegidos de una faceta y con AND
+las distintas facetas, operando sobre n/8 bytes en lugar de n filas.
+
+Una faceta puede además tomar valores de una columna de variantes (p. ej. los
+idiomas o la menor duración de los cursos casi duplicados agrupados en una
+fila): la fila pasa el filtro si su propio valor o el de alguna variante lo cumple.
+Con varias facetas el resultado es un superconjunto, porque cada faceta puede
+cumplirla una variante distinta; quien necesite que una misma variante cumpla
+todos los filtros lo verifica sobre esas filas (ver CourseraMatcher).
+"""
+import numpy as np
+import pandas as pd
+from modules.catalog_store import CatalogStore, encode_categories
+from modules.near_duplicates import VARIANT_SEPARATOR
+
+
+class FacetIndex:
+    def __init__(self, store: CatalogStore, facets: dict, ranges: dict = None,
+                 variants: dict = None):
+        """
+        `facets`: {clave_filtro: columna categórica}.
+        `variants`: {clave_filtro: columna de variantes}; para una faceta
+        categórica, texto con valores adicionales separados por
+        VARIANT_SEPARATOR; para una numérica, el valor más favorable del grupo
+        (el menor para "max", el mayor para "min").
+        `ranges`: {clave_filtro: (columna numérica, "min" o "max", cortes precalculados)};
+        "min" filtra valor >= corte y "max" valor <= corte. Los valores
+        desconocidos (NaN) nunca pasan un filtro numérico.
+        """
+        self.n_rows = len(store)
+        self._values = {}
+        self._bitsets = {}
+        for key, col in facets.items():
+            if col not in store:
+                continue
+            if store.is_categorical(col):
+                codes, categories = store.codes(col), store.categories(col)
+            else:
+                codes, categories = encode_categories(store[col])
+                codes = np.asarray(codes)
+            bitsets = {}
+            for code, value in enumerate(categories):
+                value = str(value)
+                if value:
+                    bitsets[value] = np.packbits(codes == code)
+            if variants and variants.get(key) in store:
+                self._add_variants(bitsets, store.texts(variants[key]))
+            self._bitsets[key] = bitsets
+            self._values[key] = sorted(bitsets)
+
+        self._ranges = {}
+        for key, (col, op, steps) in (ranges or {}).items():
+            if col in store:
+                values = pd.to_numeric(store[col], errors="coerce").to_numpy(dtype=float)
+            else:
+                values = np.full(self.n_rows, np.nan)
+            if variants and variants.get(key) in store:
+                extra = pd.to_numeric(store[variants[key]], errors="coerce").to_numpy(dtype=float)
+                values = np.fmin(values, extra) if op == "max" else np.fmax(values, extra)
+            self._ranges[key] = (values, op, {float(step): self._pack_range(values, op, step)
+                                              for step in steps})
+
+    def _add_variants(self, bitsets: dict, texts: list[str]):
+        rows = {}
+        for i, text in enumerate(texts):
+            if text:
+                for value in text.split(VARIANT_SEPARATOR):
+                    rows.setdefault(value, []).append(i)
+        for value, value_rows in rows.items():
+            flags = np.zeros(self.n_rows, dtype=bool)
+            flags[value_rows] = True
+            bits = np.packbits(flags)
+            bitsets[value] = bits if value not in bitsets else bitsets[value] | bits
+
+    @staticmethod
+    def _pack_range(values: np.ndarray, op: str, bound: float) -> np.ndarray:
+        return np.packbits(values >= bound if op == "min" else values <= bound)
+
+    @property
+    def keys(self) -> list[str]:
+        return list(self._bitsets) + list(self._ranges)
+
+    @property
+    def nbytes(self) -> int:
+        total = sum(b.nbytes for bitsets in self._bitsets.values() for b in bitsets.values())
+        total += sum(b.nbytes for _, _, steps in self._ranges.values() for b in steps.values())
+        return total
+
+    def values(self, key: str) -> list[str]:
+        """Valores disponibles de una faceta categórica (para la interfaz)."""
+        return list(self._values.get(key, []))
+
+    def bitset(self, **filters):
+        """
+        Bitset empaquetado de las filas que cumplen todos los filtros, o None
+        si no hay filtros activos. Las facetas categóricas reciben una lista de
+        valores (OR); las numéricas, un número. None o lista vacía = sin filtro.
+        """
+        combined = None
+        for key, selected in filters.items():
+            if selected is None or (isinstance(selected, (list, tuple, set)) and not selected):
+                continue
+            if key in self._bitsets:
+                if isinstance(selected, str):
+                    selected = [selected]
+                bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+                for value in selected:
+                    value_bits = self._bitsets[key].get(str(value))
+                    if value_bits is not None:
+                        bits |= value_bits
+            elif key in self._ranges:
+                values, op, steps = self._ranges[key]
+                bits = steps.get(float(selected))
+                if bits is None:
+                    bits = self._pack_range(values, op, float(selected))
+            else:
+                raise TypeError(f"Filtro desconocido: {key}")
+            combined = bits.copy() if combined is None else combined & bits
+        return combined
+
+    def mask(self, **filters):
+        """Como bitset(), pero como máscara booleana de n filas (o None sin filtros)."""
+        bits = self.bitset(**filters)
+        if bits is None:
+            return None
+        return np.unpackbits(bits, count=self.n_rows).astype(bool)
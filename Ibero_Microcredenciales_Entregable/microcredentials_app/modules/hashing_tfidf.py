@@ -0,0 +1,147 @@
+"""Vectorizador TF-IDF sin vocabulario: HashingVectorizer + frecuencias de documento.
+
+Cada n-grama (mismo analizador que el TfidfVectorizer del matcher: minúsculas,
+stop words, unigramas y bigramas) va a la columna hash(n-grama) mod
+HASHING_FEATURES, así que transformar una consulta no consulta ningún
+diccionario y el modelo completo son dos arreglos planos:
+
+  - df: en cuántos cursos aparece cada columna (int64)
+  - idf: log((1 + n) / (1 + df)) + 1, el IDF suavizado de scikit-learn, en 0
+    para las columnas fuera de [min_df, max_df] (igual que el vocabulario
+    que TfidfVectorizer descarta)
+
+Ambos se guardan como .npy y se abren con mmap. La vectorización se separa en
+dos pasos: counts() (tf sublineal, sin estado) y weight() (× idf y norma L2).
+Guardando la matriz de counts del catálogo, agregar o quitar cursos solo suma
+o resta sus filas en df (partial_fit() / forget()) y la matriz ponderada se
+recalcula con weight() sin volver a leer ningún texto.
+"""
+import json
+import os
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+from config import HASHING_FEATURES
+
+
+class HashingTfidf:
+    def __init__(self, n_features: int = None, stop_words: list = None,
+                 ngram_range: tuple = (1, 2), lowercase: bool = True,
+                 min_df: int = 1, max_df: float = 1.0):
+        self.n_features = n_features or HASHING_FEATURES
+        self.stop_words = stop_words
+        self.ngram_range = tuple(ngram_range)
+        self.lowercase = lowercase
+        self.min_df = min_df
+        self.max_df = max_df
+        self.df = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs = 0
+        self._idf = None
+        self._hasher = HashingVectorizer(
+            n_features=self.n_features, stop_words=stop_words, ngram_range=self.ngram_range,
+            lowercase=lowercase, alternate_sign=False, norm=None,
+        )
+
+    # === Interfaz compatible con TfidfVectorizer ===
+    def fit_transform(self, texts: list[str]) -> sp.csr_matrix:
+        counts = self.counts(texts)
+        self.fit_counts(counts)
+        return self.weight(counts)
+
+    def transform(self, texts: list[str]) -> sp.csr_matrix:
+        return self.weight(self.counts(texts))
+
+    def build_analyzer(self):
+        return self._hasher.build_analyzer()
+
+    @property
+    def idf_(self) -> np.ndarray:
+        if self._idf is None:
+            idf = np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0
+            idf[(self.df < self.min_df) | (self.df > self.max_df * self.n_docs)] = 0.0
+            self._idf = idf
+        return self._idf
+
+    @property
+    def vocabulary_(self) -> "HashedVocabulary":
+        return HashedVocabulary(self)
+
+    # === Vectorización en dos pasos ===
+    def counts(self, texts: list[str]) -> sp.csr_matrix:
+        """tf sublineal (1 + log tf) por columna, sin IDF ni normalizar (CSR float32)."""
+        counts = sp.csr_matrix(self._hasher.transform(texts), dtype=np.float32)
+        counts.data = 1.0 + np.log(counts.data)
+        counts.sort_indices()
+        return counts
+
+    def weight(self, counts) -> sp.csr_matrix:
+        """counts × idf, sin las columnas descartadas y con norma L2 = 1 por fila."""
+        weights = sp.csr_matrix(counts, dtype=np.float64, copy=True)
+        weights.data *= self.idf_[weights.indices]
+        weights.eliminate_zeros()
+        return normalize(weights, copy=False)
+
+    # === Frecuencias de documento ===
+    def fit_counts(self, counts):
+        self.df = _document_frequency(counts, self.n_features)
+        self.n_docs = counts.shape[0]
+        self._idf = None
+
+    def partial_fit(self, counts):
+        """Suma documentos nuevos (filas de counts()) a las frecuencias de documento."""
+        self.df = self.df + _document_frequency(counts, self.n_features)
+        self.n_docs += counts.shape[0]
+        self._idf = None
+
+    def forget(self, counts):
+        """Resta documentos que ya no están en el catálogo (sus filas de counts())."""
+        self.df = np.maximum(self.df - _document_frequency(counts, self.n_features), 0)
+        self.n_docs = max(0, self.n_docs - counts.shape[0])
+        self._idf = None
+
+    def feature_index(self, term: str) -> int:
+        """Columna de un n-grama ya analizado (la misma que le asigna HashingVectorizer)."""
+        return abs(murmurhash3_32(term, seed=0)) % self.n_features
+
+    # === Persistencia ===
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "df.npy"), self.df)
+        np.save(os.path.join(path, "idf.npy"), self.idf_)
+        with open(os.path.join(path, "hashing.json"), "w", encoding="utf-8") as f:
+            json.dump({"n_features": self.n_features, "n_docs": self.n_docs,
+                       "stop_words": self.stop_words, "ngram_range": list(self.ngram_range),
+                       "lowercase": self.lowercase, "min_df": self.min_df,
+                       "max_df": self.max_df}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "HashingTfidf":
+        with open(os.path.join(path, "hashing.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        vectorizer = cls(meta["n_features"], meta["stop_words"], meta["ngram_range"],
+                         meta["lowercase"], meta["min_df"], meta["max_df"])
+        mmap_mode = "r" if mmap else None
+        vectorizer.df = np.load(os.path.join(path, "df.npy"), mmap_mode=mmap_mode)
+        vectorizer._idf = np.load(os.path.join(path, "idf.npy"), mmap_mode=mmap_mode)
+        vectorizer.n_docs = meta["n_docs"]
+        return vectorizer
+
+
+class HashedVocabulary:
+    """Vista tipo dict {n-grama: columna} sobre las columnas con IDF (vistas y no descartadas)."""
+
+    def __init__(self, vectorizer: HashingTfidf):
+        self._vectorizer = vectorizer
+
+    def get(self, term: str, default=None):
+        j = self._vectorizer.feature_index(term)
+        return j if self._vectorizer.idf_[j] > 0 else default
+
+    def __contains__(self, term: str) -> bool:
+        return self.get(term) is not None
+
+
+def _document_frequency(counts, n_features: int) -> np.ndarray:
+    return np.bincount(sp.csr_matrix(counts).indices, minlength=n_features).astype(np.int64)
@@ -0,0 +1,93 @@
+"""Índice invertido con poda MaxScore para el top-k exacto de similitud coseno.
+
+Cada término del vocabulario tiene su lista de postings (cursos en orden
+ascendente y su peso TF-IDF) y una cota superior: el mayor peso de la lista.
+Para un documento consulta, la contribución máxima de un término es
+peso_consulta × cota. Los términos se recorren de mayor a menor contribución
+máxima acumulando scores parciales (término a término):
+
+  - Mientras la suma de las cotas de los términos restantes pueda superar el
+    k-ésimo mejor score parcial (o el umbral), cualquier curso puede entrar al
+    top-k y las listas se recorren completas.
+  - Cuando ya no puede, los cursos no vistos quedan descartados: las listas
+    restantes solo se consultan (búsqueda binaria) para los candidatos vivos,
+    y se descartan los candidatos cuyo score parcial más las cotas restantes
+    no alcanza el k-ésimo.
+
+Los candidatos finales se puntúan con la misma fórmula que la búsqueda por
+fuerza bruta, de modo que el resultado es idéntico.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+# Holgura para que el redondeo (pesos float32) nunca descarte un curso del top-k
+_BOUND_EPS = 1e-5
+
+
+class InvertedIndex:
+    def __init__(self, vectors):
+        """`vectors` es la matriz documentos × términos (filas con norma L2 = 1)."""
+        postings = sp.csc_matrix(vectors)
+        postings.sort_indices()
+        self.n_docs, self.n_terms = postings.shape
+        self._indptr = postings.indptr
+        self._docs = postings.indices
+        self._weights = postings.data
+        self._upper = np.zeros(self.n_terms)
+        lengths = np.diff(self._indptr)
+        nonempty = lengths > 0
+        self._upper[nonempty] = np.maximum.reduceat(self._weights, self._indptr[:-1][nonempty])
+
+    @property
+    def nbytes(self) -> int:
+        return self._indptr.nbytes + self._docs.nbytes + self._weights.nbytes + self._upper.nbytes
+
+    def candidates(self, query, k: int, threshold: float, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Cursos (en orden ascendente) que pueden estar en el top-k de `query`
+        (vector fila disperso) con score >= threshold. Requiere threshold > 0:
+        los cursos sin términos en común con la consulta nunca son candidatos.
+        """
+        query = sp.csr_matrix(query)
+        terms, q_weights = query.indices, query.data
+        contributions = q_weights * self._upper[terms]
+        order = np.argsort(-contributions, kind="stable")
+        terms, q_weights, contributions = terms[order], q_weights[order], contributions[order]
+        remaining = np.concatenate([np.cumsum(contributions[::-1])[::-1][1:], [0.0]])
+
+        scores = np.zeros(self.n_docs)
+        theta = threshold
+        pos = 0
+        # Fase 1: listas completas mientras un curso no visto aún pueda entrar
+        while pos < len(terms):
+            start, end = self._indptr[terms[pos]], self._indptr[terms[pos] + 1]
+            docs = self._docs[start:end]
+            scores[docs] += q_weights[pos] * self._weights[start:end]
+            theta = max(theta, _kth_largest(scores[docs] if mask is None
+                                            else scores[docs[mask[docs]]], k))
+            pos += 1
+            if remaining[pos - 1] < theta - _BOUND_EPS:
+                break
+
+        alive = np.flatnonzero(scores)
+        if mask is not None:
+            alive = alive[mask[alive]]
+        # Fase 2: solo se completan los scores de los candidatos vivos
+        while pos < len(terms) and len(alive):
+            alive = alive[scores[alive] + remaining[pos - 1] >= theta - _BOUND_EPS]
+            start, end = self._indptr[terms[pos]], self._indptr[terms[pos] + 1]
+            docs = self._docs[start:end]
+            found = np.searchsorted(docs, alive)
+            hit = found < len(docs)
+            hit[hit] = docs[found[hit]] == alive[hit]
+            scores[alive[hit]] += q_weights[pos] * self._weights[start + found[hit]]
+            theta = max(theta, _kth_largest(scores[alive], k))
+            pos += 1
+
+        return alive[scores[alive] >= theta - _BOUND_EPS]
+
+
+def _kth_largest(values: np.ndarray, k: int) -> float:
+    if len(values) < k:
+        return -np.inf
+    return np.partition(values, len(values) - k)[len(values) - k]
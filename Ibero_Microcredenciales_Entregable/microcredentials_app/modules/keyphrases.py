@@ -0,0 +1,150 @@
+"""Conteo de frases candidatas en una sola pasada (estilo RAKE/YAKE).
+
+El texto se tokeniza una vez (mismo token_pattern que la tabla IDF), por
+lotes de a lo sumo ~1 MB, y los n-gramas de cada lote se cuentan con NumPy
+como enteros; solo los n-gramas distintos se convierten a texto:
+
+  - La puntuación corta la frase en curso.
+  - Una frase candidata tiene de 1 a 3 palabras de contenido; empieza y
+    termina en una palabra que no es stop word, y entre ellas admite hasta
+    KEYPHRASE_MAX_GAP stop words ("toma de decisiones").
+  - Cada candidata se cuenta por su clave (palabras de contenido separadas
+    por espacio, la misma clave de la tabla IDF) y se recuerda la primera
+    forma en que apareció en el texto.
+
+El diccionario de conteos está acotado a KEYPHRASE_MAX_CANDIDATES claves:
+al superarlo se conservan solo las más frecuentes (poda con pérdida, como en
+Space-Saving), así la memoria no depende del largo del documento.
+
+La deduplicación por raíz usa un stemmer ligero de español (sufijos de plural
+y derivación más comunes), memoizado por palabra.
+"""
+import heapq
+import itertools
+import re
+from functools import lru_cache
+import numpy as np
+from config import SPANISH_STOP_WORDS, KEYPHRASE_MAX_GAP, KEYPHRASE_MAX_CANDIDATES
+
+MAX_WORDS = 3
+# Caracteres por lote vectorizado (los fragmentos se juntan hasta este tamaño)
+_BATCH_CHARS = 1 << 20
+_CONTENT, _STOP, _BREAK = 0, 1, 2
+_STOP_WORDS = frozenset(SPANISH_STOP_WORDS)
+# Palabras (como COMPETENCY_TOKEN_PATTERN) o un signo que corta la frase
+_TOKEN_RE = re.compile(r"(?u)\b[a-záéíóúñü][a-záéíóúñü]+\b|[.,;:!?¡¿()\[\]{}\"“”|•\n]")
+
+# Sufijos (ya sin acentos) que se quitan al calcular la raíz, del más largo al más corto
+_SUFFIXES = (
+    "amientos", "imientos", "aciones", "uciones", "amiento", "imiento",
+    "idades", "acion", "ucion", "mente", "ancia", "encia", "istas", "ismos",
+    "ables", "ibles", "adora", "ador", "idad", "ista", "ismo", "able", "ible",
+    "ivas", "ivos", "iva", "ivo", "ces", "es", "as", "os", "a", "o", "e", "s",
+)
+_ACCENTS = str.maketrans("áéíóú", "aeiou")
+
+
+class PhraseCounts:
+    """Conteo acotado de frases candidatas: {clave: frecuencia} y su forma original."""
+
+    def __init__(self, max_candidates: int = None):
+        self.max_candidates = max_candidates or KEYPHRASE_MAX_CANDIDATES
+        self.counts = {}
+        self.surface = {}
+
+    def add(self, key: str, count: int, surface):
+        """Suma `count` a la frase; `surface()` da su forma original si es nueva."""
+        current = self.counts.get(key)
+        if current is not None:
+            self.counts[key] = current + count
+            return
+        self.counts[key] = count
+        self.surface[key] = surface()
+        if len(self.counts) > self.max_candidates:
+            self.prune()
+
+    def prune(self):
+        """Conserva la mitad más frecuente de las candidatas."""
+        keep = heapq.nlargest(self.max_candidates // 2, self.counts.items(),
+                              key=lambda item: item[1])
+        self.counts = dict(keep)
+        self.surface = {key: self.surface[key] for key in self.counts}
+
+
+def count_phrases(chunks, max_gap: int = None, max_candidates: int = None) -> PhraseCounts:
+    """
+    Cuenta las frases candidatas de `chunks` (un texto o un iterable de
+    textos, p. ej. páginas; una frase no cruza de un fragmento al siguiente).
+    """
+    max_gap = KEYPHRASE_MAX_GAP if max_gap is None else max_gap
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    phrases = PhraseCounts(max_candidates)
+    vocabulary = _Vocabulary()
+    batch, size = [], 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= _BATCH_CHARS:
+            _count_batch("\n".join(batch), phrases, vocabulary, max_gap)
+            batch, size = [], 0
+    if batch:
+        _count_batch("\n".join(batch), phrases, vocabulary, max_gap)
+    return phrases
+
+
+class _Vocabulary:
+    """Ids de los tokens vistos y su tipo (palabra de contenido, stop word o corte)."""
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+        self.kinds = []
+
+    def encode(self, tokens: list) -> np.ndarray:
+        ids = np.fromiter((self.ids.setdefault(t, len(self.ids)) for t in tokens),
+                          dtype=np.int64, count=len(tokens))
+        for token in itertools.islice(self.ids, len(self.words), None):
+            self.words.append(token)
+            self.kinds.append(_BREAK if len(token) == 1
+                              else _STOP if token in _STOP_WORDS else _CONTENT)
+        return ids
+
+
+def _count_batch(text: str, phrases: PhraseCounts, vocabulary: _Vocabulary, max_gap: int):
+    tokens = _TOKEN_RE.findall(text.lower())
+    ids = vocabulary.encode(tokens)
+    kinds = np.asarray(vocabulary.kinds, dtype=np.int8)[ids]
+    # Posiciones de las palabras de contenido y si cada una se une con la siguiente:
+    # sin cortes entre ambas y con a lo sumo max_gap stop words en medio
+    content = np.flatnonzero(kinds == _CONTENT)
+    if not len(content):
+        return
+    breaks = np.cumsum(kinds == _BREAK)
+    linked = (np.diff(content) - 1 <= max_gap) & (breaks[content[1:]] == breaks[content[:-1]])
+    words, codes = np.unique(ids[content], return_inverse=True)
+    starts = np.arange(len(content))
+    for n in range(1, MAX_WORDS + 1):
+        if n > 1:
+            starts = starts[starts + n - 1 < len(content)]
+            starts = starts[linked[starts + n - 2]]
+        if not len(starts):
+            break
+        # Cada n-grama como un entero (códigos densos del lote: len(words)^3 cabe en int64)
+        grams = codes[starts]
+        for k in range(1, n):
+            grams = grams * len(words) + codes[starts + k]
+        _, firsts, counts = np.unique(grams, return_index=True, return_counts=True)
+        for first, count in zip(starts[firsts].tolist(), counts.tolist()):
+            key = " ".join(vocabulary.words[i] for i in ids[content[first:first + n]].tolist())
+            phrases.add(key, count, lambda: " ".join(tokens[content[first]:content[first + n - 1] + 1]))
+
+
+@lru_cache(maxsize=65536)
+def spanish_stem(word: str) -> str:
+    """Raíz aproximada de una palabra en español (sin acentos ni sufijos comunes)."""
+    stem = word.translate(_ACCENTS)
+    for suffix in _SUFFIXES:
+        if stem.endswith(suffix) and len(stem) - len(suffix) >= 3:
+            return stem[:-len(suffix)]
+    return stem
@@ -0,0 +1,60 @@
+"""Grafo de k vecinos más cercanos entre cursos, precalculado al compilar el índice.
+
+El grafo se calcula por bloques de KNN_BLOCK_ROWS cursos: cada bloque se
+multiplica contra toda la matriz de cursos (producto disperso, que libera el
+GIL) y de cada fila se guardan sus k cursos más similares, sin contarse a sí
+mismo. Los bloques se reparten entre hilos (KNN_WORKERS).
+
+El resultado es una matriz CSR cursos × cursos cuya fila i tiene los vecinos
+del curso i ordenados por similitud descendente: `indices` son los vecinos y
+`data` sus scores. Se guarda con save_sparse() junto al índice y se abre con
+mmap, de modo que consultar los vecinos de un curso es leer k posiciones.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.sparse as sp
+from config import KNN_NEIGHBORS, KNN_BLOCK_ROWS, KNN_WORKERS
+
+
+def build_knn_graph(vectors, k: int = None, block_rows: int = None,
+                    workers: int = None) -> sp.csr_matrix:
+    """Grafo kNN (CSR n × n) de las filas de `vectors` (normalizadas, similitud = producto punto)."""
+    from modules.coursera_matcher import _top_k
+
+    k = k or KNN_NEIGHBORS
+    block_rows = block_rows or KNN_BLOCK_ROWS
+    workers = workers or KNN_WORKERS or os.cpu_count() or 1
+    vectors = sp.csr_matrix(vectors)
+    n = vectors.shape[0]
+    transposed = vectors.T.tocsc()
+
+    def block_neighbors(start):
+        block = (vectors[start:start + block_rows] @ transposed).tocsr()
+        block.sort_indices()
+        rows, scores = [], []
+        for i in range(block.shape[0]):
+            lo, hi = block.indptr[i], block.indptr[i + 1]
+            columns, values = block.indices[lo:hi], block.data[lo:hi]
+            top = _top_k(values, k, 1e-12, columns != start + i)
+            rows.append(columns[top])
+            scores.append(values[top])
+        return rows, scores
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(block_neighbors, range(0, n, block_rows)))
+
+    neighbors = [row for rows, _ in parts for row in rows]
+    scores = [row for _, rows in parts for row in rows]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in neighbors], out=indptr[1:])
+    indices = np.concatenate(neighbors).astype(np.int32) if n else np.zeros(0, dtype=np.int32)
+    data = np.concatenate(scores).astype(np.float32) if n else np.zeros(0, dtype=np.float32)
+    return sp.csr_matrix((data, indices, indptr), shape=(n, n), copy=False)
+
+
+def graph_neighbors(graph, row: int, k: int):
+    """(vecinos, scores) de la fila `row`: los primeros k de su lista, sin recorrer el catálogo."""
+    start = graph.indptr[row]
+    end = min(graph.indptr[row + 1], start + k)
+    return np.asarray(graph.indices[start:end]), np.asarray(graph.data[start:end])
@@ -0,0 +1,143 @@
+"""Índice LSA: proyección de la matriz TF-IDF a vectores densos de baja dimensión.
+
+La matriz de cursos se proyecta con TruncatedSVD a LSA_COMPONENTS dimensiones
+y cada vector se normaliza (norma L2 = 1), de modo que la similitud es un solo
+producto matriz-vector. Los vectores se guardan en un arreglo contiguo
+float32 o cuantizados a int8 con una escala por fila (4 veces menos memoria).
+
+Opcionalmente se agrupan con k-means en LSA_CLUSTERS grupos: la búsqueda
+solo puntúa los cursos de los LSA_NPROBE grupos más cercanos a la consulta
+(aproximado). A diferencia del índice TF-IDF, LSA encuentra cursos afines
+aunque no compartan términos exactos con el documento.
+"""
+import json
+import os
+import numpy as np
+from config import LSA_COMPONENTS, LSA_QUANTIZE, LSA_CLUSTERS, LSA_NPROBE
+
+# Filas por bloque al puntuar vectores int8 (acota la copia temporal a float32)
+_SCORE_BLOCK_ROWS = 65536
+
+
+class LsaIndex:
+    def __init__(self, components: np.ndarray, embeddings: np.ndarray,
+                 scales: np.ndarray = None, centroids: np.ndarray = None,
+                 cluster_offsets: np.ndarray = None, cluster_rows: np.ndarray = None):
+        self.components = components
+        self.embeddings = embeddings
+        self.scales = scales
+        self.centroids = centroids
+        self.cluster_offsets = cluster_offsets
+        self.cluster_rows = cluster_rows
+
+    @classmethod
+    def fit(cls, vectors, n_components: int = None, quantize: str = None,
+            n_clusters: int = None) -> "LsaIndex":
+        """Ajusta la proyección SVD sobre la matriz de cursos y construye el índice."""
+        from sklearn.decomposition import TruncatedSVD
+
+        if n_components is None:
+            n_components = LSA_COMPONENTS
+        n_components = max(1, min(n_components, vectors.shape[1] - 1, vectors.shape[0] - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=0)
+        svd.fit(vectors)
+        index = cls(svd.components_.astype(np.float32), None)
+        index.rebuild(vectors, quantize=quantize, n_clusters=n_clusters)
+        return index
+
+    def rebuild(self, vectors, quantize: str = None, n_clusters: int = None):
+        """Re-proyecta la matriz de cursos con la proyección ya ajustada (p. ej. tras refresh())."""
+        if quantize is None:
+            quantize = LSA_QUANTIZE
+        if n_clusters is None:
+            n_clusters = LSA_CLUSTERS
+
+        embeddings = self.project(vectors)
+        if quantize == "int8":
+            scales = np.abs(embeddings).max(axis=1) / 127
+            safe = np.where(scales > 0, scales, 1)
+            self.embeddings = np.round(embeddings / safe[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+        elif quantize == "float32":
+            self.embeddings = embeddings
+            self.scales = None
+        else:
+            raise ValueError(f"Cuantización LSA desconocida: {quantize}")
+
+        self.centroids = self.cluster_offsets = self.cluster_rows = None
+        if n_clusters and n_clusters < len(embeddings):
+            self._build_clusters(embeddings, n_clusters)
+
+    def _build_clusters(self, embeddings: np.ndarray, n_clusters: int):
+        from sklearn.cluster import MiniBatchKMeans
+
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, n_init=3, random_state=0)
+        labels = kmeans.fit_predict(embeddings)
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms > 0, norms, 1)
+        self.cluster_rows = np.argsort(labels, kind="stable").astype(np.int64)
+        self.cluster_offsets = np.zeros(n_clusters + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_clusters), out=self.cluster_offsets[1:])
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.components, self.embeddings, self.scales, self.centroids,
+                  self.cluster_offsets, self.cluster_rows)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def project(self, vectors) -> np.ndarray:
+        """Vectores LSA normalizados (float32) de una matriz TF-IDF dispersa."""
+        embeddings = np.asarray(vectors @ self.components.T, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms > 0, norms, 1)
+
+    def similarities(self, query_vector, rows: np.ndarray = None) -> np.ndarray:
+        """Similitud coseno LSA de la consulta contra `rows` (todos los cursos por defecto)."""
+        query = self.project(query_vector)[0]
+        embeddings = self.embeddings if rows is None else self.embeddings[rows]
+        if self.scales is None:
+            return (embeddings @ query).astype(np.float64)
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty(len(embeddings))
+        for start in range(0, len(embeddings), _SCORE_BLOCK_ROWS):
+            block = embeddings[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores * scales
+
+    def probe(self, query_vector, nprobe: int = None):
+        """
+        Cursos (en orden ascendente) de los `nprobe` grupos más cercanos a la
+        consulta, o None si el índice no tiene grupos.
+        """
+        if self.centroids is None:
+            return None
+        if nprobe is None:
+            nprobe = LSA_NPROBE
+        query = self.project(query_vector)[0]
+        closest = np.argsort(-(self.centroids @ query), kind="stable")[:nprobe]
+        rows = [self.cluster_rows[self.cluster_offsets[c]:self.cluster_offsets[c + 1]]
+                for c in closest]
+        return np.sort(np.concatenate(rows))
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "components": self.components, "embeddings": self.embeddings,
+            "scales": self.scales, "centroids": self.centroids,
+            "cluster_offsets": self.cluster_offsets, "cluster_rows": self.cluster_rows,
+        }
+        saved = [name for name, array in arrays.items() if array is not None]
+        for name in saved:
+            np.save(os.path.join(path, f"{name}.npy"), arrays[name])
+        with open(os.path.join(path, "lsa.json"), "w", encoding="utf-8") as f:
+            json.dump({"arrays": saved}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "LsaIndex":
+        with open(os.path.join(path, "lsa.json"), encoding="utf-8") as f:
+            saved = json.load(f)["arrays"]
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in saved}
+        return cls(**arrays)
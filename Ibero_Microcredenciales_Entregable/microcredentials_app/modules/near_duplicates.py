@@ -0,0 +1,240 @@
+"""Agrupación de cursos casi duplicados con MinHash y LSH.
+
+El maestro de Coursera trae el mismo curso varias veces: una fila por idioma,
+versiones reeditadas y copias de otros partners. Al compilar el catálogo:
+
+  1. Cada curso se reduce a su conjunto de shingles (DEDUP_SHINGLE_SIZE
+     palabras consecutivas de combined_text) y a una firma MinHash de
+     MINHASH_PERMUTATIONS mínimos, calculada con NumPy por bloques.
+  2. LSH: la firma se corta en MINHASH_BANDS bandas; los cursos que coinciden
+     en alguna banda completa son candidatos.
+  3. Dentro de cada cubeta se comparan todos los pares; los que tienen una
+     similitud de Jaccard estimada (fracción de mínimos iguales) >=
+     DEDUP_THRESHOLD se unen (union-find), así los grupos son las componentes
+     conexas de esos pares.
+
+Cada grupo queda representado por una fila canónica (la de mayor rating; a
+igualdad, la primera del catálogo) y las demás se conservan como atributos de
+esa fila: URLs de las variantes, los valores de las facetas de todo el grupo
+(idiomas, niveles y la menor duración) y un registro por variante con su URL y
+sus facetas. La fila pasa los filtros si ella o una misma variante los cumple
+todos, y en ese caso el resultado muestra los datos de esa variante.
+"""
+import json
+import re
+import zlib
+import numpy as np
+import pandas as pd
+from config import (
+    DEDUP_THRESHOLD, DEDUP_SHINGLE_SIZE, MINHASH_PERMUTATIONS, MINHASH_BANDS,
+    INGEST_CHUNK_ROWS,
+    COL_LANGUAGE, COL_URL, COL_RATING, COL_SPEC_URL, COL_DIFFICULTY, COL_HOURS,
+    COL_DOMAIN, COL_SUBDOMAIN,
+)
+from modules.catalog_snapshot import CatalogSnapshot, SnapshotWriter
+
+# Columnas agregadas a la fila canónica ("; " separa los valores)
+VARIANT_LANGUAGES = "variant_languages"
+VARIANT_DIFFICULTIES = "variant_difficulties"
+VARIANT_URLS = "variant_urls"
+# Menor duración del grupo (numérica): la fila pasa max_hours si alguna variante lo cumple
+VARIANT_MIN_HOURS = "variant_min_hours"
+# Lista JSON con un registro por miembro del grupo (la fila canónica primero):
+# {"url", "language", "difficulty", "hours", "rating", "domain", "subdomain"}
+VARIANT_RECORDS = "variant_records"
+VARIANT_SEPARATOR = "; "
+
+# Primo mayor que 2^32: (a·h + b) mod p con a, h < 2^32 cabe en uint64
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(1 << 32)
+# Shingles por bloque al calcular firmas (acota la matriz permutaciones × shingles)
+_SHINGLE_BLOCK = 1 << 15
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def minhash_signatures(texts, n_perm: int = None, shingle_size: int = None) -> np.ndarray:
+    """
+    Firmas MinHash (n × n_perm, uint64) de los textos. Los textos sin
+    palabras quedan con la firma máxima en todas las posiciones.
+    """
+    n_perm = n_perm or MINHASH_PERMUTATIONS
+    shingle_size = shingle_size or DEDUP_SHINGLE_SIZE
+    rng = np.random.default_rng(0)
+    a = rng.integers(1, 1 << 32, n_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, n_perm, dtype=np.uint64)
+
+    token_hashes = {}
+    shingles, owners = [], []
+    for i, text in enumerate(texts):
+        hashes = _shingle_hashes(str(text).lower(), shingle_size, token_hashes)
+        shingles.append(hashes)
+        owners.append(np.full(len(hashes), i, dtype=np.int64))
+    signatures = np.full((len(shingles), n_perm), _PRIME, dtype=np.uint64)
+    if not shingles:
+        return signatures
+    shingles = np.concatenate(shingles)
+    owners = np.concatenate(owners)
+
+    for start in range(0, len(shingles), _SHINGLE_BLOCK):
+        block = shingles[start:start + _SHINGLE_BLOCK]
+        block_owners = owners[start:start + _SHINGLE_BLOCK]
+        values = (block[:, None] * a + b) % _PRIME
+        # Mínimo por documento: los shingles de cada documento son contiguos
+        firsts = np.flatnonzero(np.r_[True, block_owners[1:] != block_owners[:-1]])
+        docs = block_owners[firsts]
+        signatures[docs] = np.minimum(signatures[docs], np.minimum.reduceat(values, firsts))
+    return signatures
+
+
+def _shingle_hashes(text: str, size: int, token_hashes: dict) -> np.ndarray:
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    ids = np.fromiter((token_hashes.setdefault(t, zlib.crc32(t.encode("utf-8")))
+                       for t in tokens), dtype=np.uint64, count=len(tokens))
+    size = min(size, len(ids))
+    # Hash polinomial de cada ventana de `size` palabras, reducido a 32 bits
+    hashes = np.zeros(len(ids) - size + 1, dtype=np.uint64)
+    for k in range(size):
+        hashes = hashes * np.uint64(1000003) + ids[k:len(ids) - size + 1 + k]
+    return np.unique(hashes % _MAX_HASH)
+
+
+def near_duplicate_groups(signatures: np.ndarray, threshold: float = None,
+                          bands: int = None) -> np.ndarray:
+    """
+    Grupo de cada fila (el índice de la primera fila del grupo). Las filas
+    sin duplicados son su propio grupo.
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    bands = bands or MINHASH_BANDS
+    n, n_perm = signatures.shape
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    valid = np.flatnonzero(signatures[:, 0] != _PRIME)
+    width = max(1, n_perm // bands)
+    multipliers = np.random.default_rng(1).integers(1, 1 << 63, width, dtype=np.uint64) | np.uint64(1)
+    for start in range(0, width * bands, width):
+        keys = (signatures[valid, start:start + width] * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        firsts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        lengths = np.diff(np.r_[firsts, len(order)])
+        for first, length in zip(firsts[lengths > 1], lengths[lengths > 1]):
+            members = valid[order[first:first + length]]
+            bucket = signatures[members]
+            # Todos los pares de la cubeta, una fila contra las siguientes a la vez
+            for a in range(len(members) - 1):
+                agreement = (bucket[a + 1:] == bucket[a]).mean(axis=1)
+                for other in members[a + 1:][agreement >= threshold]:
+                    root_a, root_b = find(members[a]), find(other)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.array([find(i) for i in range(n)])
+
+
+def variant_count(store) -> int:
+    """Filas del catálogo original agrupadas bajo otra fila canónica."""
+    if VARIANT_URLS not in store:
+        return 0
+    return sum(len(urls.split(VARIANT_SEPARATOR)) for urls in store.texts(VARIANT_URLS) if urls)
+
+
+def collapse_snapshot(path: str, source_path: str = None, categorical: list = (),
+                      derived: dict = None, threshold: float = None) -> dict:
+    """
+    Reescribe el snapshot de cursos en `path` con una fila por grupo de casi
+    duplicados. Retorna {"rows": filas originales, "groups": filas finales}.
+    Con threshold <= 0 o sin duplicados el snapshot no se modifica.
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    store = CatalogSnapshot(path).store()
+    summary = {"rows": len(store), "groups": len(store)}
+    if threshold <= 0 or len(store) < 2:
+        return summary
+
+    groups = near_duplicate_groups(minhash_signatures(store.texts("combined_text")), threshold)
+    if (groups == np.arange(len(store))).all():
+        return summary
+
+    ratings = pd.to_numeric(store[COL_RATING], errors="coerce").fillna(-1).to_numpy() \
+        if COL_RATING in store else np.zeros(len(store))
+    # Canónica: mayor rating y, a igualdad, la primera fila del grupo
+    order = np.lexsort((np.arange(len(store)), -ratings, groups))
+    canonical = order[np.r_[True, groups[order][1:] != groups[order][:-1]]]
+    canonical = np.sort(canonical)
+    members = {}
+    for i, group in enumerate(groups.tolist()):
+        members.setdefault(group, []).append(i)
+
+    languages = store.take(COL_LANGUAGE, range(len(store)), "")
+    difficulties = store.take(COL_DIFFICULTY, range(len(store)), "")
+    hours = pd.to_numeric(store[COL_HOURS], errors="coerce").to_numpy(dtype=float) \
+        if COL_HOURS in store else np.full(len(store), np.nan)
+    urls = store.take(COL_URL, range(len(store)), "")
+    domains = store.take(COL_DOMAIN, range(len(store)), "")
+    subdomains = store.take(COL_SUBDOMAIN, range(len(store)), "")
+    real_ratings = np.where(ratings < 0, np.nan, ratings) if COL_RATING in store \
+        else np.full(len(store), np.nan)
+    spec_urls = store.take(COL_SPEC_URL, range(len(store)), "")
+    writer = SnapshotWriter(path, source_path=source_path,
+                            categorical=categorical, derived=derived)
+    for start in range(0, len(canonical), INGEST_CHUNK_ROWS):
+        rows = canonical[start:start + INGEST_CHUNK_ROWS]
+        chunk = store.to_frame(rows=rows)
+        if COL_SPEC_URL in chunk:
+            chunk[COL_SPEC_URL] = chunk[COL_SPEC_URL].astype(object)
+        variant_languages, variant_difficulties, variant_urls, min_hours = [], [], [], []
+        records = []
+        for k, i in enumerate(rows.tolist()):
+            group = members[groups[i]]
+            records.append(json.dumps([{
+                "url": _text(urls[j]),
+                "language": _text(languages[j]),
+                "difficulty": _text(difficulties[j]),
+                "hours": _number(hours[j]),
+                "rating": _number(real_ratings[j]),
+                "domain": _text(domains[j]),
+                "subdomain": _text(subdomains[j]),
+            } for j in [i] + [j for j in group if j != i]], ensure_ascii=False)
+                if len(group) > 1 else "")
+            variant_languages.append(VARIANT_SEPARATOR.join(
+                sorted({_text(languages[j]) for j in group} - {""})))
+            variant_difficulties.append(VARIANT_SEPARATOR.join(
+                sorted({_text(difficulties[j]) for j in group} - {""})))
+            group_hours = hours[group]
+            min_hours.append(np.nanmin(group_hours) if not np.isnan(group_hours).all() else np.nan)
+            variant_urls.append(VARIANT_SEPARATOR.join(
+                urls[j] for j in group if j != i and urls[j]))
+            if len(group) > 1 and COL_SPEC_URL in chunk:
+                # Las especializaciones de las variantes apuntan a la fila canónica
+                merged = dict.fromkeys(u.strip() for j in group
+                                       for u in _text(spec_urls[j]).split(",") if u.strip())
+                chunk.loc[k, COL_SPEC_URL] = ", ".join(merged) if merged else np.nan
+        chunk[VARIANT_LANGUAGES] = variant_languages
+        chunk[VARIANT_DIFFICULTIES] = variant_difficulties
+        chunk[VARIANT_URLS] = variant_urls
+        chunk[VARIANT_MIN_HOURS] = np.asarray(min_hours, dtype=float)
+        chunk[VARIANT_RECORDS] = records
+        writer.append(chunk)
+    # El store mapea los archivos que se van a reemplazar
+    del store
+    writer.close()
+    summary["groups"] = len(canonical)
+    return summary
+
+
+def _text(value) -> str:
+    """Valor de celda como texto ("" si es nulo)."""
+    return "" if pd.isna(value) else str(value).strip()
+
+
+def _number(value):
+    """Valor numérico para JSON (None si es NaN)."""
+    return None if np.isnan(value) else float(value)
@@ -230,9 +230,6 @@ def _add_coursera_course(doc, course: dict, index: int):
     run_name.font.color.rgb = RGBColor(0x00, 0x56, 0xD2)
 
     # Tabla de info
-    table = doc.add_table(rows=7, cols=2)
-    table.style = 'Light List Accent 1'
-
     fields = [
         ("Institución/Partner", course.get("partner", "")),
         ("Duración", f"{course.get('horas', 'N/A')} horas" if course.get('horas') else "N/A"),
@@ -242,6 +239,11 @@ def _add_coursera_course(doc, course: dict, index: int):
         ("Enlace", course.get("url", "")),
         ("Habilidades", course.get("skills", "")[:200]),
     ]
+    if course.get("variantes"):
+        fields.append(("Idiomas disponibles", course.get("idiomas", "")))
+
+    table = doc.add_table(rows=len(fields), cols=2)
+    table.style = 'Light List Accent 1'
 
     for i, (label, value) in enumerate(fields):
         table.rows[i].cells[0].text = label
@@ -0,0 +1,133 @@
+"""Caché de resultados de la app en dos niveles: LRU en memoria y SQLite en disco.
+
+Las claves son el SHA-256 de los parámetros que determinan el resultado (hash
+del texto extraído, competencias, filtros, top-N, versión del bundle...), de
+modo que un mismo documento subido por varios docentes, o vuelto a procesar
+con los mismos parámetros, no repite la extracción de competencias ni las
+búsquedas. El nivel en memoria tiene un máximo de entradas; el de disco
+descarta las entradas más viejas que el TTL y se comparte entre procesos.
+
+Los valores se guardan serializados (pickle): cada lectura devuelve una copia
+independiente que el llamador puede modificar sin afectar la caché.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import RESULT_CACHE_PATH, RESULT_CACHE_ITEMS, RESULT_CACHE_TTL
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(namespace: str, **params) -> str:
+    """Clave estable a partir de un espacio de nombres y parámetros serializables a JSON."""
+    payload = json.dumps({"ns": namespace, **params}, sort_keys=True,
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path: str = None, max_items: int = None, ttl: float = None,
+                 clock=time.time):
+        """`clock` da la hora (en segundos) para el TTL; por defecto time.time."""
+        self.path = RESULT_CACHE_PATH if path is None else path
+        self.max_items = RESULT_CACHE_ITEMS if max_items is None else max_items
+        self.ttl = RESULT_CACHE_TTL if ttl is None else ttl
+        self.clock = clock
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with self._connect() as conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS results ("
+                        "key TEXT PRIMARY KEY, created REAL NOT NULL, payload BLOB NOT NULL)"
+                    )
+            except (OSError, sqlite3.Error):
+                # Sin disco escribible la caché funciona solo en memoria
+                self.path = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key: str):
+        """Valor guardado para `key`, o None si no está o ya expiró."""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return pickle.loads(payload)
+
+        payload = self._disk_get(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits["disk"] += 1
+            self._remember(key, payload)
+        return pickle.loads(payload)
+
+    def put(self, key: str, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, payload)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                 (key, self.clock(), payload))
+            except sqlite3.Error:
+                pass
+
+    def purge(self) -> int:
+        """Elimina del disco las entradas expiradas; retorna cuántas se borraron."""
+        if not self.path:
+            return 0
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute("DELETE FROM results WHERE created < ?",
+                                      (self.clock() - self.ttl,))
+                return cursor.rowcount
+        except sqlite3.Error:
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM results")
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key: str, payload: bytes):
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str):
+        if not self.path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT created, payload FROM results WHERE key = ?",
+                                   (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] < self.clock() - self.ttl:
+            return None
+        return row[1]
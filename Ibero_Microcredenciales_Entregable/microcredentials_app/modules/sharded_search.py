@@ -0,0 +1,122 @@
+"""Búsqueda por fuerza bruta repartida en fragmentos de filas y varios procesos.
+
+La matriz de cursos (CSR float32) se copia una sola vez a memoria compartida
+(multiprocessing.shared_memory) y se divide en SHARD_COUNT fragmentos de filas
+contiguas. Cada proceso del pool se conecta a la memoria compartida al
+arrancar, sin copiar la matriz; por consulta solo viajan el vector consulta,
+la máscara de filtros del fragmento y el top-k local de vuelta.
+
+Cada fragmento calcula los mismos productos punto fila por fila que el motor
+de un solo proceso y aplica el mismo umbral y máscara; como los fragmentos
+están en orden de fila, unir los top-k locales y seleccionar de nuevo da
+exactamente el mismo resultado y orden que la búsqueda sin fragmentar.
+"""
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import scipy.sparse as sp
+from config import SHARD_COUNT, SHARD_WORKERS
+
+# Estado de cada proceso del pool (fragmentos mapeados sobre la memoria compartida)
+_WORKER = {}
+
+
+class ShardedSearcher:
+    def __init__(self, matrix, n_shards: int = None, workers: int = None):
+        if n_shards is None:
+            n_shards = SHARD_COUNT or os.cpu_count() or 1
+        if workers is None:
+            workers = SHARD_WORKERS or min(n_shards, os.cpu_count() or 1)
+        matrix = sp.csr_matrix(matrix)
+        self.n_rows, self.n_terms = matrix.shape
+        self.bounds = np.linspace(0, self.n_rows, max(1, n_shards) + 1).astype(np.int64)
+
+        self._blocks = []
+        specs = []
+        for array in (matrix.data, matrix.indices, matrix.indptr):
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self._blocks.append(block)
+            specs.append((block.name, array.shape, array.dtype.str))
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=max(1, workers), initializer=_init_worker,
+            initargs=(specs, matrix.shape, self.bounds.tolist()),
+        )
+        # Libera el pool y la memoria compartida al cerrar, al recolectar el
+        # objeto o al salir del intérprete (lo que ocurra primero)
+        self._finalizer = weakref.finalize(self, _release, self._pool, self._blocks)
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.bounds) - 1
+
+    def top_k(self, query, k: int, threshold: float, mask: np.ndarray = None):
+        """Top-k global (filas, scores) del vector consulta, igual que _top_k() sobre todo el catálogo."""
+        from modules.coursera_matcher import _top_k
+
+        query = sp.csr_matrix(query)
+        jobs = [
+            self._pool.submit(_shard_top_k, shard, query.indices, query.data, k, threshold,
+                              None if mask is None else mask[self.bounds[shard]:self.bounds[shard + 1]])
+            for shard in range(self.n_shards)
+        ]
+        parts = [job.result() for job in jobs]
+        rows = np.concatenate([rows for rows, _ in parts])
+        scores = np.concatenate([scores for _, scores in parts])
+        top = _top_k(scores, k, threshold)
+        return rows[top], scores[top]
+
+    def similarities(self, query) -> np.ndarray:
+        """Scores de todos los cursos, calculados por fragmento en paralelo."""
+        query = sp.csr_matrix(query)
+        jobs = [self._pool.submit(_shard_scores, shard, query.indices, query.data)
+                for shard in range(self.n_shards)]
+        return np.concatenate([job.result() for job in jobs])
+
+    def close(self):
+        """Detiene el pool y libera la memoria compartida."""
+        self._finalizer()
+        self._pool = None
+        self._blocks = []
+
+
+def _release(pool: ProcessPoolExecutor, blocks: list):
+    pool.shutdown(wait=True)
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _init_worker(specs, shape, bounds):
+    arrays = []
+    for name, array_shape, dtype in specs:
+        block = shared_memory.SharedMemory(name=name)
+        _WORKER.setdefault("blocks", []).append(block)
+        arrays.append(np.ndarray(array_shape, dtype=np.dtype(dtype), buffer=block.buf))
+    data, indices, indptr = arrays
+    _WORKER["n_terms"] = shape[1]
+    _WORKER["bounds"] = bounds
+    _WORKER["shards"] = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        first, last = indptr[start], indptr[end]
+        _WORKER["shards"].append(sp.csr_matrix(
+            (data[first:last], indices[first:last], indptr[start:end + 1] - first),
+            shape=(end - start, shape[1]), copy=False,
+        ))
+
+
+def _shard_scores(shard: int, q_indices, q_data) -> np.ndarray:
+    query = np.zeros(_WORKER["n_terms"], dtype=np.float32)
+    query[q_indices] = q_data
+    return _WORKER["shards"][shard] @ query
+
+
+def _shard_top_k(shard: int, q_indices, q_data, k: int, threshold: float, mask):
+    from modules.coursera_matcher import _top_k
+
+    scores = _shard_scores(shard, q_indices, q_data)
+    top = _top_k(scores, k, threshold, mask)
+    return top + _WORKER["bounds"][shard], scores[top]
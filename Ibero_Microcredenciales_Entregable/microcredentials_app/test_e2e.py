@@ -74,7 +74,10 @@ def run_test():
     # 3. Test competency extractor
     print("\n[3/7] Testing competency extractor...")
     from modules.competency_extractor import extract_competencies, competencies_to_text
-    competencies = extract_competencies(TEST_DOCUMENT, n_competencies=12)
+    from modules.competency_idf import build_idf_table
+    idf_table = build_idf_table(courses_df["combined_text"].tolist())
+    print(f"  ✓ Tabla IDF: {len(idf_table)} n-gramas")
+    competencies = extract_competencies(TEST_DOCUMENT, n_competencies=12, idf_table=idf_table)
     print(f"  ✓ Competencias extraídas: {len(competencies)}")
     for c in competencies[:5]:
         print(f"    - {c['term']} (score: {c['score']}, tipo: {c['type']})")
@@ -0,0 +1,71 @@
+"""Fixtures compartidas: un catálogo sintético pequeño y carpetas de datos aisladas."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from config import (
+    COL_NAME, COL_PARTNER, COL_TYPE, COL_DIFFICULTY, COL_HOURS, COL_RATING, COL_URL,
+    COL_DESCRIPTION, COL_SKILLS, COL_CORE_SKILLS, COL_DOMAIN, COL_SUBDOMAIN,
+    COL_LANGUAGE, COL_SPECIALIZATION, COL_SPEC_URL,
+)
+from modules.catalog_loader import _prepare_courses
+
+TOPICS = {
+    "Data Science": ("data analysis python statistics machine learning regression "
+                     "classification pandas numpy visualization tableau sql").split(),
+    "Business": ("marketing finance strategy management leadership accounting sales "
+                 "negotiation entrepreneurship economics innovation branding").split(),
+    "Health": ("nutrition anatomy epidemiology public health medicine nursing biology "
+               "clinical wellbeing psychology diagnosis").split(),
+}
+LANGUAGES = ["English", "Spanish", "French"]
+DIFFICULTIES = ["Beginner", "Intermediate", "Advanced"]
+
+
+def make_courses(n: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """Catálogo sintético de `n` cursos (URLs c<start>..c<start+n-1>), listo para los matchers."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(start, start + n):
+        domain = rng.choice(list(TOPICS))
+        words = TOPICS[domain]
+        rows.append({
+            COL_NAME: " ".join(rng.sample(words, 3)).title(),
+            COL_PARTNER: f"Univ {rng.randrange(10)}",
+            COL_TYPE: "Course",
+            COL_DIFFICULTY: rng.choice(DIFFICULTIES),
+            COL_HOURS: rng.choice([2, 5, 8, 12, 20, 40]),
+            COL_RATING: round(rng.uniform(3, 5), 1),
+            COL_URL: f"https://coursera.org/learn/c{i}",
+            COL_DESCRIPTION: " ".join(rng.choice(words) for _ in range(30)),
+            COL_SKILLS: ", ".join(rng.sample(words, 4)),
+            COL_CORE_SKILLS: rng.choice(words),
+            COL_DOMAIN: domain,
+            COL_SUBDOMAIN: domain + " A",
+            COL_LANGUAGE: rng.choice(LANGUAGES),
+            COL_SPECIALIZATION: "",
+            COL_SPEC_URL: "",
+        })
+    return pd.DataFrame(rows)
+
+
+def prepared(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega combined_text y content_hash como lo hace la ingesta."""
+    return _prepare_courses(df.copy())
+
+
+@pytest.fixture
+def data_dirs(tmp_path, monkeypatch):
+    """Redirige bundles, snapshots y programas de asignatura a carpetas temporales."""
+    from modules import catalog_bundle, catalog_loader, competency_idf
+    monkeypatch.setattr(catalog_bundle, "BUNDLES_DIR", str(tmp_path / "bundles"))
+    monkeypatch.setattr(catalog_loader, "COURSES_SNAPSHOT", str(tmp_path / "snapshots" / "courses"))
+    monkeypatch.setattr(catalog_loader, "SPECIALIZATIONS_SNAPSHOT",
+                        str(tmp_path / "snapshots" / "specializations"))
+    monkeypatch.setattr(competency_idf, "SYLLABI_DIR", str(tmp_path / "syllabi"))
+    return tmp_path
@@ -0,0 +1,24 @@
+"""API por lotes de CourseraMatcher: guardas antes de fit() y lotes vacíos."""
+import pytest
+
+from conftest import make_courses, prepared
+from modules.coursera_matcher import CourseraMatcher
+
+
+@pytest.fixture(scope="module")
+def courses():
+    return prepared(make_courses(60))
+
+
+def test_batch_api_requires_fit():
+    with pytest.raises(RuntimeError):
+        CourseraMatcher(engine="brute").find_matches_batch(["análisis de datos"])
+
+
+@pytest.mark.parametrize("vectorizer_mode", ["tfidf", "hashing"])
+def test_batch_api_accepts_no_documents(courses, vectorizer_mode):
+    matcher = CourseraMatcher(engine="brute", vectorizer_mode=vectorizer_mode)
+    matcher.fit(courses)
+    assert matcher.find_matches_batch([]) == []
+    assert list(matcher.similarity_blocks([])) == []
+    assert matcher.similarities_batch([]).shape == (0, len(courses))
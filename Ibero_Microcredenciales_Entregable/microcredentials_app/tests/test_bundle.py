@@ -0,0 +1,87 @@
+"""Bundles direccionados por contenido (build_bundle / load_current_bundle)."""
+import shutil
+
+import config
+from config import COL_DESCRIPTION, COL_URL
+from conftest import make_courses
+from modules.catalog_bundle import build_bundle, bundle_key, load_current_bundle, CatalogBundle
+from modules.coursera_matcher import CourseraMatcher
+
+
+def _count_fits(monkeypatch) -> list:
+    calls = []
+    original = CourseraMatcher.fit
+
+    def fit(self, courses):
+        calls.append(len(courses))
+        return original(self, courses)
+
+    monkeypatch.setattr(CourseraMatcher, "fit", fit)
+    return calls
+
+
+def test_bundle_reused_for_same_content(data_dirs, monkeypatch):
+    source = data_dirs / "courses.csv"
+    make_courses(200).to_csv(source, index=False)
+    path = build_bundle(str(source))
+    manifest = CatalogBundle(path).manifest
+    assert manifest["n_courses"] + manifest["n_course_variants"] == 200
+    assert manifest["n_specializations"] == 0  # un CSV de cursos no trae especializaciones
+
+    # El mismo contenido con otro nombre produce la misma clave y no se recompila
+    copy = data_dirs / "copia" / "export.csv"
+    copy.parent.mkdir()
+    shutil.copy(source, copy)
+    fits = _count_fits(monkeypatch)
+    assert build_bundle(str(copy)) == path
+    assert fits == []
+    assert load_current_bundle(str(copy)).path == path
+
+
+def test_changed_source_refreshes_previous_bundle(data_dirs, monkeypatch):
+    courses = make_courses(200)
+    source = data_dirs / "v1.csv"
+    courses.to_csv(source, index=False)
+    first = build_bundle(str(source))
+
+    courses.loc[0, COL_DESCRIPTION] += " statistics regression"
+    changed = data_dirs / "v2.csv"
+    courses.to_csv(changed, index=False)
+    fits = _count_fits(monkeypatch)
+    second = build_bundle(str(changed))
+
+    assert second != first
+    refresh = CatalogBundle(second).manifest["refresh"]
+    assert refresh["from"] == CatalogBundle(first).key
+    assert refresh["courses"]["changed"] == 1
+    assert fits == []
+    # El bundle anterior sigue disponible para su fuente
+    assert load_current_bundle(str(source)).path == first
+
+
+def test_config_change_changes_key(data_dirs, monkeypatch):
+    source = data_dirs / "courses.csv"
+    make_courses(20).to_csv(source, index=False)
+    key = bundle_key(str(source))
+    monkeypatch.setattr(config, "MINHASH_BANDS", config.MINHASH_BANDS + 1)
+    assert bundle_key(str(source)) != key
+
+
+def test_similar_courses_only_from_precomputed_graph(data_dirs):
+    courses = make_courses(120)
+    source = data_dirs / "courses.csv"
+    courses.to_csv(source, index=False)
+    url = courses.loc[5, COL_URL]
+
+    # Sin bundle no hay grafo y no se construye en la consulta
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(CatalogBundle(build_bundle(str(source))).courses)
+    assert not matcher.has_similar_courses
+    assert matcher.similar_courses(url) == []
+    assert matcher._knn is None
+
+    bundled = load_current_bundle(str(source)).course_matcher
+    assert bundled.has_similar_courses
+    similar = bundled.similar_courses(url, k=3)
+    assert 0 < len(similar) <= 3
+    assert url not in [s["url"] for s in similar]
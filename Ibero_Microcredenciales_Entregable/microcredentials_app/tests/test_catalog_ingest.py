@@ -0,0 +1,37 @@
+"""Ingesta por bloques del Excel/CSV del catálogo (modules/catalog_ingest.py)."""
+import re
+import zipfile
+
+from openpyxl import Workbook
+
+from modules.catalog_ingest import iter_excel_chunks
+
+
+def _stale_dimension(path, ref: str):
+    """Reescribe la etiqueta <dimension> de la primera hoja (como la dejan algunos exportadores)."""
+    with zipfile.ZipFile(path) as zin:
+        items = {name: zin.read(name) for name in zin.namelist()}
+    sheet = "xl/worksheets/sheet1.xml"
+    items[sheet] = re.sub(rb'<dimension ref="[^"]*"\s*/>', f'<dimension ref="{ref}"/>'.encode(),
+                          items[sheet])
+    with zipfile.ZipFile(path, "w") as zout:
+        for name, data in items.items():
+            zout.writestr(name, data)
+
+
+def test_excel_chunks_ignore_stale_dimension(tmp_path):
+    path = tmp_path / "catalog.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Cursos"
+    ws.append(["Name", "Hours", "URL"])
+    for i in range(25):
+        ws.append([f"Course {i}", i, f"https://example.org/{i}"])
+    wb.save(path)
+    _stale_dimension(path, "A1")
+
+    chunks = list(iter_excel_chunks(str(path), "Cursos", ["Name", "URL"], chunk_rows=10, skiprows=0))
+
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert list(chunks[0].columns) == ["Name", "URL"]
+    assert chunks[-1]["URL"].iloc[-1] == "https://example.org/24"
@@ -0,0 +1,49 @@
+"""Extracción de competencias por lotes: mismo resultado y orden que la extracción serial."""
+import pytest
+
+from config import COL_DESCRIPTION, COL_NAME, COL_SKILLS
+from conftest import make_courses, prepared
+from modules import competency_extractor
+from modules.competency_extractor import extract_competencies, extract_competencies_batch
+from modules.competency_idf import IdfTable, build_idf_table
+
+
+@pytest.fixture(scope="module")
+def idf_table():
+    return build_idf_table(prepared(make_courses(200))["combined_text"], min_df=2)
+
+
+@pytest.fixture(scope="module")
+def texts():
+    courses = make_courses(23, seed=7)
+    texts = [f"{name}. {description}. Habilidades: {skills}"
+             for name, description, skills in zip(courses[COL_NAME], courses[COL_DESCRIPTION],
+                                                  courses[COL_SKILLS])]
+    # Documentos vacíos o demasiado cortos en medio del lote
+    texts[3] = ""
+    texts[10] = "muy corto"
+    return texts
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_batch_matches_serial_in_order(texts, idf_table, workers, monkeypatch):
+    monkeypatch.setattr(competency_extractor, "EXTRACT_CHUNK_DOCS", 4)
+    expected = [extract_competencies(text, 8, idf_table) for text in texts]
+    assert extract_competencies_batch(texts, 8, workers=workers, idf_table=idf_table) == expected
+    assert expected[3] == [] and expected[10] == []
+    assert all(expected[i] for i in range(len(texts)) if i not in (3, 10))
+
+
+def test_batch_with_table_from_disk(texts, idf_table, tmp_path, monkeypatch):
+    # Una tabla cargada de disco viaja a los procesos como ruta
+    idf_table.save(str(tmp_path))
+    loaded = IdfTable.load(str(tmp_path))
+    monkeypatch.setattr(competency_extractor, "EXTRACT_CHUNK_DOCS", 5)
+    expected = [extract_competencies(text, 8, loaded) for text in texts]
+    assert extract_competencies_batch(texts, 8, workers=2, idf_table=loaded) == expected
+    assert extract_competencies_batch(texts, 8, workers=2) == \
+        [extract_competencies(text, 8) for text in texts]
+
+
+def test_empty_batch():
+    assert extract_competencies_batch([], workers=4) == []
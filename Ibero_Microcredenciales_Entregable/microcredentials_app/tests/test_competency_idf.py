@@ -0,0 +1,80 @@
+"""Tabla IDF de n-gramas: construcción sobre un corpus fijo, consulta y archivos en disco."""
+import math
+
+import numpy as np
+import pytest
+
+from modules.competency_idf import IdfTable, build_idf_table
+from modules.keyphrases import count_phrases
+
+CORPUS = [
+    "Análisis de datos con Python",
+    "análisis financiero",
+    "Gestión de equipos y análisis de datos",
+]
+
+
+def _idf(df: int, n_docs: int = len(CORPUS)) -> float:
+    return math.log((1 + n_docs) / (1 + df)) + 1
+
+
+def test_terms_are_content_ngrams_in_order():
+    table = build_idf_table(CORPUS, min_df=1)
+    # Sin stop words ("de", "con", "y") y en minúsculas, ordenados alfabéticamente
+    assert table.terms == [
+        "análisis", "análisis datos", "análisis datos python", "análisis financiero",
+        "datos", "datos python", "equipos", "equipos análisis", "equipos análisis datos",
+        "financiero", "gestión", "gestión equipos", "gestión equipos análisis", "python",
+    ]
+    assert table.n_docs == 3
+    assert table.idf.dtype == np.float32
+
+
+def test_idf_is_smoothed_document_frequency():
+    table = build_idf_table(CORPUS, min_df=1)
+    values = dict(zip(table.terms, table.idf.tolist()))
+    assert values["análisis"] == pytest.approx(_idf(3))
+    assert values["análisis datos"] == pytest.approx(_idf(2))
+    assert values["python"] == pytest.approx(_idf(1))
+    # Se cuenta la presencia por documento, no las repeticiones
+    repeated = build_idf_table(["datos datos datos", "python"], min_df=1)
+    assert repeated.lookup(["datos"])[0] == pytest.approx(_idf(1, 2))
+
+
+def test_min_df_drops_rare_ngrams_and_lookup_defaults():
+    table = build_idf_table(CORPUS, min_df=2)
+    assert table.terms == ["análisis", "análisis datos", "datos"]
+    assert table.default_idf == pytest.approx(math.log(4) + 1)
+    np.testing.assert_allclose(
+        table.lookup(["datos", "python", "no visto"]),
+        [_idf(2), table.default_idf, table.default_idf], rtol=1e-6)
+    # Un término no visto pesa más que cualquiera de la tabla
+    assert table.default_idf > table.idf.max()
+
+
+def test_keys_match_keyphrase_candidates():
+    table = build_idf_table(CORPUS, min_df=1)
+    counts = count_phrases("Análisis de datos con Python").counts
+    assert set(counts) <= set(table.terms)
+
+
+def test_empty_corpus():
+    table = build_idf_table([], min_df=2)
+    assert len(table) == 0 and table.n_docs == 0
+    assert table.lookup(["datos"]).tolist() == [table.default_idf]
+    assert len(build_idf_table(["de la y"], min_df=1)) == 0
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load(tmp_path, mmap):
+    table = build_idf_table(CORPUS, min_df=1)
+    table.save(str(tmp_path))
+    loaded = IdfTable.load(str(tmp_path), mmap=mmap)
+    assert loaded.terms == table.terms
+    assert loaded.n_docs == table.n_docs
+    assert loaded.path == str(tmp_path)
+    np.testing.assert_array_equal(loaded.lookup(table.terms + ["otro"]),
+                                  table.lookup(table.terms + ["otro"]))
+
+    build_idf_table([], min_df=1).save(str(tmp_path / "empty"))
+    assert len(IdfTable.load(str(tmp_path / "empty"))) == 0
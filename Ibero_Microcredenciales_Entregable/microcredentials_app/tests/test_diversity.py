@@ -0,0 +1,86 @@
+"""Re-ranking por diversidad (MMR): orden con λ = 1, ruptura de rachas y tamaño del top-N."""
+from collections import Counter
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from config import MMR_PARTNER_QUOTA, MMR_SUBDOMAIN_QUOTA
+from conftest import make_courses, prepared
+from modules.coursera_matcher import CourseraMatcher
+from modules.diversity import gram_matrix, mmr_rerank
+
+# Tres candidatos casi iguales (mismo partner) al frente y dos distintos detrás
+RELEVANCE = np.array([0.90, 0.89, 0.88, 0.60, 0.55])
+GRAM = np.array([
+    [1.0, 0.98, 0.97, 0.1, 0.0],
+    [0.98, 1.0, 0.99, 0.1, 0.0],
+    [0.97, 0.99, 1.0, 0.1, 0.0],
+    [0.1, 0.1, 0.1, 1.0, 0.2],
+    [0.0, 0.0, 0.0, 0.2, 1.0],
+])
+PARTNERS = ["Univ A", "Univ A", "Univ A", "Univ B", "Univ C"]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(prepared(make_courses(400)))
+    return matcher
+
+
+def test_lambda_one_keeps_relevance_order():
+    assert mmr_rerank(RELEVANCE, GRAM, 4, 1.0).tolist() == [0, 1, 2, 3]
+
+
+def test_low_lambda_breaks_up_near_duplicates():
+    chosen = mmr_rerank(RELEVANCE, GRAM, 3, 0.3).tolist()
+    # El más relevante primero; sus casi duplicados 1 y 2 ceden el lugar a 3 y 4
+    assert chosen[0] == 0 and sorted(chosen) == [0, 3, 4]
+
+
+def test_partner_quota_breaks_up_runs():
+    # Aun con λ = 1 la cuota corta la racha del mismo partner...
+    assert mmr_rerank(RELEVANCE, GRAM, 3, 1.0, [(PARTNERS, 1)]).tolist() == [0, 3, 4]
+    # ...y si las cuotas agotan los candidatos, el resto se completa sin ellas
+    assert mmr_rerank(RELEVANCE, GRAM, 5, 1.0, [(PARTNERS, 1)]).tolist() == [0, 3, 4, 1, 2]
+
+
+@pytest.mark.parametrize("k", [0, 3, 5, 8])
+def test_result_never_exceeds_k(k):
+    chosen = mmr_rerank(RELEVANCE, GRAM, k, 0.5, [(PARTNERS, 2)])
+    assert len(chosen) == min(k, len(RELEVANCE))
+    assert len(set(chosen.tolist())) == len(chosen)
+
+
+@pytest.mark.parametrize("terms", [50, 5000])
+def test_gram_matrix_is_pairwise_cosine(terms):
+    # 50 términos usa la ruta densa; 5000, el producto disperso
+    vectors = sp.random(12, terms, density=0.05, format="csr", random_state=0, dtype=np.float32)
+    norms = np.sqrt(vectors.multiply(vectors).sum(axis=1)).A.ravel()
+    vectors = sp.diags(1 / np.where(norms > 0, norms, 1)) @ vectors
+    vectors = sp.csr_matrix(vectors, dtype=np.float32)
+    expected = (vectors @ vectors.T).toarray()
+    np.testing.assert_allclose(gram_matrix(vectors), expected, atol=1e-6)
+
+
+def test_matcher_lambda_one_is_relevance_order(matcher):
+    query = "python statistics regression machine learning"
+    similarities = matcher.similarities(query)
+    results = matcher.find_matches(query, top_n=10, threshold=0.0, mmr_lambda=1.0)
+    scores = [c["similitud"] for c in results]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == round(float(similarities.max()), 4)
+
+
+def test_matcher_diversifies_within_top_n(matcher):
+    query = "python statistics regression machine learning"
+    for top_n in (1, 5, 10):
+        results = matcher.find_matches(query, top_n=top_n, threshold=0.0, mmr_lambda=0.3)
+        assert len(results) == top_n
+        assert len({c["url"] for c in results}) == top_n
+    # Con top_n = 10 alcanzan los partners y subdominios distintos para cumplir las cuotas
+    partners = Counter(c["partner"] for c in results)
+    subdomains = Counter(c["subdominio"] for c in results)
+    assert max(partners.values()) <= MMR_PARTNER_QUOTA
+    assert max(subdomains.values()) <= MMR_SUBDOMAIN_QUOTA
@@ -0,0 +1,84 @@
+"""Lectura de PDF por páginas: presupuestos de lectura, tiempos y modo paralelo por rangos."""
+import io
+
+import pytest
+
+from modules import document_processor
+from modules.document_processor import extract_text_from_path, iter_pages
+
+N_PAGES = 40
+BLANK_PAGE = 5  # página sin texto (numeración desde 1)
+
+
+def _page_text(number: int) -> str:
+    return f"Pagina {number} del programa de analisis de datos y gestion de equipos"
+
+
+@pytest.fixture(scope="module")
+def pdf_bytes():
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for number in range(1, N_PAGES + 1):
+        if number != BLANK_PAGE:
+            pdf.drawString(72, 720, _page_text(number))
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _pages(pdf_bytes, **kwargs) -> list[str]:
+    return list(iter_pages("programa.pdf", pdf_bytes, **kwargs))
+
+
+def _expected(last: int) -> list[str]:
+    return [_page_text(n) for n in range(1, last + 1) if n != BLANK_PAGE]
+
+
+def test_reads_every_page_without_limits(pdf_bytes):
+    assert _pages(pdf_bytes, max_pages=0, max_chars=0, workers=1) == _expected(N_PAGES)
+
+
+def test_max_pages(pdf_bytes):
+    timings = []
+    pages = _pages(pdf_bytes, max_pages=10, max_chars=0, workers=1, timings=timings)
+    assert pages == _expected(10)
+    # La página en blanco cuenta para el límite y queda en los tiempos
+    assert [t["page"] for t in timings] == list(range(1, 11))
+
+
+def test_max_chars_keeps_the_page_that_reaches_it(pdf_bytes):
+    budget = len(_page_text(1)) * 2 + 1
+    pages = _pages(pdf_bytes, max_pages=0, max_chars=budget, workers=1)
+    assert pages == _expected(3)
+    assert sum(map(len, pages[:-1])) < budget <= sum(map(len, pages))
+
+
+def test_timings(pdf_bytes):
+    timings = []
+    pages = _pages(pdf_bytes, max_pages=0, max_chars=0, workers=1, timings=timings)
+    assert [t["page"] for t in timings] == list(range(1, N_PAGES + 1))
+    assert [t["chars"] for t in timings if t["chars"]] == [len(p) for p in pages]
+    assert timings[BLANK_PAGE - 1]["chars"] == 0
+    assert all(t["seconds"] >= 0 for t in timings)
+
+
+@pytest.mark.parametrize("max_pages, max_chars", [(0, 0), (25, 0), (0, 500)])
+def test_parallel_ranges_match_serial(pdf_bytes, monkeypatch, max_pages, max_chars):
+    monkeypatch.setattr(document_processor, "PDF_PARALLEL_MIN_PAGES", 8)
+    monkeypatch.setattr(document_processor, "PDF_PAGES_PER_TASK", 6)
+    serial_timings, parallel_timings = [], []
+    serial = _pages(pdf_bytes, max_pages=max_pages, max_chars=max_chars, workers=1,
+                    timings=serial_timings)
+    parallel = _pages(pdf_bytes, max_pages=max_pages, max_chars=max_chars, workers=3,
+                      timings=parallel_timings)
+    assert parallel == serial
+    assert [t["page"] for t in parallel_timings] == [t["page"] for t in serial_timings]
+    assert [t["chars"] for t in parallel_timings] == [t["chars"] for t in serial_timings]
+
+
+def test_extract_text_from_path(pdf_bytes, tmp_path):
+    path = tmp_path / "programa.pdf"
+    path.write_bytes(pdf_bytes)
+    text = extract_text_from_path(str(path), max_pages=3, max_chars=0)
+    assert text == "\n".join(_expected(3))
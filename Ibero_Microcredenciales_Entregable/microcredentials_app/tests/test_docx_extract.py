@@ -0,0 +1,74 @@
+"""Texto de DOCX leído con iterparse: orden del documento y celdas combinadas una sola vez."""
+import io
+
+import pytest
+
+from modules.document_processor import _extract_docx, iter_pages
+
+docx = pytest.importorskip("docx")
+
+
+def _docx_bytes(document) -> bytes:
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def document_bytes():
+    document = docx.Document()
+    document.add_heading("Programa de Analítica", level=1)
+    document.add_paragraph("Objetivo: analizar datos.")
+    run = document.add_paragraph().add_run("Unidad 1")
+    run.add_tab()
+    run.add_text("Estadística")
+    run.add_break()
+    run.add_text("Unidad 2")
+    document.add_paragraph("")  # párrafo vacío: se omite
+
+    table = document.add_table(rows=3, cols=3)
+    table.cell(0, 0).text = "Competencia"
+    table.cell(0, 1).text = "Nivel"
+    # Combinación horizontal (gridSpan) y vertical (vMerge)
+    table.cell(0, 1).merge(table.cell(0, 2))
+    table.cell(1, 0).text = "Pensamiento crítico"
+    table.cell(1, 0).merge(table.cell(2, 0))
+    table.cell(1, 1).text = "Básico"
+    table.cell(1, 2).text = "Intermedio"
+    table.cell(2, 1).text = "Avanzado"
+    document.add_paragraph("Bibliografía final.")
+    return _docx_bytes(document)
+
+
+def test_paragraphs_and_tables_in_document_order(document_bytes):
+    assert _extract_docx(document_bytes).split("\n") == [
+        "Programa de Analítica",
+        "Objetivo: analizar datos.",
+        "Unidad 1 Estadística",
+        "Unidad 2",
+        "Competencia",
+        "Nivel",
+        "Pensamiento crítico",
+        "Básico",
+        "Intermedio",
+        "Avanzado",
+        "Bibliografía final.",
+    ]
+
+
+def test_merged_cells_appear_once(document_bytes):
+    text = _extract_docx(document_bytes)
+    assert text.count("Nivel") == 1
+    assert text.count("Pensamiento crítico") == 1
+    # python-docx repite la celda combinada en cada posición de la cuadrícula
+    table = docx.Document(io.BytesIO(document_bytes)).tables[0]
+    assert [c.text for c in table.rows[0].cells].count("Nivel") == 2
+
+
+def test_iter_pages_reads_docx_as_one_page(document_bytes):
+    timings = []
+    pages = list(iter_pages("programa.docx", document_bytes, max_pages=0, max_chars=0,
+                            timings=timings))
+    assert pages == [_extract_docx(document_bytes)]
+    assert [t["page"] for t in timings] == [1]
+    assert timings[0]["chars"] == len(pages[0])
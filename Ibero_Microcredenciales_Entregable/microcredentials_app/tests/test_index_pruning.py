@@ -0,0 +1,82 @@
+"""Poda estática del índice TF-IDF: recall@k mínimo y formato de la matriz guardada."""
+import numpy as np
+import pytest
+
+from config import PRUNE_MIN_RECALL
+from conftest import make_courses, prepared
+from modules import coursera_matcher
+from modules.coursera_matcher import CourseraMatcher
+
+
+@pytest.fixture(scope="module")
+def courses():
+    return prepared(make_courses(400))
+
+
+def _fit(courses, monkeypatch, prune_mass):
+    monkeypatch.setattr(coursera_matcher, "INDEX_PRUNE_MASS", prune_mass)
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(courses)
+    return matcher
+
+
+def _row_norms(matrix) -> np.ndarray:
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float64).ravel())
+
+
+def _check_layout(matrix):
+    assert matrix.format == "csr"
+    assert matrix.dtype == np.float32
+    assert matrix.has_sorted_indices
+
+
+def test_unpruned_index_is_normalized_float32(courses, monkeypatch):
+    matcher = _fit(courses, monkeypatch, 0.0)
+    _check_layout(matcher._course_vectors)
+    np.testing.assert_allclose(_row_norms(matcher._course_vectors), 1.0, atol=1e-5)
+    assert matcher.index_report["recall"] == 1.0
+
+
+@pytest.mark.parametrize("prune_mass", [0.006, 0.05, 0.2])
+def test_stored_index_keeps_recall_above_threshold(courses, monkeypatch, prune_mass):
+    full = _fit(courses, monkeypatch, 0.0)
+    matcher = _fit(courses, monkeypatch, prune_mass)
+    report = matcher.index_report
+    vectors = matcher._course_vectors
+    _check_layout(vectors)
+    if report["prune_mass"]:
+        assert report["recall"] >= PRUNE_MIN_RECALL
+        assert report["nnz"] < full.index_report["nnz"]
+        assert report["nbytes"] < report["unpruned_nbytes"]
+        # Las filas podadas no se renormalizan: conservan al menos 1 - mass de su masa
+        norms = _row_norms(vectors)
+        assert (norms <= 1.0 + 1e-5).all()
+        assert (norms ** 2 >= 1.0 - prune_mass - 1e-5).all()
+    else:
+        assert (vectors != full._course_vectors).nnz == 0
+    # En el catálogo sintético, con poco vocabulario compartido por todos los
+    # cursos, solo la poda más leve conserva el recall
+    assert bool(report["prune_mass"]) == (prune_mass == 0.006)
+
+
+def test_low_recall_falls_back_to_full_index(courses, monkeypatch):
+    matcher = _fit(courses, monkeypatch, 0.9)
+    report = matcher.index_report
+    assert report["recall"] < PRUNE_MIN_RECALL
+    assert report["prune_mass"] == 0.0
+    assert report["nbytes"] == report["unpruned_nbytes"]
+    np.testing.assert_allclose(_row_norms(matcher._course_vectors), 1.0, atol=1e-5)
+
+    # refresh() poda las filas nuevas igual que fit(): aquí, sin poda
+    matcher.refresh(prepared(make_courses(420)))
+    _check_layout(matcher._course_vectors)
+    np.testing.assert_allclose(_row_norms(matcher._course_vectors), 1.0, atol=1e-5)
+
+
+def test_saved_index_keeps_layout(courses, monkeypatch, tmp_path):
+    matcher = _fit(courses, monkeypatch, 0.006)
+    matcher.save(str(tmp_path))
+    loaded = CourseraMatcher.load(str(tmp_path), courses, engine="brute")
+    _check_layout(loaded._course_vectors)
+    assert (loaded._course_vectors != matcher._course_vectors).nnz == 0
+    assert loaded.index_report == matcher.index_report
@@ -0,0 +1,71 @@
+"""Conteo de frases candidatas y stemmer de español sobre textos fijos."""
+import pytest
+
+from modules import keyphrases
+from modules.keyphrases import PhraseCounts, count_phrases, spanish_stem
+
+TEXT = "La toma de decisiones. Toma de decisiones estratégicas, análisis de datos."
+
+
+def test_counts_and_surface_forms():
+    phrases = count_phrases(TEXT)
+    assert phrases.counts == {
+        "toma": 2, "decisiones": 2, "estratégicas": 1, "análisis": 1, "datos": 1,
+        "toma decisiones": 2, "decisiones estratégicas": 1, "análisis datos": 1,
+        "toma decisiones estratégicas": 1,
+    }
+    # La clave no lleva stop words; la forma original sí (la primera aparición)
+    assert phrases.surface["toma decisiones"] == "toma de decisiones"
+    assert phrases.surface["análisis datos"] == "análisis de datos"
+
+
+def test_punctuation_and_gaps_break_phrases():
+    # La coma corta "estratégicas, análisis": no hay n-grama entre ambas
+    assert "estratégicas análisis" not in count_phrases(TEXT).counts
+    # Más de max_gap stop words entre dos palabras de contenido cortan la frase
+    text = "gestión de los de equipos"
+    assert "gestión equipos" not in count_phrases(text, max_gap=2).counts
+    assert "gestión equipos" in count_phrases(text, max_gap=3).counts
+
+
+def test_phrases_do_not_cross_chunks():
+    counts = count_phrases(["análisis de", "datos abiertos"]).counts
+    assert "análisis datos" not in counts
+    assert counts["datos abiertos"] == 1
+    assert count_phrases(["análisis de datos"] * 3).counts["análisis datos"] == 3
+
+
+def test_batches_count_like_a_single_text(monkeypatch):
+    chunks = [TEXT] * 50
+    expected = count_phrases(chunks).counts
+    monkeypatch.setattr(keyphrases, "_BATCH_CHARS", len(TEXT) * 3)
+    assert count_phrases(chunks).counts == expected
+
+
+def test_counts_are_bounded():
+    phrases = PhraseCounts(max_candidates=4)
+    for i, count in enumerate([5, 1, 4, 2, 3]):
+        phrases.add(f"k{i}", count, lambda i=i: f"forma {i}")
+    # Al pasar de 4 claves se conserva la mitad más frecuente
+    assert phrases.counts == {"k0": 5, "k2": 4}
+    assert phrases.surface == {"k0": "forma 0", "k2": "forma 2"}
+    phrases.add("k0", 2, lambda: "otra")
+    assert phrases.counts["k0"] == 7 and phrases.surface["k0"] == "forma 0"
+
+
+@pytest.mark.parametrize("words", [
+    ("organización", "organizaciones", "organizacion"),
+    ("estrategia", "estrategias"),
+    ("financiera", "financieros", "financiero"),
+    ("solución", "soluciones"),
+    ("capacidad", "capacidades"),
+    ("liderazgo", "liderazgos"),
+])
+def test_stem_merges_inflections(words):
+    assert len({spanish_stem(w) for w in words}) == 1, [spanish_stem(w) for w in words]
+
+
+def test_stem_keeps_short_roots():
+    assert spanish_stem("datos") == "dat"
+    assert spanish_stem("ser") == "ser"
+    assert spanish_stem("red") == "red"
@@ -0,0 +1,94 @@
+"""Índice LSA: recall frente a la búsqueda exhaustiva, cuantización int8 y grupos k-means."""
+import numpy as np
+import pytest
+
+from conftest import make_courses, prepared
+from modules.coursera_matcher import CourseraMatcher
+from modules.lsa_index import LsaIndex
+
+K = 10
+QUERY_ROWS = range(0, 400, 5)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(prepared(make_courses(400)))
+    return matcher._course_vectors
+
+
+def _top(scores, rows=None) -> np.ndarray:
+    top = np.argsort(-np.asarray(scores), kind="stable")[:K]
+    return top if rows is None else rows[top]
+
+
+def _recall(expected: list, found: list) -> float:
+    hits = sum(len(np.intersect1d(e, f)) for e, f in zip(expected, found))
+    return hits / sum(len(e) for e in expected)
+
+
+def _brute(vectors) -> list:
+    return [_top((vectors @ vectors[i].T).toarray().ravel()) for i in QUERY_ROWS]
+
+
+def test_recall_against_brute_force(vectors):
+    expected = _brute(vectors)
+    recalls = {}
+    for n_components in (64, 256):
+        lsa = LsaIndex.fit(vectors, n_components=n_components, quantize="int8", n_clusters=0)
+        recalls[n_components] = _recall(expected, [_top(lsa.similarities(vectors[i]))
+                                                   for i in QUERY_ROWS])
+    assert recalls[256] >= 0.9
+    assert recalls[64] < recalls[256]
+
+
+def test_int8_round_trip(vectors, tmp_path):
+    exact = LsaIndex.fit(vectors, n_components=64, quantize="float32", n_clusters=0)
+    quantized = LsaIndex.fit(vectors, n_components=64, quantize="int8", n_clusters=0)
+    assert quantized.embeddings.dtype == np.int8
+    assert quantized.nbytes < exact.nbytes
+    np.testing.assert_array_equal(quantized.components, exact.components)
+
+    # Cada componente se recupera con un error de a lo sumo media escala
+    restored = quantized.embeddings.astype(np.float32) * quantized.scales[:, None]
+    error = np.abs(restored - exact.embeddings)
+    assert (error <= quantized.scales[:, None] / 2 + 1e-6).all()
+    for i in QUERY_ROWS:
+        np.testing.assert_allclose(quantized.similarities(vectors[i]),
+                                   exact.similarities(vectors[i]), atol=0.02)
+
+    quantized.save(str(tmp_path))
+    loaded = LsaIndex.load(str(tmp_path))
+    np.testing.assert_array_equal(loaded.embeddings, quantized.embeddings)
+    np.testing.assert_array_equal(loaded.scales, quantized.scales)
+    np.testing.assert_array_equal(loaded.similarities(vectors[0]), quantized.similarities(vectors[0]))
+
+
+def test_probe_covers_the_closest_clusters(vectors):
+    n_clusters = 8
+    lsa = LsaIndex.fit(vectors, n_components=64, quantize="int8", n_clusters=n_clusters)
+    offsets = lsa.cluster_offsets
+    assert offsets[0] == 0 and offsets[-1] == vectors.shape[0]
+    assert np.array_equal(np.sort(lsa.cluster_rows), np.arange(vectors.shape[0]))
+
+    sizes = np.diff(offsets)
+    for i in QUERY_ROWS:
+        query = lsa.project(vectors[i])[0]
+        closest = np.argsort(-(lsa.centroids @ query), kind="stable")
+        for nprobe in (1, 3, n_clusters):
+            rows = lsa.probe(vectors[i], nprobe=nprobe)
+            assert len(rows) == sizes[closest[:nprobe]].sum()
+            assert (np.diff(rows) > 0).all()
+        # Con todos los grupos se revisa el catálogo completo
+        assert len(lsa.probe(vectors[i], nprobe=n_clusters)) == vectors.shape[0]
+    assert LsaIndex.fit(vectors, n_components=16, n_clusters=0).probe(vectors[0]) is None
+
+
+def test_probe_recall_against_exhaustive_lsa(vectors):
+    lsa = LsaIndex.fit(vectors, n_components=64, quantize="int8", n_clusters=8)
+    expected, found = [], []
+    for i in QUERY_ROWS:
+        expected.append(_top(lsa.similarities(vectors[i])))
+        rows = lsa.probe(vectors[i], nprobe=3)
+        found.append(_top(lsa.similarities(vectors[i], rows), rows))
+    assert _recall(expected, found) >= 0.95
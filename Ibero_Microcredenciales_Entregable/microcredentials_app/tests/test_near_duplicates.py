@@ -0,0 +1,101 @@
+"""Agrupación de casi duplicados (MinHash/LSH) y filtros sobre las variantes."""
+import numpy as np
+import pandas as pd
+
+from config import COL_DESCRIPTION, COL_DIFFICULTY, COL_HOURS, COL_LANGUAGE, COL_RATING, COL_URL
+from conftest import make_courses
+from modules.catalog_loader import load_course_store
+from modules.coursera_matcher import CourseraMatcher
+from modules.near_duplicates import near_duplicate_groups, VARIANT_URLS
+
+
+def test_groups_compare_every_pair_in_a_bucket():
+    # Las tres filas comparten la primera banda; la 0 difiere en el resto,
+    # las filas 1 y 2 son idénticas
+    signatures = np.array([
+        [1, 1, 10, 11, 12, 13, 14, 15],
+        [1, 1, 20, 21, 22, 23, 24, 25],
+        [1, 1, 20, 21, 22, 23, 24, 25],
+    ], dtype=np.uint64)
+    groups = near_duplicate_groups(signatures, threshold=0.8, bands=4)
+    assert groups.tolist() == [0, 1, 1]
+
+
+def test_groups_are_connected_components():
+    # 0~1 y 1~2 superan el umbral aunque 0 y 2 no se parezcan lo suficiente
+    signatures = np.array([
+        [1, 1, 2, 2, 3, 3, 4, 4, 5, 5],
+        [1, 1, 2, 2, 3, 3, 4, 4, 9, 9],
+        [1, 1, 2, 2, 3, 3, 8, 8, 9, 9],
+    ], dtype=np.uint64)
+    groups = near_duplicate_groups(signatures, threshold=0.8, bands=5)
+    assert groups.tolist() == [0, 0, 0]
+
+
+def test_collapsed_row_passes_filters_of_any_variant(data_dirs):
+    courses = make_courses(30)
+    # Curso 0 y su variante: mismo texto, otro idioma, nivel y duración, menor rating
+    variant = courses.iloc[[0]].copy()
+    variant[COL_URL] = "https://coursera.org/learn/c0-es"
+    variant[COL_LANGUAGE] = "Portuguese"
+    variant[COL_DIFFICULTY] = "Mixed"
+    variant[COL_HOURS] = 1
+    variant[COL_RATING] = 1.0
+    courses.loc[0, COL_HOURS] = 40
+    courses.loc[0, COL_DIFFICULTY] = "Advanced"
+    courses.loc[0, COL_LANGUAGE] = "English"
+    courses.loc[0, COL_DESCRIPTION] += " unique words for the duplicated course"
+    variant[COL_DESCRIPTION] = courses.loc[0, COL_DESCRIPTION]
+    source = data_dirs / "courses.csv"
+    pd.concat([courses, variant], ignore_index=True).to_csv(source, index=False)
+
+    store = load_course_store(use_cache=False, source_path=str(source))
+    assert len(store) == 30
+    assert store.value(VARIANT_URLS, 0) == "https://coursera.org/learn/c0-es"
+
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(store)
+    for filters in ({"languages": ["Portuguese"]}, {"difficulties": ["Mixed"]}, {"max_hours": 1},
+                    {"languages": ["Portuguese"], "max_hours": 1},
+                    {"languages": ["English"], "difficulties": ["Advanced"]}):
+        mask = matcher._candidate_mask(**filters)
+        assert mask[0], filters
+    # Cada filtro lo cumple una fila distinta del grupo: ninguna los cumple todos
+    for filters in ({"difficulties": ["Advanced"], "max_hours": 1},
+                    {"languages": ["English"], "max_hours": 1},
+                    {"languages": ["Portuguese"], "min_rating": 3}):
+        mask = matcher._candidate_mask(**filters)
+        assert not mask[0], filters
+
+
+def test_result_shows_the_variant_that_passed_the_filters(data_dirs):
+    courses = make_courses(30)
+    variant = courses.iloc[[0]].copy()
+    variant[COL_URL] = "https://coursera.org/learn/c0-es"
+    variant[COL_LANGUAGE] = "Spanish"
+    variant[COL_HOURS] = 6
+    variant[COL_RATING] = 1.0
+    courses.loc[0, [COL_LANGUAGE, COL_HOURS]] = ["English", 40]
+    source = data_dirs / "courses.csv"
+    pd.concat([courses, variant], ignore_index=True).to_csv(source, index=False)
+    store = load_course_store(use_cache=False, source_path=str(source))
+
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(store)
+    query = courses.loc[0, COL_DESCRIPTION]
+    for batch in (False, True):
+        kwargs = dict(top_n=3, threshold=0.0, mmr_lambda=1.0)
+        if batch:
+            results = matcher.find_matches_batch(
+                [query], filters={"max_hours": 10, "languages": ["Spanish"]}, **kwargs)[0]
+        else:
+            results = matcher.find_matches(query, max_hours=10, languages=["Spanish"], **kwargs)
+        top = results[0]
+        assert top["url"] == "https://coursera.org/learn/c0-es"
+        assert (top["horas"], top["idioma"], top["rating"]) == (6, "Spanish", 1.0)
+        assert top["variantes"] == ["https://coursera.org/learn/c0"]
+
+    # Sin filtros (o si la fila canónica los cumple) se muestra la fila canónica
+    top = matcher.find_matches(query, top_n=1, threshold=0.0, mmr_lambda=1.0)[0]
+    assert (top["url"], top["horas"], top["idioma"]) == ("https://coursera.org/learn/c0", 40, "English")
+    assert top["variantes"] == ["https://coursera.org/learn/c0-es"]
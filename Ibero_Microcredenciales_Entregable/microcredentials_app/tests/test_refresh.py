@@ -0,0 +1,70 @@
+"""Actualización incremental del índice de cursos (CourseraMatcher.refresh)."""
+import numpy as np
+import pandas as pd
+
+from config import COL_DESCRIPTION, COL_URL
+from conftest import make_courses, prepared
+from modules.coursera_matcher import CourseraMatcher, _index_matrix
+
+
+def _next_version(old: pd.DataFrame) -> pd.DataFrame:
+    """Quita 20 cursos, cambia la descripción de otros 10 y agrega 25 nuevos (mismo vocabulario)."""
+    new = old.iloc[20:].copy()
+    changed = new.index[:10]
+    new.loc[changed, COL_DESCRIPTION] += " statistics regression marketing"
+    added = make_courses(25, seed=1, start=len(old))
+    return prepared(pd.concat([new, added], ignore_index=True))
+
+
+def _vectors(matcher: CourseraMatcher) -> np.ndarray:
+    return matcher._course_vectors.toarray()
+
+
+def test_refresh_reuses_frozen_vocabulary():
+    old = prepared(make_courses(300))
+    new = _next_version(old)
+    matcher = CourseraMatcher(engine="brute", vectorizer_mode="tfidf")
+    matcher.fit(old)
+
+    summary = matcher.refresh(new)
+
+    assert summary["full_refit"] is False
+    assert (summary["added"], summary["removed"], summary["changed"]) == (25, 20, 10)
+    # Cada fila es la que daría el vectorizador congelado sobre el catálogo nuevo
+    expected = _index_matrix(matcher.vectorizer.transform(new["combined_text"].tolist()))
+    np.testing.assert_allclose(_vectors(matcher), expected.toarray(), atol=1e-6)
+    assert len(matcher._courses) == len(new)
+
+
+def test_hashed_refresh_equals_full_fit():
+    old = prepared(make_courses(300))
+    new = _next_version(old)
+    refreshed = CourseraMatcher(engine="brute", vectorizer_mode="hashing")
+    refreshed.fit(old)
+    refreshed.refresh(new)
+    fitted = CourseraMatcher(engine="brute", vectorizer_mode="hashing")
+    fitted.fit(new)
+
+    np.testing.assert_allclose(_vectors(refreshed), _vectors(fitted), atol=1e-6)
+    query = "python statistics regression for data analysis"
+    assert ([c["url"] for c in refreshed.find_matches(query, top_n=10)]
+            == [c["url"] for c in fitted.find_matches(query, top_n=10)])
+
+
+def test_vocabulary_drift_triggers_full_refit():
+    old = prepared(make_courses(200))
+    novel = make_courses(60, seed=2, start=len(old))
+    novel[COL_DESCRIPTION] = "quantum photonics cryptography lattice qubits entanglement " * 5
+    new = prepared(pd.concat([old, novel], ignore_index=True))
+    matcher = CourseraMatcher(engine="brute", vectorizer_mode="tfidf")
+    matcher.fit(old)
+
+    summary = matcher.refresh(new, drift_threshold=0.05)
+
+    assert summary["full_refit"] is True
+    assert summary["drift"] > 0.05
+    assert "photonics" in matcher.vectorizer.vocabulary_
+    fitted = CourseraMatcher(engine="brute", vectorizer_mode="tfidf")
+    fitted.fit(new)
+    np.testing.assert_allclose(_vectors(matcher), _vectors(fitted), atol=1e-6)
+    assert matcher.find_matches("quantum photonics", top_n=3)[0]["url"] in set(novel[COL_URL])
@@ -0,0 +1,87 @@
+"""Caché de resultados: LRU en memoria, TTL en SQLite y separación de claves."""
+import pytest
+
+import config
+from modules.catalog_bundle import config_key
+from modules.result_cache import ResultCache, cache_key, text_digest
+
+
+class Clock:
+    """Reloj manual para controlar el TTL."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_memory_level_evicts_least_recently_used(tmp_path, clock):
+    cache = ResultCache(path=str(tmp_path / "cache.sqlite"), max_items=2, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.put("c", 3)
+    assert list(cache._memory) == ["a", "c"]
+
+    # "b" salió de la memoria pero sigue en disco y vuelve a la memoria
+    assert cache.get("b") == 2
+    assert cache.hits == {"memory": 1, "disk": 1}
+    assert list(cache._memory) == ["c", "b"]
+
+
+def test_memory_only_cache_forgets_evicted_entries(clock):
+    cache = ResultCache(path="", max_items=1, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.misses == 1
+
+
+def test_disk_entries_expire_after_ttl(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    ResultCache(path=path, ttl=60, clock=clock).put("old", {"x": 1})
+    clock.now += 30
+    ResultCache(path=path, ttl=60, clock=clock).put("new", {"x": 2})
+
+    clock.now += 40  # "old" tiene 70 s, "new" 40 s
+    cache = ResultCache(path=path, ttl=60, clock=clock)
+    assert cache.get("old") is None
+    assert cache.get("new") == {"x": 2}
+    assert cache.purge() == 1
+
+    clock.now += 30
+    assert ResultCache(path=path, ttl=60, clock=clock).get("new") is None
+
+
+def test_values_are_independent_copies(tmp_path, clock):
+    cache = ResultCache(path=str(tmp_path / "cache.sqlite"), clock=clock)
+    cache.put("k", {"results": [1, 2]})
+    cache.get("k")["results"].append(3)
+    assert cache.get("k") == {"results": [1, 2]}
+
+
+def test_keys_separate_filters_and_engines(tmp_path, clock, monkeypatch):
+    def results_key(**filters):
+        return cache_key("results", text=text_digest("documento"), competencies=["python"],
+                         max_hours=None, n_coursera=10, mmr_lambda=0.7,
+                         filters=filters, catalog={"config": config_key()})
+
+    brute = results_key(languages=["Spanish"])
+    assert results_key(languages=["Spanish"]) == brute
+    assert results_key(languages=["English"]) != brute
+    assert results_key(languages=["Spanish"], min_rating=4.5) != brute
+    monkeypatch.setattr(config, "MATCH_ENGINE", "lsa" if config.MATCH_ENGINE != "lsa" else "brute")
+    assert results_key(languages=["Spanish"]) != brute
+
+    cache = ResultCache(path=str(tmp_path / "cache.sqlite"), clock=clock)
+    cache.put(brute, ["brute"])
+    assert cache.get(results_key(languages=["Spanish"])) is None
+    assert cache.get(brute) == ["brute"]
+    assert cache_key("analysis", text="x") != cache_key("results", text="x")
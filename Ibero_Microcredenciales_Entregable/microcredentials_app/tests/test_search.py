@@ -0,0 +1,77 @@
+"""Top-k de cursos: cada motor y los filtros deben dar lo mismo que la búsqueda exhaustiva."""
+import gc
+
+import numpy as np
+import pytest
+
+from conftest import make_courses, prepared
+from modules.coursera_matcher import CourseraMatcher
+from modules.sharded_search import ShardedSearcher
+
+QUERIES = [
+    "python statistics regression machine learning",
+    "marketing strategy and leadership",
+    "clinical nutrition diagnosis",
+]
+FILTERS = [
+    {},
+    {"languages": ["Spanish"]},
+    {"languages": ["French"], "difficulties": ["Beginner"], "max_hours": 8},
+]
+
+
+@pytest.fixture(scope="module")
+def courses():
+    return prepared(make_courses(400))
+
+
+def _urls(matcher, query, **filters):
+    return [c["url"] for c in matcher.find_matches(query, top_n=10, mmr_lambda=1.0, **filters)]
+
+
+def _brute_urls(matcher, query, **filters):
+    """Referencia: vector completo de scores y máscara sobre todo el catálogo."""
+    similarities = matcher.similarities(query)
+    return [c["url"] for c in matcher.find_matches(
+        query, top_n=10, mmr_lambda=1.0, similarities=similarities, **filters)]
+
+
+@pytest.mark.parametrize("engine", ["brute", "maxscore"])
+@pytest.mark.parametrize("filters", FILTERS)
+def test_engine_matches_exhaustive_search(courses, engine, filters):
+    matcher = CourseraMatcher(engine=engine)
+    matcher.fit(courses)
+    for query in QUERIES:
+        assert _urls(matcher, query, **filters) == _brute_urls(matcher, query, **filters)
+
+
+def test_sharded_search_matches_brute(courses):
+    brute = CourseraMatcher(engine="brute")
+    brute.fit(courses)
+    sharded = CourseraMatcher(engine="sharded")
+    sharded.fit(courses)
+    sharded._shards = ShardedSearcher(sharded._course_vectors, n_shards=3, workers=2)
+    try:
+        for filters in FILTERS:
+            for query in QUERIES:
+                assert _urls(sharded, query, **filters) == _urls(brute, query, **filters)
+                np.testing.assert_allclose(sharded.similarities(query), brute.similarities(query),
+                                           atol=1e-6)
+    finally:
+        sharded.close()
+
+
+def test_sharded_searcher_releases_on_close_and_collect(courses):
+    matcher = CourseraMatcher(engine="brute")
+    matcher.fit(courses)
+    searcher = ShardedSearcher(matcher._course_vectors, n_shards=2, workers=1)
+    finalizer = searcher._finalizer
+    searcher.close()
+    assert not finalizer.alive
+    searcher.close()  # cerrar dos veces no falla
+
+    searcher = ShardedSearcher(matcher._course_vectors, n_shards=2, workers=1)
+    finalizer = searcher._finalizer
+    del searcher
+    gc.collect()
+    assert not finalizer.alive
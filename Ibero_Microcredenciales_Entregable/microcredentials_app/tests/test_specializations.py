@@ -0,0 +1,68 @@
+"""Relevancia de especializaciones a partir de sus cursos (SpecializationMatcher)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import (
+    MIN_SIMILARITY_THRESHOLD, SPEC_TOP_COURSES, COL_SPEC_URL, SCOL_NAME, SCOL_URL, SCOL_DESCRIPTION, SCOL_DOMAIN, SCOL_TYPE,
+)
+from conftest import make_courses, prepared
+from modules.catalog_loader import _prepare_specializations
+from modules.coursera_matcher import CourseraMatcher, SpecializationMatcher
+
+SPEC_URL = "https://coursera.org/specializations/{}"
+
+
+def _catalog():
+    courses = make_courses(300)
+    # Cada especialización agrupa 6 cursos de su dominio; "nutrition-basics" no tiene cursos
+    for domain, slug in (("Data Science", "data"), ("Business", "business")):
+        rows = courses.index[courses["Domain"] == domain][:6]
+        courses.loc[rows, COL_SPEC_URL] = SPEC_URL.format(slug)
+    specs = pd.DataFrame([
+        {SCOL_NAME: "Data Analysis", SCOL_URL: SPEC_URL.format("data"),
+         SCOL_DESCRIPTION: "Learn data analysis", SCOL_DOMAIN: "Data Science"},
+        {SCOL_NAME: "Business Strategy", SCOL_URL: SPEC_URL.format("business"),
+         SCOL_DESCRIPTION: "Learn strategy", SCOL_DOMAIN: "Business"},
+        {SCOL_NAME: "Nutrition Basics", SCOL_URL: SPEC_URL.format("nutrition-basics"),
+         SCOL_DESCRIPTION: "nutrition wellbeing clinical nutrition diagnosis", SCOL_DOMAIN: "Health"},
+    ])
+    specs[SCOL_TYPE] = "Specialization"
+    return prepared(courses), _prepare_specializations(specs)
+
+
+def test_course_scores_pass_default_threshold():
+    courses, specs = _catalog()
+    course_matcher = CourseraMatcher(engine="brute")
+    course_matcher.fit(courses)
+    spec_matcher = SpecializationMatcher()
+    spec_matcher.fit(specs, courses)
+    query = "python statistics regression machine learning pandas"
+
+    scores = course_matcher.similarities(query)
+
+    results = spec_matcher.find_matches(query, course_scores=scores, text_weight=0.0)
+
+    assert results[0]["url"] == SPEC_URL.format("data")
+    assert results[0]["similitud"] >= MIN_SIMILARITY_THRESHOLD
+    # Promedio de sus SPEC_TOP_COURSES cursos más similares
+    members = (courses[COL_SPEC_URL] == SPEC_URL.format("data")).to_numpy()
+    best = np.sort(scores[members])[::-1][:SPEC_TOP_COURSES]
+    assert results[0]["similitud"] == pytest.approx(best.mean(), abs=1e-4)
+
+
+def test_specialization_without_courses_uses_its_text():
+    courses, specs = _catalog()
+    course_matcher = CourseraMatcher(engine="brute")
+    course_matcher.fit(courses)
+    spec_matcher = SpecializationMatcher()
+    spec_matcher.fit(specs, courses)
+    query = "clinical nutrition and diagnosis"
+    scores = course_matcher.similarities(query)
+
+    results = spec_matcher.find_matches(query, course_scores=scores, text_weight=0.0)
+    batch = spec_matcher.find_matches_batch(
+        [query], course_scores=course_matcher.similarities_batch([query]), text_weight=0.0)
+
+    assert SPEC_URL.format("nutrition-basics") in [r["url"] for r in results]
+    assert [r["url"] for r in batch[0]] == [r["url"] for r in results]